@@ -1,8 +1,10 @@
 import streamlit as st
-import json
-import time
+import io
 from datetime import datetime
 from pathlib import Path
+from dir_catalog import catalog
+from jsonl_append import append_jsonl_stream, JSONLValidationError
+from operations import runner, track_operation, render_operations
 
 BASE_FOLDER = "data"  # Update with your actual base path
 
@@ -10,7 +12,7 @@ if "add_file_key" not in st.session_state:
     st.session_state.add_file_key = 0
 
 # Step 1: Get all subfolders dynamically (HDR, FTSA, etc.)
-subfolders = [f.name for f in Path(BASE_FOLDER).iterdir() if f.is_dir()]
+subfolders = catalog.list_folders(BASE_FOLDER)
 
 st.title("JSONL File Appender")
 
@@ -22,7 +24,7 @@ with tabs[0]:
 
     # Step 3: Get JSONL files in the selected subfolder
     folder_path = Path(BASE_FOLDER) / selected_subfolder
-    jsonl_files = [f.name for f in folder_path.glob("*.jsonl")]
+    jsonl_files = catalog.list_files(folder_path, "jsonl")
 
 # Step 4: Condition Handling
 if not jsonl_files:
@@ -55,24 +57,23 @@ if option == "Upload JSONL File":
     uploaded_file = st.file_uploader("Upload a JSONL file", type=["jsonl"], key=f"upload_file_{st.session_state.add_file_key}")
 
     if uploaded_file and st.button("Append File"):
-        progress_bar = st.progress(0)
-
-        with st.spinner("Appending file..."):
-            for percent_complete in range(1, 101):
-                time.sleep(0.01)
-                progress_bar.progress(percent_complete)
-
-            try:
-                with open(file_path, "ab") as f:
-                    f.write(uploaded_file.getbuffer())
-
-                st.success(f"✅ {uploaded_file.name} appended to {selected_file} successfully!")
-            except Exception as e:
-                st.error(f"❌ Error appending file: {e}")
+        # Stream, validate and splice the upload in the background; progress reflects bytes processed
+        op = runner.submit(
+            f"Append {uploaded_file.name} to {selected_file}",
+            append_jsonl_stream,
+            uploaded_file,
+            file_path,
+            total=uploaded_file.size,
+            unit="bytes",
+            key=folder_path
+        )
+        track_operation("append_operations", op)
 
         st.session_state.add_file_key += 1
         st.rerun()
 
+    render_operations("append_operations", success_message=lambda op: f"{op.name} completed successfully! ({op.result} lines)")
+
 elif option == "Enter JSONL Data Manually":
     user_input = st.text_area("Enter JSONL data (one JSON per line)")
 
@@ -88,17 +89,16 @@ elif option == "Enter JSONL Data Manually":
     if st.button("Append JSONL Data"):
         if user_input.strip():
             try:
-                jsonl_lines = user_input.strip().split("\n")
                 target_file = new_file_path if create_new_file else file_path
 
-                with open(target_file, "a") as f:
-                    for line in jsonl_lines:
-                        json.loads(line)  # Validate JSON format
-                        f.write(line + "\n")
+                # Same validated, all-or-nothing append as file uploads
+                append_jsonl_stream(io.BytesIO(user_input.strip().encode("utf-8")), target_file)
 
                 st.success(f"✅ JSONL data {'saved to new file' if create_new_file else 'appended successfully!'}")
-            except json.JSONDecodeError:
-                st.error("❌ Invalid JSON format. Ensure each line is a valid JSON.")
+            except JSONLValidationError as e:
+                st.error(f"❌ Invalid JSON format on {e}. Ensure each line is a valid JSON.")
+            except OSError as e:
+                st.error(f"❌ Error appending file: {e}")
         else:
             st.warning("⚠️ No JSONL data provided.")
 
@@ -0,0 +1,102 @@
+import argparse
+import time
+from pathlib import Path
+
+import jsonl_codec
+
+DEFAULT_MAX_RECORDS = 100_000
+REPEATS = 3  # Best of this many passes is reported
+
+
+def collect_lines(paths, max_records):
+    """
+    Raw lines of the JSONL files under the given files or folders
+
+    Args:
+        paths (list): Files or folders to search for *.jsonl
+        max_records (int): Stop after this many lines
+
+    Returns:
+        list: Non-empty lines as bytes
+    """
+    lines = []
+    for path in paths:
+        path = Path(path)
+        files = sorted(path.rglob("*.jsonl")) if path.is_dir() else [path]
+        for file_path in files:
+            with open(file_path, "rb") as f:
+                for line in f:
+                    if line.strip():
+                        lines.append(line.rstrip(b"\r\n"))
+                        if len(lines) >= max_records:
+                            return lines
+    return lines
+
+
+def best_time(fn, items):
+    best = None
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        for item in items:
+            fn(item)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench_backend(name, lines):
+    """
+    Time decoding and encoding every line with one backend
+
+    Returns:
+        dict: Microseconds per record and decode throughput
+    """
+    jsonl_codec.use_backend(name)
+    records = [jsonl_codec.loads(line) for line in lines]
+    total_bytes = sum(len(line) for line in lines)
+    timings = {
+        "decode": best_time(jsonl_codec.loads, lines),
+        "decode_str": best_time(jsonl_codec.loads, [line.decode("utf-8") for line in lines]),
+        "encode_line": best_time(jsonl_codec.dump_line, records),
+        "encode_indent": best_time(lambda record: jsonl_codec.dumps(record, indent=4), records),
+    }
+    row = {"backend": name}
+    for operation, seconds in timings.items():
+        row[f"{operation}_us"] = round(seconds / len(lines) * 1e6, 2)
+    row["decode_mb_per_s"] = round(total_bytes / timings["decode"] / 1e6, 1)
+    return row
+
+
+def print_table(rows):
+    columns = list(rows[0])
+    widths = [max(len(name), *(len(str(row[name])) for row in rows)) for name in columns]
+    print("  ".join(name.rjust(width) for name, width in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(str(row[name]).rjust(width) for name, width in zip(columns, widths)))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Per-record JSON decode and encode cost of each available backend")
+    parser.add_argument("paths", nargs="*", default=["./data"], help="JSONL files or folders to take records from")
+    parser.add_argument("--max-records", type=int, default=DEFAULT_MAX_RECORDS, help="Records to benchmark")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    lines = collect_lines(args.paths, args.max_records)
+    if not lines:
+        raise SystemExit(f"No JSONL records found under {', '.join(map(str, args.paths))}")
+    active = jsonl_codec.backend()
+    try:
+        rows = [bench_backend(name, lines) for name in jsonl_codec.BACKENDS]
+    finally:
+        jsonl_codec.use_backend(active)
+
+    size = sum(len(line) for line in lines) / len(lines)
+    print(f"{len(lines):,} records, {size:,.0f} bytes per record on average; microseconds per record:")
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
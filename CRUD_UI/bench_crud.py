@@ -0,0 +1,392 @@
+import argparse
+import io
+import os
+import random
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import jsonl_codec
+
+SCALES = {"1k": 1_000, "100k": 100_000, "1M": 1_000_000}
+DEFAULT_SCALES = ["1k", "100k"]  # 1M writes a file of about 3 GB; pass --scales 1k,100k,1M for it
+OPERATIONS = ["open", "save", "compact", "count", "append", "trash"]
+DEFAULT_REPEATS = 3  # Median latency and highest RSS of this many runs are reported
+DEFAULT_TOLERANCE = 0.25  # Relative slowdown or growth in RSS that counts as a regression
+MIN_REGRESSION_SECONDS = 0.02  # Smaller slowdowns are timer noise
+DEFAULT_BASELINE = "bench_crud_baseline.json"
+DEFAULT_DATA_DIR = "./bench_data"
+
+PAGE_SIZE = 25  # Records decoded after opening a file, one page of the editor
+EDITED_RECORDS = 25  # Records changed by one save
+APPEND_FRACTION = 0.1  # Size of an appended upload relative to the file
+MIN_APPEND_RECORDS = 1_000
+POOL_SIZE = 2_000  # Distinct passages and answers records are built from
+FOLDER = "bench"
+
+
+def _text(rng, words, low, high):
+    return " ".join(rng.choices(words, k=rng.randint(low, high)))
+
+
+def _vocabulary(rng, size=5_000):
+    syllables = ["ka", "lo", "mi", "ne", "ru", "ta", "vo", "shi", "en", "ar", "ol", "ge", "qu", "ix", "bé", "ür"]
+    return ["".join(rng.choices(syllables, k=rng.randint(1, 4))) for _ in range(size)]
+
+
+def synthetic_records(count, seed=0):
+    """
+    Yield RAG evaluation records with field sizes typical of real datasets
+
+    Questions, answers and retrieved passages are drawn from pools of
+    pre-generated text, so records repeat passages the way records built
+    from one corpus do, and a million of them can be generated quickly.
+    Every record passes ``jsonl_lint.RAG_SCHEMA``.
+
+    Args:
+        count (int): Number of records
+        seed (int, optional): Random seed; the same seed gives the same records
+
+    Yields:
+        dict: Record with input, expected_output, actual_output,
+            retrieval_context, context and metadata
+    """
+    rng = random.Random(seed)
+    words = _vocabulary(rng)
+    questions = [_text(rng, words, 8, 25) for _ in range(POOL_SIZE)]
+    answers = [_text(rng, words, 30, 120) for _ in range(POOL_SIZE)]
+    passages = [_text(rng, words, 40, 90) for _ in range(POOL_SIZE)]
+    for i in range(count):
+        yield {
+            "input": f"{rng.choice(questions)} (case {i})?",
+            "expected_output": rng.choice(answers),
+            "actual_output": rng.choice(answers),
+            "retrieval_context": rng.choices(passages, k=rng.randint(2, 4)),
+            "context": rng.choices(passages, k=rng.randint(0, 2)),
+            "metadata": {"id": i, "source": f"doc-{rng.randrange(10_000)}", "split": rng.choice(["dev", "test"])},
+        }
+
+
+def write_records(path, records):
+    """
+    Write records as JSONL
+
+    Args:
+        path (Path): File to create
+        records (iterable): JSON objects
+
+    Returns:
+        int: Bytes written
+    """
+    with open(path, "wb", buffering=1 << 20) as f:
+        for record in records:
+            f.write(jsonl_codec.dump_line(record))
+        return f.tell()
+
+
+def dataset_path(data_dir, scale, seed):
+    """
+    Generated dataset of one scale, created on first use and reused after
+
+    Args:
+        data_dir (Path): Folder holding generated datasets
+        scale (str): Key of SCALES
+        seed (int): Random seed of the records
+
+    Returns:
+        Path: The JSONL file
+    """
+    path = Path(data_dir) / f"rag_{scale}_seed{seed}.jsonl"
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_suffix(".partial")
+        started = time.perf_counter()
+        size = write_records(partial, synthetic_records(SCALES[scale], seed))
+        os.replace(partial, path)
+        print(f"Generated {path} ({size / 1e6:,.1f} MB) in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    return path
+
+
+# Operations, run in a fresh process each so caches start cold and peak RSS is the operation's own.
+# Each returns (seconds, records handled, bytes handled).
+
+def _op_open(path, work_dir):
+    # JSONLFileEditor.load_jsonl_file, then decoding the first page as the editor does
+    from jsonl_patch import get_patcher
+
+    started = time.perf_counter()
+    records = get_patcher(path).records()
+    records.read_records(range(min(PAGE_SIZE, len(records))))
+    return time.perf_counter() - started, len(records), path.stat().st_size
+
+
+def _edits(records):
+    rng = random.Random(len(records))
+    lines = rng.sample(range(len(records)), min(EDITED_RECORDS, len(records)))
+    updates = records.read_records(lines)
+    for record in updates.values():
+        record["expected_output"] += " (reviewed)"
+    return updates, records.versions(lines)
+
+
+def _op_save(path, work_dir):
+    # JSONLFileEditor._patch_jsonl_file: versioned edits journaled through the writer queue
+    from jsonl_patch import get_patcher
+
+    patcher = get_patcher(path)
+    updates, versions = _edits(patcher.records())
+    started = time.perf_counter()
+    result = patcher.save(updates, versions)
+    seconds = time.perf_counter() - started
+    if result.conflicts:
+        raise RuntimeError(f"Unexpected conflicts on lines {sorted(result.conflicts)}")
+    return seconds, len(result.saved), sum(len(jsonl_codec.dumpb(record)) for record in updates.values())
+
+
+def _op_compact(path, work_dir):
+    # Writing saved edits into the file, which replaced rewriting it on every save
+    from jsonl_patch import get_patcher
+
+    patcher = get_patcher(path)
+    updates, versions = _edits(patcher.records())
+    patcher.save(updates, versions)
+    patcher.cancel_compaction()  # Compact here rather than in the background
+    started = time.perf_counter()
+    patcher.compact()
+    seconds = time.perf_counter() - started
+    return seconds, len(updates), path.stat().st_size
+
+
+def _op_count(path, work_dir):
+    # count_jsonl_records of file_count.py, without the Streamlit page around it
+    from record_count import iter_record_counts
+
+    started = time.perf_counter()
+    counts = [count for _, count in iter_record_counts([path])]
+    seconds = time.perf_counter() - started
+    if isinstance(counts[0], Exception):
+        raise counts[0]
+    return seconds, counts[0], path.stat().st_size
+
+
+class _Upload(io.BytesIO):
+    # Stands in for a Streamlit UploadedFile, which is in memory and knows its size
+    def __init__(self, data):
+        super().__init__(data)
+        self.size = len(data)
+
+
+def _op_append(path, work_dir):
+    # The append path of add_file.py
+    from jsonl_append import append_jsonl_stream
+
+    with open(path, "rb") as f:
+        line_count = sum(1 for _ in f)
+    count = max(MIN_APPEND_RECORDS, int(line_count * APPEND_FRACTION))
+    upload = _Upload(b"".join(jsonl_codec.dump_line(record) for record in synthetic_records(count, seed=line_count)))
+    started = time.perf_counter()
+    appended = append_jsonl_stream(upload, path)
+    return time.perf_counter() - started, appended, upload.size
+
+
+def _op_trash(path, work_dir):
+    # move_to_delete_folder of file_actions.py
+    from trash import get_trash
+
+    size = path.stat().st_size
+    trash = get_trash(work_dir / "data", work_dir / "delete")
+    started = time.perf_counter()
+    moved, errors = trash.move(path.parent.name, [path.name])
+    seconds = time.perf_counter() - started
+    if errors:
+        raise RuntimeError("; ".join(errors))
+    return seconds, len(moved), size
+
+
+_OPERATIONS = {
+    "open": _op_open,
+    "save": _op_save,
+    "compact": _op_compact,
+    "count": _op_count,
+    "append": _op_append,
+    "trash": _op_trash,
+}
+
+
+def run_child(operation, work_dir):
+    """
+    Run one operation in this process and print its measurements as JSON
+
+    Args:
+        operation (str): One of OPERATIONS
+        work_dir (Path): Folder prepared by ``run_operation``
+    """
+    work_dir = Path(work_dir)
+    path = next((work_dir / "data" / FOLDER).glob("*.jsonl"))
+    idle_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    seconds, records, nbytes = _OPERATIONS[operation](path, work_dir)
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # KiB on Linux
+    print(jsonl_codec.dumps({
+        "seconds": seconds,
+        "records": records,
+        "bytes": nbytes,
+        "peak_rss_mb": peak_rss / 1024,
+        "op_rss_mb": (peak_rss - idle_rss) / 1024,
+    }))
+
+
+def run_operation(operation, dataset, work_dir):
+    """
+    Measure one operation on a fresh copy of a dataset in a separate process
+
+    Args:
+        operation (str): One of OPERATIONS
+        dataset (Path): Generated JSONL file
+        work_dir (Path): Scratch folder, emptied first
+
+    Returns:
+        dict: Measurements printed by ``run_child``
+    """
+    shutil.rmtree(work_dir, ignore_errors=True)
+    (work_dir / "data" / FOLDER).mkdir(parents=True)
+    shutil.copyfile(dataset, work_dir / "data" / FOLDER / dataset.name)
+    completed = subprocess.run(
+        [sys.executable, str(Path(__file__).resolve()), "--child", operation, str(work_dir)],
+        capture_output=True,
+        text=True,
+        cwd=Path(__file__).resolve().parent,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"{operation} on {dataset.name} failed:\n{completed.stderr}")
+    return jsonl_codec.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def summarize(runs):
+    """
+    Combine repeated runs of one operation
+
+    Args:
+        runs (list): Measurements of each run
+
+    Returns:
+        dict: Median latency, throughput at that latency and the highest RSS
+    """
+    seconds = statistics.median(run["seconds"] for run in runs)
+    return {
+        "seconds": round(seconds, 6),
+        "records": runs[0]["records"],
+        "records_per_s": round(runs[0]["records"] / seconds, 1) if seconds else None,
+        "mb_per_s": round(runs[0]["bytes"] / seconds / 1e6, 1) if seconds else None,
+        "peak_rss_mb": round(max(run["peak_rss_mb"] for run in runs), 1),
+        "op_rss_mb": round(max(run["op_rss_mb"] for run in runs), 1),
+    }
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Find results that got slower or used more memory than the baseline
+
+    Args:
+        results (dict): "<scale>/<operation>" to summary, see ``summarize``
+        baseline (dict): Results of an earlier run in the same form
+        tolerance (float, optional): Allowed relative increase
+
+    Returns:
+        list: (key, metric, baseline value, new value) of each regression
+    """
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        if (result["seconds"] > base["seconds"] * (1 + tolerance)
+                and result["seconds"] - base["seconds"] > MIN_REGRESSION_SECONDS):
+            regressions.append((key, "seconds", base["seconds"], result["seconds"]))
+        if result["peak_rss_mb"] > base["peak_rss_mb"] * (1 + tolerance):
+            regressions.append((key, "peak_rss_mb", base["peak_rss_mb"], result["peak_rss_mb"]))
+    return regressions
+
+
+def print_table(rows):
+    columns = list(rows[0])
+    widths = [max(len(name), *(len(str(row[name])) for row in rows)) for name in columns]
+    print("  ".join(name.rjust(width) for name, width in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(str(row[name]).rjust(width) for name, width in zip(columns, widths)))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Latency, peak RSS and throughput of the CRUD_UI file operations")
+    parser.add_argument("--scales", default=",".join(DEFAULT_SCALES),
+                        help=f"Comma-separated dataset sizes out of {', '.join(SCALES)}")
+    parser.add_argument("--operations", default=",".join(OPERATIONS), help="Comma-separated operations to run")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS, help="Runs per operation")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the generated records")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="Folder for generated datasets and scratch copies")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Results to compare against, if the file exists")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Relative increase in latency or peak RSS reported as a regression")
+    parser.add_argument("--child", nargs=2, metavar=("OPERATION", "WORK_DIR"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    args.scales = [scale.strip() for scale in args.scales.split(",") if scale.strip()]
+    args.operations = [operation.strip() for operation in args.operations.split(",") if operation.strip()]
+    for scale in args.scales:
+        if scale not in SCALES:
+            parser.error(f"unknown scale '{scale}', expected one of {', '.join(SCALES)}")
+    for operation in args.operations:
+        if operation not in OPERATIONS:
+            parser.error(f"unknown operation '{operation}', expected one of {', '.join(OPERATIONS)}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.child:
+        run_child(*args.child)
+        return
+
+    data_dir = Path(args.data_dir)
+    results = {}
+    rows = []
+    for scale in args.scales:
+        dataset = dataset_path(data_dir, scale, args.seed)
+        for operation in args.operations:
+            runs = [run_operation(operation, dataset, data_dir / "work") for _ in range(args.repeats)]
+            results[f"{scale}/{operation}"] = summary = summarize(runs)
+            rows.append({"scale": scale, "operation": operation, **summary})
+    shutil.rmtree(data_dir / "work", ignore_errors=True)
+    print_table(rows)
+
+    baseline_path = Path(args.baseline)
+    regressions = []
+    if baseline_path.exists():
+        with open(baseline_path, "rb") as f:
+            baseline = jsonl_codec.load(f)
+        regressions = compare(results, baseline["results"], args.tolerance)
+        print(f"\nCompared with {baseline_path} (JSON backend {baseline.get('backend')}): "
+              f"{len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+        for key, metric, before, after in regressions:
+            print(f"  {key} {metric}: {before} -> {after}")
+
+    if args.save_baseline:
+        if baseline_path.exists():
+            with open(baseline_path, "rb") as f:
+                stored = jsonl_codec.load(f)["results"]
+        else:
+            stored = {}
+        stored.update(results)  # Keep scales and operations that were not run this time
+        with open(baseline_path, "wb") as f:
+            jsonl_codec.dump({"backend": jsonl_codec.backend(), "python": sys.version.split()[0], "results": stored},
+                             f, indent=2)
+        print(f"Saved baseline to {baseline_path}")
+    elif regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
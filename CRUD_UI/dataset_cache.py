@@ -0,0 +1,199 @@
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import jsonl_codec
+from record_buffer import RecordBuffer, RecordView
+
+DEFAULT_MAX_BYTES = 512 << 20  # Memory budget for parsed data shared by all sessions
+PARSED_SIZE_FACTOR = 4  # Rough in-memory size of a parsed JSON document relative to its encoded bytes
+
+
+class _Entry:
+    __slots__ = ("mtime_ns", "size", "data", "lines", "nbytes")
+
+    def __init__(self, mtime_ns, size):
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.data = None  # Whole parsed document, for load_json
+        self.lines = None  # RecordBuffer of raw JSONL lines, for read_records and read_views
+        self.nbytes = 0
+
+
+class DatasetCache:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Process-wide cache of parsed files, shared by every Streamlit session
+
+        Entries are keyed by (path, mtime, size), so a file that changed on
+        disk is re-read on its next access, and evicted least recently used
+        first once the estimated size of all entries exceeds ``max_bytes``.
+
+        JSONL records are kept as raw line bytes in a RecordBuffer and
+        decoded on every read, so a cached file costs about its size on disk
+        and every caller gets records of its own. Parsed JSON documents are
+        shared between sessions as read-only snapshots: callers must copy
+        them before changing them.
+
+        Args:
+            max_bytes (int, optional): Memory budget in bytes
+        """
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # path -> _Entry, least recently used first
+        self._total = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def load_json(self, path):
+        """
+        Parse a whole JSON file, reusing the cached document while it is unchanged
+
+        Args:
+            path (str or Path): JSON file to load
+
+        Returns:
+            object: Parsed document (shared, do not modify)
+
+        Raises:
+            jsonl_codec.JSONDecodeError: If the file is not valid JSON
+        """
+        path = Path(path).resolve()
+        stat = path.stat()
+        with self._lock:
+            entry = self._entry(path, stat.st_mtime_ns, stat.st_size)
+            if entry.data is not None:
+                self.hits += 1
+                return entry.data
+            self.misses += 1
+
+        with open(path, "rb") as f:
+            data = jsonl_codec.load(f)
+
+        with self._lock:
+            entry = self._entry(path, stat.st_mtime_ns, stat.st_size)
+            entry.data = data
+            self._grow(path, entry, stat.st_size * PARSED_SIZE_FACTOR)
+        return data
+
+    def read_records(self, index, indices):
+        """
+        Decode records of an indexed JSONL file, reading each line from disk at most once
+
+        Args:
+            index (JSONLIndex): Up-to-date index of the file
+            indices (iterable): Record indices to read
+
+        Returns:
+            dict: Mapping of record index to a newly decoded record
+        """
+        return {i: jsonl_codec.loads(line) for i, line in self.read_lines(index, indices).items()}
+
+    def read_views(self, index, indices):
+        """
+        Views of records of an indexed JSONL file, decoded only if their ``record`` is used
+
+        Args:
+            index (JSONLIndex): Up-to-date index of the file
+            indices (iterable): Record indices to read
+
+        Returns:
+            dict: Mapping of record index to RecordView
+        """
+        return {i: RecordView(i, line) for i, line in self.read_lines(index, indices).items()}
+
+    def read_lines(self, index, indices):
+        """
+        Raw bytes of records of an indexed JSONL file, from the cache where possible
+
+        Args:
+            index (JSONLIndex): Up-to-date index of the file
+            indices (iterable): Record indices to read
+
+        Returns:
+            dict: Mapping of record index to line bytes
+        """
+        path = Path(index.file_path).resolve()
+        indices = set(indices)
+        with self._lock:
+            entry = self._entry(path, index.mtime_ns, index.size)
+            buffer = entry.lines
+            lines = {i: buffer.raw(i) for i in indices if buffer is not None and i in buffer}
+            missing = indices.difference(lines)
+            self.hits += len(lines)
+            self.misses += len(missing)
+        if not missing:
+            return lines
+
+        read = index.read_lines(missing)
+        lines.update(read)
+        with self._lock:
+            entry = self._entry(path, index.mtime_ns, index.size)
+            if entry.lines is None:
+                entry.lines = RecordBuffer(len(index))
+            before = entry.lines.nbytes
+            for i, line in read.items():
+                entry.lines.add(i, line)
+            self._grow(path, entry, entry.lines.nbytes - before)
+        return lines
+
+    def invalidate(self, path):
+        """
+        Drop the cached data of one file, e.g. after writing to it
+
+        Args:
+            path (str or Path): File that changed
+        """
+        path = Path(path).resolve()
+        with self._lock:
+            entry = self._entries.pop(path, None)
+            if entry is not None:
+                self._total -= entry.nbytes
+
+    def resize(self, max_bytes):
+        """
+        Change the memory budget, evicting entries if it shrank
+
+        Args:
+            max_bytes (int): New budget in bytes
+        """
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    @property
+    def total_bytes(self):
+        """Estimated size of everything currently cached"""
+        return self._total
+
+    def _entry(self, path, mtime_ns, size):
+        # Caller holds the lock; replaces the entry if the file changed since it was cached
+        entry = self._entries.get(path)
+        if entry is None or (entry.mtime_ns, entry.size) != (mtime_ns, size):
+            if entry is not None:
+                self._total -= entry.nbytes
+            entry = _Entry(mtime_ns, size)
+            self._entries[path] = entry
+        self._entries.move_to_end(path)
+        return entry
+
+    def _grow(self, path, entry, nbytes):
+        # Caller holds the lock; the entry may have been invalidated while decoding
+        if self._entries.get(path) is not entry:
+            return
+        entry.nbytes += nbytes
+        self._total += nbytes
+        self._evict(keep=path)
+
+    def _evict(self, keep=None):
+        # Evict least recently used files; a single file larger than the budget is not kept
+        for path in list(self._entries):
+            if self._total <= self.max_bytes:
+                break
+            if path == keep and len(self._entries) > 1:
+                continue
+            self._total -= self._entries.pop(path).nbytes
+
+
+# Shared by every session of the Streamlit server
+dataset_cache = DatasetCache()
@@ -0,0 +1,158 @@
+import os
+import threading
+import time
+from collections import namedtuple
+from pathlib import Path
+
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # watchdog is optional; fall back to directory mtime checks
+    FileSystemEventHandler = object
+    Observer = None
+
+MAX_AGE = 30.0  # Seconds before a listing is re-read even without a change signal
+# watchdog event types that change a listing; "opened" and "closed_no_write" come from plain reads
+CHANGE_EVENTS = frozenset({"created", "deleted", "moved", "modified", "closed"})
+
+FileEntry = namedtuple("FileEntry", ["name", "path", "is_dir", "size", "mtime_ns"])
+
+
+class _InvalidateHandler(FileSystemEventHandler):
+    def __init__(self, catalog):
+        self.catalog = catalog
+
+    def on_any_event(self, event):
+        if event.event_type not in CHANGE_EVENTS:
+            return
+        for path in (event.src_path, getattr(event, "dest_path", "")):
+            if path:
+                self.catalog.invalidate(Path(os.fsdecode(path)).parent)
+                if event.is_directory:
+                    self.catalog.invalidate(os.fsdecode(path))
+
+
+class DirectoryCatalog:
+    def __init__(self):
+        """
+        Process-wide cache of directory listings with file stats and record counts
+
+        A cached listing is reused while the directory mtime is unchanged.
+        When watchdog is installed the listed trees are watched and listings
+        are dropped on filesystem events, so not even the directory has to be
+        stat'ed on a cache hit.
+        """
+        self._listings = {}  # dir path -> (dir mtime_ns, loaded at, entries)
+        self._watched = set()
+        self._observer = None
+        self._lock = threading.Lock()
+
+    def entries(self, folder):
+        """
+        List a directory, using the cached listing when it is still valid
+
+        Args:
+            folder (str or Path): Directory to list
+
+        Returns:
+            list: FileEntry tuples sorted by name
+        """
+        folder = Path(folder).resolve()
+        with self._lock:
+            cached = self._listings.get(folder)
+        if cached is not None and time.monotonic() - cached[1] < MAX_AGE:
+            if self._is_watched(folder):
+                return cached[2]
+            if folder.stat().st_mtime_ns == cached[0]:
+                return cached[2]
+
+        mtime_ns = folder.stat().st_mtime_ns
+        entries = []
+        with os.scandir(folder) as it:
+            for entry in it:
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue  # Deleted while listing
+                entries.append(FileEntry(entry.name, Path(entry.path), entry.is_dir(), stat.st_size, stat.st_mtime_ns))
+        entries.sort(key=lambda e: e.name)
+
+        with self._lock:
+            self._listings[folder] = (mtime_ns, time.monotonic(), entries)
+        self._watch(folder)
+        return entries
+
+    def list_folders(self, base_folder):
+        """
+        List all subdirectories of a folder
+
+        Args:
+            base_folder (str or Path): Directory to list
+
+        Returns:
+            list: Folder names
+        """
+        return [e.name for e in self.entries(base_folder) if e.is_dir]
+
+    def list_files(self, folder, extension):
+        """
+        List files with a given extension in a folder
+
+        Args:
+            folder (str or Path): Directory to list
+            extension (str): File extension without the dot
+
+        Returns:
+            list: File names
+        """
+        suffix = f".{extension}"
+        return [e.name for e in self.entries(folder) if not e.is_dir and e.name.endswith(suffix)]
+
+    def file_entry(self, path):
+        """
+        Look up the cached entry for a single file
+
+        Args:
+            path (str or Path): File path
+
+        Returns:
+            FileEntry: Entry for the file, or None if it is not listed
+        """
+        path = Path(path).resolve()
+        for entry in self.entries(path.parent):
+            if entry.name == path.name:
+                return entry
+        return None
+
+    def invalidate(self, folder):
+        """
+        Drop the cached listing of a folder, e.g. after writing to a file in it
+
+        Args:
+            folder (str or Path): Directory whose listing changed
+        """
+        folder = Path(folder).resolve()
+        with self._lock:
+            self._listings.pop(folder, None)
+
+    def _is_watched(self, folder):
+        return any(folder == root or root in folder.parents for root in self._watched)
+
+    def _watch(self, folder):
+        if Observer is None or self._is_watched(folder):
+            return
+        try:
+            with self._lock:
+                if self._observer is None:
+                    self._observer = Observer()
+                    self._observer.daemon = True
+                    self._observer.start()
+                self._observer.schedule(_InvalidateHandler(self), str(folder), recursive=True)
+                self._watched.add(folder)
+        except OSError:
+            pass  # E.g. inotify watch limit reached; mtime checks still apply
+
+
+# Shared by every session of the Streamlit server
+catalog = DirectoryCatalog()
@@ -0,0 +1,51 @@
+from datetime import datetime
+from pathlib import Path
+
+import jsonl_codec
+from trash import get_trash
+
+
+def save_json_uploads(base_folder, selected_folder, uploaded_files, progress=None):
+    """Validate uploaded JSON files and save them under a timestamped name."""
+    saved, invalid = [], []
+    for i, uploaded_file in enumerate(uploaded_files):
+        timestamp = datetime.now().strftime("%Y-%m-%d-%H-%M-%S")
+        save_filename = f"{selected_folder}-{timestamp}-{uploaded_file.name}"
+        save_path = Path(base_folder) / selected_folder / save_filename
+
+        try:
+            json_data = jsonl_codec.load(uploaded_file)
+
+            with open(save_path, "wb") as f:
+                jsonl_codec.dump(json_data, f, indent=4)
+            saved.append(save_filename)
+        except jsonl_codec.JSONDecodeError:
+            invalid.append(uploaded_file.name)
+
+        if progress is not None:
+            progress(i + 1, len(uploaded_files))
+    return saved, invalid
+
+
+def describe_upload(op):
+    """Success message for a finished upload operation."""
+    saved, invalid = op.result
+    message = f"{len(saved)} file(s) uploaded successfully: {', '.join(saved)}"
+    if invalid:
+        message += f" — skipped invalid JSON: {', '.join(invalid)}"
+    return message
+
+
+def move_to_delete_folder(base_folder, base_folder_delete, selected_folder, files_to_delete, progress=None):
+    """Move files to the trash folder and record them in its manifest for restore."""
+    trash = get_trash(base_folder, base_folder_delete)
+    return trash.move(selected_folder, files_to_delete, progress=progress)
+
+
+def describe_delete(op):
+    """Success message for a finished delete operation."""
+    moved, errors = op.result
+    message = f"Files deleted successfully - {len(moved)}"
+    if errors:
+        message += f" — failed: {'; '.join(errors)}"
+    return message
@@ -23,27 +23,37 @@
 #     st.metric(label=f"📁 {folder}", value=f"{count} file(s)")
 import streamlit as st
 from pathlib import Path
+from record_count import iter_record_counts
 
 # Function to count records in JSONL files
-def count_jsonl_records(file_list):
+def count_jsonl_records(file_list, on_count=None):
+    """Count records of the JSONL files in parallel, calling on_count(name, count) as each finishes."""
+    jsonl_files = [Path(file_path) for file_path in file_list if Path(file_path).suffix == ".jsonl"]
     jsonl_counts = {}
-    for file_path in file_list:
-        path = Path(file_path)
-        if path.suffix == ".jsonl":  # Check if the file is JSONL
-            try:
-                with path.open("r", encoding="utf-8") as f:
-                    jsonl_counts[path.name] = sum(1 for _ in f)  # Count lines in the file
-            except Exception as e:
-                jsonl_counts[path.name] = f"Error: {str(e)}"  # Handle errors gracefully
+    for path, count in iter_record_counts(jsonl_files):
+        if isinstance(count, Exception):
+            count = f"Error: {str(count)}"  # Handle errors gracefully
+        jsonl_counts[path.name] = count
+        if on_count is not None:
+            on_count(path.name, count)
     return jsonl_counts
 
 # Example: Assuming `st.session_state.filelist_view` contains the list of file paths
 if "filelist_view" in st.session_state:
-    jsonl_counts = count_jsonl_records
-    (st.session_state.filelist_view)
-
     # Display the counts in Streamlit
     st.header("📂 JSONL File Record Counts")
-    for file, count in jsonl_counts.items():
-        st.metric(label=f"📄 {file}", value=f"{count} records")
 
+    # One placeholder per file so each metric appears as soon as its count is ready
+    placeholders = {
+        Path(file_path).name: st.empty()
+        for file_path in st.session_state.filelist_view
+        if Path(file_path).suffix == ".jsonl"
+    }
+    for name, placeholder in placeholders.items():
+        placeholder.metric(label=f"📄 {name}", value="counting...")
+
+    def show_count(name, count):
+        value = f"{count:,} records" if isinstance(count, int) else count
+        placeholders[name].metric(label=f"📄 {name}", value=value)
+
+    jsonl_counts = count_jsonl_records(st.session_state.filelist_view, on_count=show_count)
@@ -1,7 +1,25 @@
 import streamlit as st
-import json
 from pathlib import Path
 import os
+from bisect import bisect_left
+import jsonl_codec
+from jsonl_patch import get_patcher, SaveResult
+from dir_catalog import catalog
+from jsonl_search import get_search_index, QueryError, DEFAULT_LIMIT
+
+PREVIEW_BYTES = 120  # Raw bytes shown per line in the sample picker
+PAGE_SIZES = [10, 25, 50, 100]
+SEARCH_POLL_INTERVAL = 0.5  # Seconds between checks while the search index is built
+
+
+@st.fragment(run_every=SEARCH_POLL_INTERVAL)
+def wait_for_search_index(search_index):
+    """Show that the search index is being built, and rerun the app once it is ready"""
+    if search_index.is_ready() or search_index.error is not None:
+        st.rerun(scope="app")
+    search_index.refresh_in_background()  # The file may have changed again while it was indexed
+    st.info(f"⏳ Indexing {search_index.file_path.name} for search, results appear when it is done.")
+
 
 class JSONLFileEditor:
     def __init__(self, base_folder):
@@ -24,8 +42,18 @@ class JSONLFileEditor:
             st.session_state.previous_samples = []
         if 'edited_jsonl_values' not in st.session_state:
             st.session_state.edited_jsonl_values = {}
+        if 'edited_jsonl_versions' not in st.session_state:
+            st.session_state.edited_jsonl_versions = {}
         if 'delete_confirmation' not in st.session_state:
             st.session_state.delete_confirmation = {}
+        if 'selected_sample_lines' not in st.session_state:
+            st.session_state.selected_sample_lines = {}
+        if 'sample_selection_generation' not in st.session_state:
+            st.session_state.sample_selection_generation = 0
+        if 'sample_browser_file' not in st.session_state:
+            st.session_state.sample_browser_file = None
+        if 'sample_patch_generation' not in st.session_state:
+            st.session_state.sample_patch_generation = None
 
     def list_folders(self):
         """
@@ -34,7 +62,7 @@ class JSONLFileEditor:
         Returns:
             list: List of folder names
         """
-        return [f.name for f in self.base_folder.iterdir() if f.is_dir()]
+        return catalog.list_folders(self.base_folder)
 
     def list_files(self, folder, extension="jsonl"):
         """
@@ -47,29 +75,26 @@ class JSONLFileEditor:
         Returns:
             list: List of file names with the specified extension
         """
-        folder_path = self.base_folder / folder
-        return [f.name for f in folder_path.glob(f"*.{extension}") if f.is_file()]
+        return catalog.list_files(self.base_folder / folder, extension)
 
     def load_jsonl_file(self, folder, filename):
         """
-        Load a JSONL file and return its contents
+        Open a JSONL file through its byte-offset index
+        
+        Records are not decoded here; indexing the returned object seeks to
+        and decodes only the lines that are accessed. Saved edits that have
+        not been compacted into the file yet are applied on top.
         
         Args:
             folder (str): Folder containing the file
             filename (str): Name of the JSONL file
         
         Returns:
-            list: List of JSON objects from the file, or None if error
+            PatchedRecords: Lazy view of JSON objects from the file, or None if error
         """
         try:
             file_path = self.base_folder / folder / filename
-            data = []
-            with open(file_path, "r") as f:
-                for line in f:
-                    line = line.strip()
-                    if line:  # Skip empty lines
-                        data.append(json.loads(line))
-            return data
+            return get_patcher(file_path).records()
         except Exception as e:
             st.error(f"⚠️ Error opening file: {e}")
             return None
@@ -112,49 +137,135 @@ class JSONLFileEditor:
         return (st.session_state.selected_folder_UPDATE, 
                 st.session_state.selected_file_update)
 
-    def create_sample_display_options(self, data):
+    def create_sample_display_options(self, data, lines):
         """
-        Create display options for multiselect with sample previews
+        Create display options for one page of samples
+        
+        Only the given lines are read, so the cost of a rerun does not
+        depend on the size of the file.
         
         Args:
-            data (list): List of JSON objects
+            data (PatchedRecords): Indexed JSONL file
+            lines (iterable): Line numbers on the page
         
         Returns:
-            list: List of display options with index, preview, and original data
+            list: List of display options with index and preview
         """
         display_options = []
-        for i, item in enumerate(data):
-            # Create a preview string (showing first few keys and values)
-            preview = {}
-            keys_to_show = list(item.keys())[:3]  # Show first 3 keys
-            for key in keys_to_show:
-                preview[key] = item[key]
-            
-            # Store both the index and preview
+        lines = [i for i in lines if i < data.line_count and not data.is_deleted(i)]
+        # Previews come from the raw line bytes; records are decoded only when selected for editing
+        views = data.read_views(lines)
+        for i in lines:
             display_options.append({
                 "index": i,
-                "preview": str(preview),
-                "original": item
+                "preview": views[i].preview(PREVIEW_BYTES)
             })
         
         return display_options
 
-    def render_sample_selection(self, display_options):
+    def render_sample_search(self, data, file_path):
         """
-        Render multiselect for samples and track selection
+        Render the search box and run the query against the file's search index
         
         Args:
-            display_options (list): List of display options for samples
+            data (PatchedRecords): Indexed JSONL file
+            file_path (Path): Full path to the JSONL file
         
         Returns:
-            list: Selected samples
+            list: Matching line numbers, or None when there is no query
         """
-        current_selection = st.multiselect(
-            "Select a sample to update", 
-            options=display_options,
-            format_func=lambda x: f"Line {x['index']}: {x['preview']}",
-            key="update_sample"
+        query = st.text_input(
+            "Search samples",
+            key="sample_search",
+            placeholder='question contains "refund" and context_id == 42'
         )
+        if not query.strip():
+            return None
+        
+        search_index = get_search_index(file_path)
+        if not search_index.is_ready():
+            if search_index.error is not None:
+                st.error(f"❌ Cannot index {file_path.name} for search: {search_index.error}")
+            else:
+                wait_for_search_index(search_index)
+            return None
+
+        try:
+            with st.spinner("Searching..."):
+                matches = search_index.search(query, records=data)
+        except QueryError as e:
+            st.error(f"❌ Invalid search: {e}")
+            return None
+        
+        if len(matches) >= DEFAULT_LIMIT:
+            st.info(f"Showing the first {DEFAULT_LIMIT} matches, refine the search to narrow them down.")
+        else:
+            st.write(f"🔍 {len(matches)} matching lines")
+        return matches
+
+    def render_sample_selection(self, data, lines=None):
+        """
+        Render a paged sample browser and track the selection across pages
+        
+        Args:
+            data (PatchedRecords): Indexed JSONL file
+            lines (list, optional): Line numbers to browse, e.g. search matches.
+                Defaults to every line of the file.
+        
+        Returns:
+            list: Selected samples
+        """
+        if lines is None:
+            lines = range(data.line_count)
+        total = len(lines)
+        nav_columns = st.columns([1, 1, 1, 1])
+        
+        with nav_columns[0]:
+            page_size = st.selectbox("Samples per page", PAGE_SIZES, key="sample_page_size")
+        
+        page_count = max(1, -(-total // page_size))
+        # Keep the page in range when the page size grows or the file shrinks
+        if st.session_state.get("sample_page", 1) > page_count:
+            st.session_state.sample_page = page_count
+        # Jumps take a line of the file, which may be outside the search results
+        last_line = max(data.line_count - 1, 0)
+        if st.session_state.get("sample_jump_line", 0) > last_line:
+            st.session_state.sample_jump_line = last_line
+        
+        with nav_columns[1]:
+            page = st.number_input("Page", min_value=1, max_value=page_count, step=1, key="sample_page")
+        
+        with nav_columns[2]:
+            st.number_input("Jump to line", min_value=0, max_value=last_line, step=1, key="sample_jump_line")
+        
+        with nav_columns[3]:
+            st.button("Go to line", key="sample_jump_btn", on_click=self._jump_to_line, args=(data, lines, page_size))
+            st.button("Clear selection", key="sample_clear_btn", on_click=self._clear_sample_selection)
+        
+        start = (page - 1) * page_size
+        stop = min(start + page_size, total)
+        st.caption(f"Showing {start + 1}-{stop} of {total} lines")
+        
+        # Render one checkbox per visible line; the selection itself lives in session state
+        generation = st.session_state.sample_selection_generation
+        for option in self.create_sample_display_options(data, lines[start:stop]):
+            pick_key = f"sample_pick_{generation}_{option['index']}"
+            if pick_key not in st.session_state:
+                st.session_state[pick_key] = option["index"] in st.session_state.selected_sample_lines
+            st.checkbox(
+                f"Line {option['index']}: {option['preview']}",
+                key=pick_key,
+                on_change=self._toggle_sample,
+                args=(option, pick_key)
+            )
+        
+        # Drop lines that no longer exist after a compaction shortened the file
+        current_selection = [
+            option for index, option in sorted(st.session_state.selected_sample_lines.items())
+            if index < data.line_count
+        ]
+        if current_selection:
+            st.write("✅ Selected lines:", ", ".join(str(option["index"]) for option in current_selection))
         
         # Update our session state with the selection
         st.session_state.select_update_sample = current_selection
@@ -164,25 +275,123 @@ class JSONLFileEditor:
             # Clear the edited values when selection changes
             if 'edited_jsonl_values' in st.session_state:
                 st.session_state.edited_jsonl_values = {}
+                st.session_state.edited_jsonl_versions = {}
             # Update the previous samples tracker
             st.session_state.previous_samples = current_selection
         
         return current_selection
 
+    def _toggle_sample(self, option, pick_key):
+        """
+        Add or remove a line from the selection when its checkbox changes
+        
+        Args:
+            option (dict): Display option of the line
+            pick_key (str): Session state key of the checkbox
+        """
+        if st.session_state[pick_key]:
+            st.session_state.selected_sample_lines[option["index"]] = option
+        else:
+            st.session_state.selected_sample_lines.pop(option["index"], None)
+
+    def _jump_to_line(self, data, lines, page_size):
+        """
+        Move to the page containing the requested line and select it
+        
+        Args:
+            data (PatchedRecords): Indexed JSONL file
+            lines (sequence): Sorted line numbers being browsed
+            page_size (int): Number of lines per page
+        """
+        line = int(st.session_state.sample_jump_line)
+        if line >= data.line_count or data.is_deleted(line):
+            return
+        
+        # The line is selected even when it is outside the current search results
+        position = bisect_left(lines, line)
+        if position < len(lines) and lines[position] == line:
+            st.session_state.sample_page = position // page_size + 1
+        option = self.create_sample_display_options(data, [line])[0]
+        st.session_state.selected_sample_lines[line] = option
+        generation = st.session_state.sample_selection_generation
+        st.session_state[f"sample_pick_{generation}_{line}"] = True
+
+    def _clear_sample_selection(self):
+        """
+        Clear the selection and reset every page's checkboxes
+        """
+        st.session_state.selected_sample_lines = {}
+        self._reset_sample_checkboxes()
+
+    def _reset_sample_checkboxes(self):
+        """
+        Start every page's checkboxes over from the selection in session state
+        """
+        # New checkbox keys start from the selection instead of stale widget state
+        st.session_state.sample_selection_generation += 1
+        current = f"sample_pick_{st.session_state.sample_selection_generation}_"
+        for key in [key for key in st.session_state if key.startswith("sample_pick_") and not key.startswith(current)]:
+            del st.session_state[key]
+
+    def _follow_compactions(self, data, file_path):
+        """
+        Move the selection and open edits to their new line numbers after a compaction
+        
+        A compaction in any session drops deleted lines from the file, which
+        renumbers the lines after them. Selected lines that were removed are
+        dropped from the selection.
+        
+        Args:
+            data (PatchedRecords): Indexed JSONL file
+            file_path (Path): Full path to the JSONL file
+        """
+        previous = st.session_state.sample_patch_generation
+        st.session_state.sample_patch_generation = data.generation
+        if previous is None or previous == data.generation:
+            return
+        
+        selected = st.session_state.selected_sample_lines
+        edited = {int(key.rsplit("_", 1)[1]) for key in st.session_state.edited_jsonl_values}
+        moved = get_patcher(file_path).remap_lines([*selected, *edited], previous)
+        
+        st.session_state.selected_sample_lines = {
+            moved[line]: dict(option, index=moved[line]) for line, option in selected.items() if line in moved
+        }
+        st.session_state.previous_samples = [option for _, option in sorted(st.session_state.selected_sample_lines.items())]
+        
+        # Open edits keep their text; their versions are restated at the new generation
+        values, versions = {}, {}
+        for line in edited:
+            if line in moved:
+                old_key, new_key = f"jsonl_edit_{line}", f"jsonl_edit_{moved[line]}"
+                values[new_key] = st.session_state.edited_jsonl_values[old_key]
+                version = st.session_state.edited_jsonl_versions.get(old_key)
+                if version is not None:
+                    versions[new_key] = f"{data.generation}.{version.split('.', 1)[-1]}"
+        st.session_state.edited_jsonl_values = values
+        st.session_state.edited_jsonl_versions = versions
+        st.session_state.delete_confirmation = {}
+        self._reset_sample_checkboxes()
+
     def render_sample_editor(self, data, selected_samples, file_path):
         """
         Render editor for selected samples with save and delete functionality
         
         Args:
-            data (list): Complete data from the file
+            data (PatchedRecords): Indexed JSONL file
             selected_samples (list): Samples selected for editing
             file_path (Path): Full path to the JSONL file
         """
+        # Lines deleted in this or another session are tombstoned until compaction
+        selected_samples = [info for info in selected_samples if not data.is_deleted(info["index"])]
         if selected_samples:
+            # Decode only the selected lines
+            samples = data.read_records(info["index"] for info in selected_samples)
+            versions = data.versions(info["index"] for info in selected_samples)
             for idx, sample_info in enumerate(selected_samples):
                 # Use the line index as a unique identifier
                 sample_id = str(sample_info["index"])
-                sample = sample_info["original"]
+                sample = samples[sample_info["index"]]
                 sample_key = f"jsonl_edit_{sample_id}"
                 delete_key = f"delete_confirm_{sample_id}"
                 
@@ -190,7 +399,9 @@ class JSONLFileEditor:
                 
                 # Initialize this sample's edited value if not already set
                 if sample_key not in st.session_state.edited_jsonl_values:
-                    st.session_state.edited_jsonl_values[sample_key] = json.dumps(sample, indent=4)
+                    st.session_state.edited_jsonl_values[sample_key] = jsonl_codec.dumps(sample, indent=4)
+                    # The version the edit starts from; saving fails if someone else changes the line meanwhile
+                    st.session_state.edited_jsonl_versions[sample_key] = versions[sample_info["index"]]
                 
                 # Initialize delete confirmation state for this sample
                 if delete_key not in st.session_state.delete_confirmation:
@@ -207,7 +418,8 @@ class JSONLFileEditor:
                         "Make your changes below:",
                         value=st.session_state.edited_jsonl_values[sample_key],
                         height=400,
-                        key=sample_key
+                        # A new version of the line gets a fresh text area instead of the stale edit
+                        key=f"{sample_key}_{st.session_state.edited_jsonl_versions[sample_key]}"
                     )
                     
                     # Update the session state with the edited value
@@ -240,30 +452,31 @@ class JSONLFileEditor:
         Save a single sample to the JSONL file
         
         Args:
-            data (list): Complete data from the file
+            data (PatchedRecords): Indexed JSONL file
             sample_id (str): ID of the sample to save
             edited_json (str): Edited JSON string
             file_path (Path): Full path to the JSONL file
         """
         try:
             # Parse the edited JSON to validate it
-            updated_sample = json.loads(edited_json)
+            updated_sample = jsonl_codec.loads(edited_json)
             
-            # Update data at the specific line
+            # Patch only the edited line, unless it changed since it was opened
             original_index = int(sample_id)
-            data[original_index] = updated_sample
-            
-            # Save the entire updated data back to the file
-            self._write_jsonl_file(data, file_path)
+            result = self._patch_jsonl_file(file_path, updates={original_index: updated_sample})
+            if result.conflicts:
+                self._show_conflicts(result.conflicts, {original_index: edited_json})
+                return
             
             st.success(f"✅ Line {sample_id} updated successfully!")
             
             # Clear the edited values to force refresh on next load
             st.session_state.edited_jsonl_values = {}
+            st.session_state.edited_jsonl_versions = {}
             
             # Refresh the page to show the updated data
             st.rerun()
-        except json.JSONDecodeError as e:
+        except jsonl_codec.JSONDecodeError as e:
             st.error(f"❌ Invalid JSON format: {e}")
         except Exception as e:
             st.error(f"❌ Error saving changes: {e}")
@@ -273,7 +486,7 @@ class JSONLFileEditor:
         Handle delete confirmation dialog
         
         Args:
-            data (list): Complete data from the file
+            data (PatchedRecords): Indexed JSONL file
             sample_id (str): ID of the sample to delete
             file_path (Path): Full path to the JSONL file
             delete_key (str): Session state key for delete confirmation
@@ -285,20 +498,24 @@ class JSONLFileEditor:
         with confirm_col:
             if st.button("Yes, Delete", key=f"confirm_delete_{sample_id}", type="primary"):
                 try:
-                    # Remove the item at the specific index
+                    # Tombstone the line; it is removed from the file on compaction
                     original_index = int(sample_id)
-                    del data[original_index]
-                    
-                    # Save the updated data back to the file
-                    self._write_jsonl_file(data, file_path)
+                    result = self._patch_jsonl_file(file_path, deletes=[original_index])
+                    if result.conflicts:
+                        self._show_conflicts(result.conflicts)
+                        return
                     
                     st.success(f"✅ Line {sample_id} deleted successfully!")
                     
                     # Reset confirmation state
                     st.session_state.delete_confirmation = {}
                     
+                    # Line numbers after the deleted line shift on compaction
+                    self._clear_sample_selection()
+                    
                     # Clear the edited values to force refresh on next load
                     st.session_state.edited_jsonl_values = {}
+                    st.session_state.edited_jsonl_versions = {}
                     
                     # Refresh the page to show updated data
                     st.rerun()
@@ -315,10 +532,12 @@ class JSONLFileEditor:
         Render a button to save all changes for multiple selected samples
         
         Args:
-            data (list): Complete data from the file
+            data (PatchedRecords): Indexed JSONL file
             file_path (Path): Full path to the JSONL file
         """
         if st.button("Save All Changes", key="save_all_btn"):
+            updates = {}
+            edited = {}
             success_count = 0
             error_messages = []
             
@@ -330,19 +549,25 @@ class JSONLFileEditor:
                 if edited_json:
                     try:
                         # Parse the edited JSON
-                        updated_sample = json.loads(edited_json)
+                        updated_sample = jsonl_codec.loads(edited_json)
                         
                         # Update at the specific index
                         original_index = int(sample_id)
-                        data[original_index] = updated_sample
+                        updates[original_index] = updated_sample
+                        edited[original_index] = edited_json
                         success_count += 1
                     except Exception as e:
                         error_messages.append(f"Error with Line {sample_id}: {str(e)}")
             
             if success_count > 0:
                 try:
-                    # Save all updates to the file
-                    self._write_jsonl_file(data, file_path)
+                    # Patch all edited lines in one journal write; stale lines are left out
+                    result = self._patch_jsonl_file(file_path, updates=updates)
+                    if result.conflicts:
+                        if result.saved:
+                            st.success(f"✅ Successfully updated {len(result.saved)} samples!")
+                        self._show_conflicts(result.conflicts, edited)
+                        return
                     
                     st.success(f"✅ Successfully updated {success_count} samples!")
                     
@@ -353,6 +578,7 @@ class JSONLFileEditor:
                     
                     # Clear the edited values to force refresh on next load
                     st.session_state.edited_jsonl_values = {}
+                    st.session_state.edited_jsonl_versions = {}
                     
                     # Refresh to show updated data
                     st.rerun()
@@ -363,17 +589,81 @@ class JSONLFileEditor:
                 for msg in error_messages:
                     st.write(msg)
 
-    def _write_jsonl_file(self, data, file_path):
+    def _patch_jsonl_file(self, file_path, updates=None, deletes=()):
         """
-        Write data to a JSONL file
+        Journal record edits to a JSONL file instead of rewriting it
+        
+        The edits are visible to readers immediately and are compacted into
+        the file in the background, rewriting only from the first edited line.
         
         Args:
-            data (list): List of JSON objects to write
             file_path (Path): Full path to the JSONL file
+            updates (dict, optional): Line index to new JSON object
+            deletes (iterable, optional): Line indices to delete
+        
+        Returns:
+            SaveResult: Lines saved, and lines rejected because they changed since they were opened
         """
-        with open(file_path, "w") as f:
-            for item in data:
-                f.write(json.dumps(item) + "\n")
+        # Each edit is checked against the version of the line it was made from
+        versions = {}
+        for i in [*(updates or {}), *deletes]:
+            sample_key = f"jsonl_edit_{i}"
+            if sample_key in st.session_state.edited_jsonl_versions:
+                versions[i] = st.session_state.edited_jsonl_versions[sample_key]
+        
+        patcher = get_patcher(file_path)
+        saved, conflicts = [], {}
+        for result in (patcher.save(updates or {}, versions), patcher.delete(deletes, versions)):
+            saved += result.saved
+            conflicts.update(result.conflicts)
+        return SaveResult(saved, conflicts)
+
+    def _show_conflicts(self, conflicts, edited=None):
+        """
+        Report edits rejected because another session changed their lines first
+        
+        The rejected lines are reloaded on the next run, so the edit is shown
+        here to be copied over.
+        
+        Args:
+            conflicts (dict): Line index to its current version, None if it was deleted
+            edited (dict, optional): Line index to the rejected JSON text
+        """
+        for i, version in sorted(conflicts.items()):
+            if version is None:
+                st.error(f"❌ Line {i} was deleted by someone else; your change was not saved.")
+            else:
+                st.error(f"❌ Line {i} was changed by someone else since you opened it; your change was not saved.")
+            if edited and i in edited:
+                st.code(edited[i], language="json")
+            # Start over from the current content of the line
+            st.session_state.edited_jsonl_values.pop(f"jsonl_edit_{i}", None)
+            st.session_state.edited_jsonl_versions.pop(f"jsonl_edit_{i}", None)
+
+    def render_stale_journals(self, file_path):
+        """
+        Warn about saved edits that could not be applied to the file
+        
+        This happens when the file was rewritten outside the editor before
+        the edits were written into it. The edits are kept next to the file
+        until they are discarded here.
+        
+        Args:
+            file_path (Path): Path to the open JSONL file
+        """
+        patcher = get_patcher(file_path)
+        journals = patcher.stale_journals()
+        if not journals:
+            return
+        edits = sum(count for _, count in journals)
+        names = ", ".join(path.name for path, _ in journals)
+        st.warning(
+            f"⚠️ {edits} saved edit(s) were not applied because the file was changed outside the editor "
+            f"before they were written into it. They are kept next to the file in {names}."
+        )
+        if st.button("Discard these edits", key=f"discard_stale_{file_path}"):
+            patcher.discard_stale_journals()
+            st.rerun()
 
     def run(self):
         """
@@ -388,13 +678,30 @@ class JSONLFileEditor:
             
             # Load the data
             data = self.load_jsonl_file(folder, filename)
+            if data is None:
+                return
+            self.render_stale_journals(file_path)
+            
+            # Count from the index, so blank lines are left out like in the browser
+            entry = catalog.file_entry(file_path)
+            if entry is not None:
+                st.caption(f"{data.line_count:,} lines · {entry.size / 1_000_000:.1f} MB")
+            
+            # Line numbers are per file, so a new file starts with an empty selection
+            if st.session_state.sample_browser_file != str(file_path):
+                st.session_state.sample_browser_file = str(file_path)
+                self._clear_sample_selection()
+                st.session_state.sample_patch_generation = None
             
             if data:
-                # Create display options for sample selection
-                display_options = self.create_sample_display_options(data)
+                # Keep line numbers in session state in step with compactions from other sessions
+                self._follow_compactions(data, file_path)
+                
+                # Narrow the browser down to search matches, if any
+                lines = self.render_sample_search(data, file_path)
                 
-                # Render sample selection
-                selected_samples = self.render_sample_selection(display_options)
+                # Render the paged sample browser
+                selected_samples = self.render_sample_selection(data, lines)
                 
                 # Render sample editor if samples are selected
                 self.render_sample_editor(data, selected_samples, file_path)
@@ -0,0 +1,173 @@
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+import jsonl_codec
+from dir_catalog import catalog
+from dataset_cache import dataset_cache
+from jsonl_patch import get_patcher
+
+CHUNK_SIZE = 1 << 20  # Bytes read from the upload per step
+BATCH_LINES = 5000  # Lines validated per process-pool task
+PROCESS_POOL_THRESHOLD = 64 << 20  # Uploads larger than this are validated in a process pool
+MAX_PENDING_BATCHES = 16
+
+
+class JSONLValidationError(ValueError):
+    def __init__(self, line_number, message):
+        """
+        Raised when a line of an appended JSONL stream is not valid JSON
+
+        Args:
+            line_number (int): 1-based line number in the uploaded stream
+            message (str): Parser error message
+        """
+        super().__init__(f"line {line_number}: {message}")
+        self.line_number = line_number
+
+
+def _validate_lines(lines):
+    # Runs in worker processes; returns (offset in batch, message) of the first bad line
+    for offset, line in enumerate(lines):
+        if not line.strip():
+            continue  # Blank lines are dropped, not rejected
+        try:
+            jsonl_codec.loads(line)
+        except ValueError as e:
+            return offset, str(e)
+    return None
+
+
+def _iter_lines(source, chunk_size, progress, total):
+    # Yield complete lines (without newline) while reporting bytes read
+    pending = b""
+    done = 0
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            break
+        done += len(chunk)
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        yield from lines
+        if progress is not None:
+            progress(done, total)
+    if pending:
+        yield pending
+
+
+def _iter_batches(lines):
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= BATCH_LINES:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _validated_batches(batches, use_pool):
+    # Yield (first line number, batch, error) in order once each batch has been validated
+    if not use_pool:
+        first_line = 1
+        for batch in batches:
+            yield first_line, batch, _validate_lines(batch)
+            first_line += len(batch)
+        return
+
+    # spawn avoids forking the Streamlit server's threads
+    with ProcessPoolExecutor(mp_context=get_context("spawn")) as pool:
+        in_flight = []
+        first_line = 1
+        for batch in batches:
+            in_flight.append((first_line, batch, pool.submit(_validate_lines, batch)))
+            first_line += len(batch)
+            if len(in_flight) >= MAX_PENDING_BATCHES:
+                start, batch, future = in_flight.pop(0)
+                yield start, batch, future.result()
+        for start, batch, future in in_flight:
+            yield start, batch, future.result()
+
+
+def append_jsonl_stream(source, target_path, progress=None, chunk_size=CHUNK_SIZE, use_pool=None):
+    """
+    Validate a JSONL stream line by line and append it to a file as one unit
+
+    The stream is read in chunks and validated incrementally into a temp
+    file next to the target. Only when every line is valid is the temp file
+    spliced onto the target; a failed splice truncates the target back to
+    its original size. A reader that scans the file during the splice can
+    still see part of the appended lines.
+
+    Args:
+        source (file-like): Binary stream to read, e.g. a Streamlit UploadedFile
+        target_path (str or Path): JSONL file to append to (created if missing)
+        progress (callable, optional): Called as progress(done, total) with byte counts
+        chunk_size (int, optional): Bytes read per step
+        use_pool (bool, optional): Validate in a process pool. Defaults to True
+            for uploads larger than PROCESS_POOL_THRESHOLD.
+
+    Returns:
+        int: Number of lines appended
+
+    Raises:
+        JSONLValidationError: If a line is not valid JSON; nothing is appended
+    """
+    target_path = Path(target_path)
+    total = getattr(source, "size", None)
+    if use_pool is None:
+        use_pool = total is not None and total > PROCESS_POOL_THRESHOLD
+
+    # Track upload progress up to 90%; the splice covers the rest
+    read_progress = None
+    if progress is not None:
+        read_progress = lambda done, total: progress(done * 9 // 10, total)
+
+    fd, tmp_name = tempfile.mkstemp(dir=target_path.parent, prefix=f".{target_path.name}.", suffix=".upload")
+    try:
+        appended = 0
+        with os.fdopen(fd, "wb") as tmp:
+            lines = _iter_lines(source, chunk_size, read_progress, total)
+            for first_line, batch, error in _validated_batches(_iter_batches(lines), use_pool):
+                if error is not None:
+                    raise JSONLValidationError(first_line + error[0], error[1])
+                for line in batch:
+                    if line.strip():
+                        tmp.write(line + b"\n")
+                        appended += 1
+
+        _splice(Path(tmp_name), target_path)
+        if progress is not None:
+            progress(total or 1, total or 1)
+        return appended
+    finally:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
+
+
+def _splice(tmp_path, target_path):
+    # Hold the patcher lock so a concurrent compaction cannot overwrite the appended tail
+    with get_patcher(target_path).lock:
+        with open(target_path, "ab+") as target:
+            original_size = target.seek(0, os.SEEK_END)
+            try:
+                if original_size:
+                    target.seek(original_size - 1)
+                    if target.read(1) != b"\n":
+                        target.write(b"\n")  # Don't glue the first new record onto the last line
+                with open(tmp_path, "rb") as src:
+                    while True:
+                        chunk = src.read(CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        target.write(chunk)
+                target.flush()
+                os.fsync(target.fileno())
+            except BaseException:
+                target.truncate(original_size)
+                raise
+    catalog.invalidate(target_path.parent)
+    dataset_cache.invalidate(target_path)
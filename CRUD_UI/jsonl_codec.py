@@ -0,0 +1,141 @@
+import io
+import json
+import math
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stdlib codec gives the same results, slower
+    orjson = None
+
+BACKENDS = ["orjson", "json"] if orjson is not None else ["json"]
+JSONDecodeError = json.JSONDecodeError
+
+_backend = BACKENDS[0]
+
+
+def backend():
+    """Name of the codec in use"""
+    return _backend
+
+
+def use_backend(name):
+    """
+    Switch the codec used by every function of this module, e.g. for benchmarks
+
+    Args:
+        name (str): One of BACKENDS
+    """
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError(f"JSON backend '{name}' is not available, expected one of {', '.join(BACKENDS)}")
+    _backend = name
+
+
+def loads(data):
+    """
+    Decode a JSON document
+
+    Args:
+        data (bytes, bytearray, memoryview or str): Encoded JSON; bytes are decoded without a str copy
+
+    Returns:
+        object: Decoded value
+
+    Raises:
+        JSONDecodeError: If the data is not valid JSON or not valid UTF-8
+    """
+    if _backend == "orjson":
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass  # The stdlib also accepts NaN and Infinity and gives the usual error message
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    try:
+        return json.loads(data)
+    except UnicodeDecodeError as e:
+        raise JSONDecodeError(f"Invalid UTF-8 ({e.reason})", data.decode("utf-8", errors="replace"), e.start) from None
+
+
+def _has_non_finite(obj):
+    if isinstance(obj, float):
+        return not math.isfinite(obj)
+    if isinstance(obj, dict):
+        return any(_has_non_finite(value) for value in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return any(_has_non_finite(value) for value in obj)
+    return False
+
+
+def dumpb(obj, indent=None, sort_keys=False):
+    """
+    Encode a value as UTF-8 JSON bytes
+
+    Output is stable for one backend, but the backends format some floats
+    differently (``1e16`` vs ``1e+16``), so hashes of encoded values are
+    only comparable while the backend stays the same. Values holding NaN or
+    Infinity, which orjson would write as null, and strings with lone
+    surrogates, which have no UTF-8 form, are encoded by the stdlib; the
+    surrogates are kept as ``\\u`` escapes. Indented output always uses the
+    stdlib, since orjson only indents by two spaces.
+
+    Args:
+        obj (object): Value to encode
+        indent (int, optional): Pretty-print with this indent
+        sort_keys (bool, optional): Sort object keys, e.g. for stable hashes
+
+    Returns:
+        bytes: Encoded JSON without a trailing newline
+    """
+    if _backend == "orjson" and indent is None:
+        try:
+            data = orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if sort_keys else 0))
+        except TypeError:
+            pass  # E.g. integers beyond 64 bits or lone surrogates; the stdlib handles them
+        else:
+            # NaN and Infinity come out as null, so only values with a null need checking
+            if b"null" not in data or not _has_non_finite(obj):
+                return data
+    separators = (",", ":") if indent is None else None
+    text = json.dumps(obj, indent=indent, sort_keys=sort_keys, separators=separators, ensure_ascii=False)
+    try:
+        return text.encode("utf-8")
+    except UnicodeEncodeError:
+        # Lone surrogates can only be written escaped
+        return json.dumps(obj, indent=indent, sort_keys=sort_keys, separators=separators).encode("ascii")
+
+
+def dumps(obj, indent=None, sort_keys=False):
+    """Encode a value as a JSON string, see ``dumpb``"""
+    return dumpb(obj, indent, sort_keys).decode("utf-8")
+
+
+def dump_line(obj):
+    """Encode a value as one JSONL line, newline included"""
+    return dumpb(obj) + b"\n"
+
+
+def load(f):
+    """
+    Decode a whole JSON file
+
+    Args:
+        f (file): File object opened in binary or text mode
+
+    Returns:
+        object: Decoded value
+    """
+    return loads(f.read())
+
+
+def dump(obj, f, indent=None):
+    """
+    Write a value as JSON to a file
+
+    Args:
+        obj (object): Value to encode
+        f (file): File object opened in binary or text mode
+        indent (int, optional): Pretty-print with this indent
+    """
+    data = dumpb(obj, indent)
+    f.write(data.decode("utf-8") if isinstance(f, io.TextIOBase) else data)
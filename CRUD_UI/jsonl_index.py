@@ -0,0 +1,294 @@
+import os
+import hashlib
+from array import array
+from pathlib import Path
+
+import jsonl_codec
+
+INDEX_VERSION = 1
+CHUNK_SIZE = 1 << 20  # 1 MiB read blocks while scanning
+TAIL_CHECK_SIZE = 4096  # Bytes re-hashed to detect a rewrite vs. a pure append
+
+
+def hash_file_tail(file_path, size):
+    """
+    Hash the last few KiB before ``size`` to tell appends from rewrites
+
+    Args:
+        file_path (str or Path): Path to the file
+        size (int): End offset of the region to hash
+
+    Returns:
+        str: Hex digest of the region
+    """
+    start = max(0, size - TAIL_CHECK_SIZE)
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        return hashlib.sha1(f.read(size - start)).hexdigest()
+
+
+def index_path_for(file_path):
+    """Return the sidecar index path for a JSONL file (hidden, next to the file)."""
+    file_path = Path(file_path)
+    return file_path.with_name(f".{file_path.name}.idx")
+
+
+class JSONLIndex:
+    def __init__(self, file_path):
+        """
+        Byte-offset index over the non-empty lines of a JSONL file
+
+        Record ``i`` is the i-th non-empty line, matching the numbering used
+        by the editors. Offsets are persisted in a sidecar file keyed by the
+        file size and mtime so reruns only stat the file.
+
+        Args:
+            file_path (str or Path): Path to the JSONL file
+        """
+        self.file_path = Path(file_path)
+        self.index_path = index_path_for(self.file_path)
+        self.size = 0
+        self.mtime_ns = 0
+        self.scanned = 0  # Offset just past the last newline that was indexed
+        self.tail_hash = ""
+        self.starts = array("Q")
+        self.ends = array("Q")
+
+    @classmethod
+    def open(cls, file_path):
+        """
+        Open the index for a file, loading the sidecar and refreshing it
+
+        Args:
+            file_path (str or Path): Path to the JSONL file
+
+        Returns:
+            JSONLIndex: An index that matches the file on disk
+        """
+        index = cls(file_path)
+        index._load_sidecar()
+        index.refresh()
+        return index
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("record index out of range")
+        return jsonl_codec.loads(self.read_line(i))
+
+    def __iter__(self):
+        with open(self.file_path, "rb") as f:
+            for i in range(len(self)):
+                f.seek(self.starts[i])
+                yield jsonl_codec.loads(f.read(self.ends[i] - self.starts[i]))
+
+    def is_current(self):
+        """
+        Check whether the index still matches the file on disk
+
+        Returns:
+            bool: True if size and mtime are unchanged
+        """
+        stat = self.file_path.stat()
+        return stat.st_size == self.size and stat.st_mtime_ns == self.mtime_ns
+
+    def refresh(self):
+        """
+        Bring the index up to date with the file on disk
+
+        Appends are indexed incrementally from the last indexed newline; any
+        other change triggers a full rescan. The sidecar is rewritten when
+        anything changed.
+
+        Returns:
+            bool: True if the index had to be updated
+        """
+        stat = self.file_path.stat()
+        if stat.st_size == self.size and stat.st_mtime_ns == self.mtime_ns:
+            return False
+
+        if not self._is_append(stat.st_size):
+            self.scanned = 0
+            self.starts = array("Q")
+            self.ends = array("Q")
+        else:
+            # Drop a trailing record that had no newline yet; it is rescanned
+            while len(self.starts) and self.starts[-1] >= self.scanned:
+                self.starts.pop()
+                self.ends.pop()
+
+        self._scan(self.scanned)
+        self.size = stat.st_size
+        self.mtime_ns = stat.st_mtime_ns
+        self.tail_hash = self.hash_tail(self.size)
+        self._save_sidecar()
+        return True
+
+    def rescan_from(self, i):
+        """
+        Re-index records from ``i`` onward after the file was rewritten from there
+
+        Offsets before record ``i`` are kept as they are.
+
+        Args:
+            i (int): First record whose bytes may have changed
+        """
+        position = self.starts[i] if i < len(self) else self.scanned
+        del self.starts[i:]
+        del self.ends[i:]
+        while len(self.starts) and self.starts[-1] >= position:
+            self.starts.pop()
+            self.ends.pop()
+
+        self._scan(position)
+        stat = self.file_path.stat()
+        self.size = stat.st_size
+        self.mtime_ns = stat.st_mtime_ns
+        self.tail_hash = self.hash_tail(self.size)
+        self._save_sidecar()
+
+    def open_file(self):
+        """
+        Open the file as it was indexed, for reads at the indexed offsets
+
+        Compaction replaces the file instead of rewriting it, so a handle
+        that matches the index keeps reading the indexed bytes even if the
+        file is replaced while it is open. If the file changed since it was
+        indexed, the index is refreshed first.
+
+        Returns:
+            file: The file opened in binary mode
+        """
+        while True:
+            f = open(self.file_path, "rb")
+            stat = os.fstat(f.fileno())
+            if stat.st_size == self.size and stat.st_mtime_ns == self.mtime_ns:
+                return f
+            f.close()
+            self.refresh()
+
+    def read_line(self, i):
+        """
+        Read the raw bytes of record ``i`` without decoding it
+
+        Args:
+            i (int): Record index
+
+        Returns:
+            bytes: Line content without the trailing newline
+        """
+        with self.open_file() as f:
+            f.seek(self.starts[i])
+            return f.read(self.ends[i] - self.starts[i])
+
+    def read_lines(self, indices):
+        """
+        Read the raw bytes of the requested records in file order
+
+        Args:
+            indices (iterable): Record indices to read
+
+        Returns:
+            dict: Mapping of record index to line bytes
+        """
+        lines = {}
+        with self.open_file() as f:
+            for i in sorted(set(indices)):
+                f.seek(self.starts[i])
+                lines[i] = f.read(self.ends[i] - self.starts[i])
+        return lines
+
+    def read_records(self, indices):
+        """
+        Decode only the requested records
+
+        Args:
+            indices (iterable): Record indices to read
+
+        Returns:
+            dict: Mapping of record index to decoded JSON object
+        """
+        return {i: jsonl_codec.loads(line) for i, line in self.read_lines(indices).items()}
+
+    def _is_append(self, new_size):
+        # Only trust the old offsets if the previously indexed bytes are intact
+        if self.size == 0 or new_size < self.size:
+            return False
+        return self.hash_tail(self.size) == self.tail_hash
+
+    def hash_tail(self, size):
+        """Hash the indexed file's bytes just before ``size``, see ``hash_file_tail``."""
+        return hash_file_tail(self.file_path, size)
+
+    def _scan(self, position):
+        starts, ends = self.starts, self.ends
+        with open(self.file_path, "rb") as f:
+            f.seek(position)
+            pending = b""
+            line_start = position
+            while True:
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                buffer = pending + chunk
+                cursor = 0
+                while True:
+                    newline = buffer.find(b"\n", cursor)
+                    if newline == -1:
+                        break
+                    if buffer[cursor:newline].strip():  # Skip empty lines
+                        starts.append(line_start)
+                        ends.append(line_start + newline - cursor)
+                    line_start += newline - cursor + 1
+                    cursor = newline + 1
+                pending = buffer[cursor:]
+
+        self.scanned = line_start
+        # A final line without a newline is still a record
+        if pending.strip():
+            starts.append(line_start)
+            ends.append(line_start + len(pending.rstrip(b"\r")))
+
+    def _load_sidecar(self):
+        try:
+            with open(self.index_path, "rb") as f:
+                header = jsonl_codec.loads(f.readline())
+                if header.get("version") != INDEX_VERSION:
+                    return
+                count = header["count"]
+                starts, ends = array("Q"), array("Q")
+                starts.fromfile(f, count)
+                ends.fromfile(f, count)
+            size, mtime_ns = header["size"], header["mtime_ns"]
+            scanned, tail_hash = header["scanned"], header["tail_hash"]
+        except (OSError, ValueError, KeyError, TypeError, AttributeError, EOFError):
+            return  # Missing or corrupt sidecar, rebuild from scratch
+
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.scanned = scanned
+        self.tail_hash = tail_hash
+        self.starts, self.ends = starts, ends
+
+    def _save_sidecar(self):
+        header = {
+            "version": INDEX_VERSION,
+            "size": self.size,
+            "mtime_ns": self.mtime_ns,
+            "scanned": self.scanned,
+            "tail_hash": self.tail_hash,
+            "count": len(self.starts),
+        }
+        tmp_path = self.index_path.with_name(self.index_path.name + ".tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(jsonl_codec.dump_line(header))
+                self.starts.tofile(f)
+                self.ends.tofile(f)
+            os.replace(tmp_path, self.index_path)
+        except OSError:
+            pass  # Read-only data folder; the in-memory index still works
@@ -0,0 +1,312 @@
+import argparse
+import hashlib
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import jsonl_codec
+from dir_catalog import catalog
+
+CACHE_VERSION = 2  # 2: issues carry the editor's record index
+CACHE_NAME = ".jsonl_lint_cache.json"
+MAX_ISSUES = 200  # Issues kept per file; the total is still counted
+MAX_WORKERS = os.cpu_count() or 4
+CHUNK_SIZE = 1 << 20
+
+# Field name -> rule. "string" fields hold text; "string_list" fields hold a list of texts.
+RAG_SCHEMA = {
+    "input": {"required": True, "type": "string", "min_length": 1, "max_length": 20_000},
+    "expected_output": {"required": True, "type": "string", "min_length": 1, "max_length": 20_000},
+    "actual_output": {"required": False, "type": "string", "max_length": 20_000},
+    "retrieval_context": {"required": True, "type": "string_list", "min_items": 1, "max_items": 50,
+                          "max_length": 20_000},
+    "context": {"required": False, "type": "string_list", "max_items": 50, "max_length": 20_000},
+}
+
+_cache_lock = threading.Lock()
+_known_hashes = frozenset()  # Set in each worker process, see _init_worker
+
+
+def schema_digest(schema):
+    """Short hash of a schema; cached reports are only reused for the same rules"""
+    return hashlib.sha1(jsonl_codec.dumpb(schema, sort_keys=True)).hexdigest()[:12]
+
+
+def _issue(line, field, code, message):
+    return {"line": line, "record": None, "field": field, "code": code, "message": message}
+
+
+def _unreadable(error):
+    return {"records": 0, "issue_count": 1, "issues": [_issue(None, None, "unreadable", str(error))]}
+
+
+def check_record(record, line, schema=RAG_SCHEMA):
+    """
+    Check one decoded record against a schema
+
+    Args:
+        record (object): Decoded JSON line
+        line (int): 1-based line number, for the issues
+        schema (dict, optional): Field rules, see RAG_SCHEMA
+
+    Returns:
+        list: Issue dicts with line, field, code and message
+    """
+    if not isinstance(record, dict):
+        return [_issue(line, None, "not_object", f"expected a JSON object, got {type(record).__name__}")]
+
+    issues = []
+    for field, rule in schema.items():
+        value = record.get(field)
+        if value is None:
+            if rule.get("required"):
+                issues.append(_issue(line, field, "missing", f"required field '{field}' is missing"))
+            continue
+
+        if rule["type"] == "string_list":
+            if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+                issues.append(_issue(line, field, "type", f"'{field}' must be a list of strings"))
+                continue
+            if len(value) < rule.get("min_items", 0):
+                issues.append(_issue(line, field, "too_few", f"'{field}' has {len(value)} items, "
+                                                              f"at least {rule['min_items']} expected"))
+            if "max_items" in rule and len(value) > rule["max_items"]:
+                issues.append(_issue(line, field, "too_many", f"'{field}' has {len(value)} items, "
+                                                               f"at most {rule['max_items']} allowed"))
+            texts = value
+        elif not isinstance(value, str):
+            issues.append(_issue(line, field, "type", f"'{field}' must be a string, got {type(value).__name__}"))
+            continue
+        else:
+            texts = [value]
+
+        for text in texts:
+            if len(text.strip()) < rule.get("min_length", 0):
+                issues.append(_issue(line, field, "empty", f"'{field}' is empty"))
+                break
+            if "max_length" in rule and len(text) > rule["max_length"]:
+                issues.append(_issue(line, field, "too_long", f"'{field}' has {len(text):,} characters, "
+                                                               f"at most {rule['max_length']:,} allowed"))
+                break
+    return issues
+
+
+def lint_lines(lines, schema=RAG_SCHEMA, max_issues=MAX_ISSUES):
+    """
+    Lint the lines of a JSONL file
+
+    Args:
+        lines (iterable): Raw lines, e.g. a file opened in binary mode
+        schema (dict, optional): Field rules
+        max_issues (int, optional): Issues to keep
+
+    Returns:
+        dict: records, issue_count and the first ``max_issues`` issues. Each
+            issue has the 1-based ``line`` of the file and the 0-based
+            ``record`` index the editor's jump-to-line takes, which skips empty lines.
+    """
+    records = 0
+    issue_count = 0
+    issues = []
+    for line, raw in enumerate(lines, start=1):
+        if not raw.strip():
+            continue  # Empty lines are not records, as in the editors
+        records += 1
+        try:
+            record = jsonl_codec.loads(raw)
+        except ValueError as e:
+            found = [_issue(line, None, "invalid_json", f"invalid JSON: {e}")]
+        else:
+            found = check_record(record, line, schema)
+        for issue in found:
+            issue["record"] = records - 1
+        issue_count += len(found)
+        issues.extend(found[:max(0, max_issues - len(issues))])
+    return {"records": records, "issue_count": issue_count, "issues": issues}
+
+
+def _init_worker(known_hashes):
+    global _known_hashes
+    _known_hashes = known_hashes
+
+
+def lint_file(path, schema=RAG_SCHEMA, max_issues=MAX_ISSUES):
+    """
+    Hash and lint one file; runs in a worker process
+
+    Content already linted under another path or mtime is only hashed.
+
+    Returns:
+        tuple: (sha256, report), report None when the hash is already known
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            digest.update(chunk)
+    content_hash = digest.hexdigest()
+    if content_hash in _known_hashes:
+        return content_hash, None
+    with open(path, "rb") as f:
+        return content_hash, lint_lines(f, schema, max_issues)
+
+
+class LintCache:
+    def __init__(self, base_folder, schema=RAG_SCHEMA):
+        """
+        Lint reports of a data folder, keyed by file content hash
+
+        Each file's (size, mtime) maps to its content hash, so files that
+        were not touched are not even read. A file that was touched but
+        whose content is unchanged, or a copy of a linted file, is hashed
+        and served from the cache without linting.
+
+        Args:
+            base_folder (str or Path): Data folder; the cache file is kept in it
+            schema (dict, optional): Field rules the reports were made with
+        """
+        self.path = Path(base_folder) / CACHE_NAME
+        self.rules = schema_digest(schema)
+        self.files = {}  # relative path -> {"size", "mtime_ns", "sha256"}
+        self.reports = {}  # sha256 -> report
+        try:
+            with open(self.path, "rb") as f:
+                data = jsonl_codec.load(f)
+            if data.get("version") == CACHE_VERSION and data.get("rules") == self.rules:
+                self.files, self.reports = data["files"], data["reports"]
+        except (OSError, ValueError, KeyError):
+            pass  # Missing or stale cache: lint everything
+
+    def lookup(self, name, size, mtime_ns):
+        entry = self.files.get(name)
+        if entry is not None and (entry["size"], entry["mtime_ns"]) == (size, mtime_ns):
+            return self.reports.get(entry["sha256"])
+        return None
+
+    def store(self, name, size, mtime_ns, content_hash, report):
+        self.files[name] = {"size": size, "mtime_ns": mtime_ns, "sha256": content_hash}
+        self.reports[content_hash] = report
+
+    def save(self, folders, names):
+        # Forget files of the linted folders that are gone, and reports no file uses
+        self.files = {
+            name: entry for name, entry in self.files.items()
+            if name in names or name.split("/", 1)[0] not in folders
+        }
+        used = {entry["sha256"] for entry in self.files.values()}
+        self.reports = {content_hash: r for content_hash, r in self.reports.items() if content_hash in used}
+        tmp_path = self.path.with_name(CACHE_NAME + ".tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                jsonl_codec.dump({"version": CACHE_VERSION, "rules": self.rules, "files": self.files,
+                                  "reports": self.reports}, f)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass  # Read-only data folder; the next run lints again
+
+
+def lint_folders(base_folder, folders=None, schema=RAG_SCHEMA, max_workers=MAX_WORKERS, progress=None):
+    """
+    Lint every JSONL file under the data folder, in parallel worker processes
+
+    Args:
+        base_folder (str or Path): Data folder holding one subfolder per dataset
+        folders (list, optional): Only these subfolders; all when None
+        schema (dict, optional): Field rules
+        max_workers (int, optional): Worker processes
+        progress (callable, optional): Called with (files done, total files)
+
+    Returns:
+        dict: "files" maps each relative path to its report; "cached" counts cache hits
+    """
+    base_folder = Path(base_folder)
+    if folders is None:
+        folders = catalog.list_folders(base_folder)
+    files = [
+        (f"{folder}/{entry.name}", entry)
+        for folder in folders
+        for entry in catalog.entries(base_folder / folder)
+        if not entry.is_dir and entry.name.endswith(".jsonl")
+    ]
+
+    with _cache_lock:  # One lint of a folder at a time shares and rewrites its cache
+        cache = LintCache(base_folder, schema)
+        reports = {}
+        todo = []
+        cached = 0
+        for name, entry in files:
+            # Stat now rather than trusting the catalog, which may be older than the file:
+            # a file changed while it is linted keeps the earlier stamp and is linted again
+            try:
+                stat = os.stat(entry.path)
+            except OSError as e:
+                reports[name] = _unreadable(e)
+                continue
+            report = cache.lookup(name, stat.st_size, stat.st_mtime_ns)
+            if report is not None:
+                reports[name] = report
+                cached += 1
+            else:
+                todo.append((name, entry.path, stat))
+        if progress is not None:
+            progress(cached, len(files))
+
+        if todo:
+            known = frozenset(cache.reports)
+            # Spawned workers don't inherit the Streamlit server's threads
+            with ProcessPoolExecutor(max_workers=min(max_workers, len(todo)), mp_context=multiprocessing.get_context("spawn"),
+                                     initializer=_init_worker, initargs=(known,)) as pool:
+                futures = {pool.submit(lint_file, path, schema): (name, stat) for name, path, stat in todo}
+                for future in as_completed(futures):
+                    name, stat = futures[future]
+                    try:
+                        content_hash, report = future.result()
+                    except OSError as e:
+                        reports[name] = _unreadable(e)
+                    else:
+                        if report is None:
+                            report = cache.reports[content_hash]
+                        cache.store(name, stat.st_size, stat.st_mtime_ns, content_hash, report)
+                        reports[name] = report
+                    if progress is not None:
+                        progress(len(reports), len(files))
+        cache.save(set(folders), {name for name, _ in files})
+
+    return {"files": dict(sorted(reports.items())), "cached": cached}
+
+
+def iter_issues(result):
+    """Yield every kept issue of a ``lint_folders`` result, with its file"""
+    for name, report in result["files"].items():
+        for issue in report["issues"]:
+            yield dict(issue, file=name)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Check the JSONL files of a data folder against the RAG record schema")
+    parser.add_argument("base_folder", nargs="?", default="./data", help="Folder with one subfolder per dataset")
+    parser.add_argument("--folders", nargs="*", help="Only lint these subfolders")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="Worker processes")
+    parser.add_argument("--json", action="store_true", help="Print the full result as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    result = lint_folders(args.base_folder, args.folders, max_workers=args.workers)
+    issue_count = sum(report["issue_count"] for report in result["files"].values())
+    if args.json:
+        print(jsonl_codec.dumps(result, indent=4))
+    else:
+        for issue in iter_issues(result):
+            print(f"{issue['file']}:{issue['line']}: record {issue['record']}: {issue['code']}: {issue['message']}")
+        records = sum(report["records"] for report in result["files"].values())
+        print(f"{len(result['files'])} file(s), {records:,} record(s), {issue_count:,} issue(s), "
+              f"{result['cached']} file(s) from cache", file=sys.stderr)
+    return 1 if issue_count else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,600 @@
+import hashlib
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+from bisect import bisect_left
+from collections import namedtuple
+from concurrent.futures import Future
+from pathlib import Path
+
+import jsonl_codec
+from jsonl_index import JSONLIndex
+from dir_catalog import catalog
+from dataset_cache import dataset_cache
+from record_buffer import RecordView
+
+COMPACT_DELAY = 1.0  # Seconds to wait for more edits before compacting
+COPY_CHUNK_SIZE = 1 << 20
+VERSION_BYTES = 8
+WRITER_IDLE = 30.0  # Seconds without saves before a file's writer thread exits
+
+# Lines whose edits were journaled, and line -> current version of those rejected as stale
+SaveResult = namedtuple("SaveResult", ["saved", "conflicts"])
+
+_patchers = {}
+_patchers_lock = threading.Lock()
+logger = logging.getLogger(__name__)
+
+
+def record_version(line):
+    """
+    Version of a record: a short hash of its encoded line
+
+    A journaled record is encoded with the same codec that later writes it
+    to the file, so compaction does not change the version of an unchanged
+    record.
+
+    Args:
+        line (bytes): Encoded record without the newline
+
+    Returns:
+        str: Hex digest
+    """
+    return hashlib.blake2b(line, digest_size=VERSION_BYTES).hexdigest()
+
+
+def _version_hash(version):
+    # Versions from before a compaction name an older generation but the same content hash
+    return version.split(".", 1)[-1] if version else version
+
+
+def get_patcher(file_path):
+    """
+    Return the process-wide patcher for a JSONL file
+
+    All Streamlit sessions share one patcher per file so that journal appends
+    and compaction are serialized.
+
+    Args:
+        file_path (str or Path): Path to the JSONL file
+
+    Returns:
+        JSONLPatcher: Patcher for the file
+    """
+    key = Path(file_path).resolve()
+    with _patchers_lock:
+        if key not in _patchers:
+            _patchers[key] = JSONLPatcher(key)
+        return _patchers[key]
+
+
+def _copy_prefix(src, out, length):
+    # In-kernel copy where the platform has one (a reflink on filesystems that share extents)
+    copied = 0
+    if hasattr(os, "copy_file_range"):
+        try:
+            while copied < length:
+                step = os.copy_file_range(src.fileno(), out.fileno(), length - copied, copied, copied)
+                if not step:
+                    break
+                copied += step
+        except OSError:
+            pass  # Not supported here; the rest is copied below
+    src.seek(copied)
+    out.seek(copied)
+    while copied < length:
+        chunk = src.read(min(COPY_CHUNK_SIZE, length - copied))
+        if not chunk:
+            break
+        out.write(chunk)
+        copied += len(chunk)
+
+
+def _fsync_dir(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class PatchedRecords:
+    def __init__(self, patcher, index, pending, generation=0):
+        """
+        Read view of a JSONL file with journaled edits applied on top
+
+        Record indices are physical line indices of the file on disk.
+        Deleted lines stay addressable as tombstones until compaction.
+
+        Reads hold the patcher lock. If the file was compacted or changed
+        since the view was opened, the view reloads first, so it never
+        mixes offsets or edits of two versions of the file.
+
+        Args:
+            patcher (JSONLPatcher): Patcher of the file
+            index (JSONLIndex): Index of the file on disk
+            pending (dict): Record index to replacement object, or None for a delete
+            generation (int, optional): Compactions that removed lines before this view,
+                see ``JSONLPatcher.records``
+        """
+        self._patcher = patcher
+        self.index = index
+        self.pending = pending
+        self.generation = generation
+
+    def _sync(self):
+        # Caller holds the patcher lock
+        if not self.index.is_current():
+            fresh = self._patcher.records()
+            self.index, self.pending, self.generation = fresh.index, fresh.pending, fresh.generation
+
+    def __len__(self):
+        deleted = sum(1 for i, record in self.pending.items() if record is None and i < len(self.index))
+        return len(self.index) - deleted
+
+    def __getitem__(self, i):
+        with self._patcher.lock:
+            self._sync()
+            if i in self.pending:
+                if self.pending[i] is None:
+                    raise KeyError(f"line {i} has been deleted")
+                return self.pending[i]
+            return dataset_cache.read_records(self.index, [i])[i]
+
+    @property
+    def line_count(self):
+        """Number of indexed lines, including tombstoned ones; blank lines are not counted"""
+        return len(self.index)
+
+    def is_deleted(self, i):
+        return i in self.pending and self.pending[i] is None
+
+    def live_indices(self):
+        """
+        Indices of records that have not been deleted
+
+        Returns:
+            list: Record indices in file order
+        """
+        return [i for i in range(len(self.index)) if not self.is_deleted(i)]
+
+    def read_line(self, i):
+        with self._patcher.lock:
+            self._sync()
+            if i in self.pending:
+                return jsonl_codec.dumpb(self[i])
+            return self.index.read_line(i)
+
+    def read_views(self, indices):
+        """Lazily decoded views of records, for previews that don't need the decoded record"""
+        indices = set(indices)
+        with self._patcher.lock:
+            self._sync()
+            views = dataset_cache.read_views(self.index, (i for i in indices if i not in self.pending))
+            for i in indices:
+                if i in self.pending and self.pending[i] is not None:
+                    views[i] = RecordView(i, jsonl_codec.dumpb(self.pending[i]))
+        return views
+
+    def versions(self, indices):
+        """
+        Current versions of records, for saves that must not overwrite newer edits
+
+        A version is the ``record_version`` of the line prefixed with the
+        generation of the view, so a save can find the line again after a
+        compaction removed deleted lines above it.
+
+        Args:
+            indices (iterable): Record indices
+
+        Returns:
+            dict: Record index to version string, or None for deleted and missing lines
+        """
+        indices = set(indices)
+        with self._patcher.lock:
+            self._sync()
+            lines = dataset_cache.read_lines(self.index, (i for i in indices if i not in self.pending and 0 <= i < len(self.index)))
+            versions = {}
+            for i in indices:
+                if i in self.pending:
+                    record = self.pending[i]
+                    line = None if record is None else jsonl_codec.dumpb(record)
+                else:
+                    line = lines.get(i)
+                versions[i] = None if line is None else f"{self.generation}.{record_version(line)}"
+        return versions
+
+    def read_records(self, indices):
+        indices = set(indices)
+        with self._patcher.lock:
+            self._sync()
+            records = dataset_cache.read_records(self.index, (i for i in indices if i not in self.pending))
+            for i in indices:
+                if i in self.pending:
+                    records[i] = self[i]
+        return records
+
+
+class JSONLPatcher:
+    def __init__(self, file_path):
+        """
+        Journaled, in-place record patching for a JSONL file
+
+        Saves append edits to a small journal next to the file, so their cost
+        is proportional to the edit. A background compaction then writes the
+        edited file next to it and replaces the file, so readers that have
+        it open keep reading a consistent version; only the records from
+        the first edited one onward are re-encoded.
+
+        Saves from every session go through one writer queue per file. The
+        writer takes all waiting saves at once, checks each edit against the
+        version of the record it was made from, and journals the edits that
+        are still current with a single fsync. Edits of different records
+        merge; an edit of a record that changed or was deleted is rejected
+        instead of overwriting it. Line numbers of versioned edits made
+        before a compaction removed deleted lines are shifted to where the
+        record is now, so those edits still apply.
+
+        Args:
+            file_path (Path): Path to the JSONL file
+        """
+        self.file_path = Path(file_path)
+        self.journal_path = self._sidecar("journal")
+        self.compact_path = self._sidecar("compact")
+        self.compact_meta_path = self._sidecar("compact.json")
+        self.next_journal_path = self._sidecar("journal.next")
+        self.lock = threading.RLock()
+        self._compact_lock = threading.Lock()  # One compaction at a time; it holds self.lock only briefly
+        self._timer = None
+        self._requests = queue.SimpleQueue()
+        self._writer = None
+        self._writer_lock = threading.Lock()
+        self._removed = []  # Per compaction that removed lines, the sorted line numbers it removed
+
+        with self.lock:
+            self._recover()
+
+    def _sidecar(self, suffix):
+        return self.file_path.with_name(f".{self.file_path.name}.{suffix}")
+
+    def records(self):
+        """
+        Open the file with all journaled edits applied
+
+        Returns:
+            PatchedRecords: Read view of the file
+        """
+        with self.lock:
+            return PatchedRecords(self, JSONLIndex.open(self.file_path), self.pending(), len(self._removed))
+
+    def save(self, updates, versions=None):
+        """
+        Journal replacement records through the file's writer queue
+
+        Args:
+            updates (dict): Record index to new JSON object
+            versions (dict, optional): Record index to the version the edit was made
+                from, see ``PatchedRecords.versions``; lines without one are saved
+                unconditionally
+
+        Returns:
+            SaveResult: Saved lines and rejected stale ones
+        """
+        return self._submit([{"op": "set", "line": i, "record": record} for i, record in updates.items()], versions)
+
+    def delete(self, indices, versions=None):
+        """
+        Journal tombstones for records through the file's writer queue
+
+        Args:
+            indices (iterable): Record indices to delete
+            versions (dict, optional): Record index to the version the user saw
+
+        Returns:
+            SaveResult: Deleted lines and rejected stale ones
+        """
+        return self._submit([{"op": "delete", "line": i} for i in indices], versions)
+
+    def pending(self):
+        """
+        Read the journal into the edits that have not been compacted yet
+
+        Returns:
+            dict: Record index to replacement object, or None for a delete
+        """
+        with self.lock:
+            header, ops = self._read_journal()
+            if header is None:
+                return {}
+            if not self._journal_applies(header):
+                # The file was rewritten outside the patcher; line numbers no longer apply.
+                # The edits are set aside for the editor to report, see stale_journals.
+                os.replace(self.journal_path, self._sidecar(f"journal.stale-{time.time_ns()}"))
+                return {}
+
+            pending = {}
+            for op in ops:
+                pending[op["line"]] = op.get("record") if op["op"] == "set" else None
+            return pending
+
+    def remap_lines(self, lines, generation):
+        """
+        Find where lines read before later compactions are now
+
+        Args:
+            lines (iterable): Line numbers read at ``generation``
+            generation (int): ``PatchedRecords.generation`` of the view they were read from
+
+        Returns:
+            dict: Old line number to its current one; lines a compaction removed are left out
+        """
+        with self.lock:
+            current = {line: self._current_line(line, f"{generation}.") for line in lines}
+        return {line: target for line, target in current.items() if target is not None}
+
+    def stale_journals(self):
+        """
+        Journals set aside because the file was rewritten outside the patcher
+
+        Their edits were never written into the file; they are kept so the
+        loss can be reported and the edits recovered by hand.
+
+        Returns:
+            list: (path, number of edits) of each set-aside journal, oldest first
+        """
+        journals = []
+        for path in sorted(self.file_path.parent.glob(f".{self.file_path.name}.journal.stale-*")):
+            with open(path, "rb") as f:
+                journals.append((path, max(sum(1 for line in f if line.strip()) - 1, 0)))
+        return journals
+
+    def discard_stale_journals(self):
+        """Delete the journals listed by ``stale_journals``"""
+        for path, _ in self.stale_journals():
+            os.remove(path)
+
+    def compact(self):
+        """
+        Apply the journal to the file
+
+        The edited file is written and fsynced to a sidecar, copying the
+        bytes before the first edited record unchanged, and then replaces
+        the file. The copy runs without the patcher lock, so reads and saves
+        go on meanwhile; saves journaled during the copy are carried over to
+        a journal for the new file. An interrupted compaction is finished on
+        the next open.
+        """
+        with self._compact_lock:
+            with self.lock:
+                header, ops = self._read_journal()
+                pending = self.pending()
+                index = JSONLIndex.open(self.file_path)
+                pending = {i: record for i, record in pending.items() if i < len(index)}
+                if not pending:
+                    self._clear_journal()
+                    return
+
+            first = min(pending)
+            with open(self.file_path, "rb") as src, open(self.compact_path, "wb") as out:
+                _copy_prefix(src, out, index.starts[first])
+                for i in range(first, len(index)):
+                    if i in pending:
+                        if pending[i] is not None:
+                            out.write(jsonl_codec.dump_line(pending[i]))
+                        continue
+                    src.seek(index.starts[i])
+                    out.write(src.read(index.ends[i] - index.starts[i]) + b"\n")
+                size = out.tell()
+                out.flush()
+                os.fsync(out.fileno())
+            shutil.copymode(self.file_path, self.compact_path)
+
+            with self.lock:
+                current_header, current_ops = self._read_journal()
+                if current_header != header or current_ops[:len(ops)] != ops or not index.is_current():
+                    # The file or the journal was rewritten meanwhile; the next compaction starts over
+                    os.remove(self.compact_path)
+                    return
+                removed = sorted(i for i, record in pending.items() if record is None)
+                later = current_ops[len(ops):]
+                if later:
+                    # Saves made during the copy refer to the old line numbers
+                    self._write_journal(self.next_journal_path, size, self.compact_path, [
+                        dict(op, line=op["line"] - bisect_left(removed, op["line"])) for op in later
+                    ])
+
+                # The meta file marks the new file as complete and safe to install
+                self._write_json(self.compact_meta_path, {"size": size})
+                self._install_compacted()
+                if removed:
+                    self._removed.append(removed)
+                index.rescan_from(first)
+                catalog.invalidate(self.file_path.parent)
+                dataset_cache.invalidate(self.file_path)
+                if later:
+                    self._schedule_compaction()
+
+    def cancel_compaction(self):
+        """
+        Cancel the background compaction scheduled by the last save
+
+        The edits stay in the journal until ``compact`` is called or the
+        next save schedules a compaction again.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _submit(self, ops, versions):
+        if not ops:
+            return SaveResult([], {})
+        future = Future()
+        self._requests.put((ops, versions or {}, future))
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name=f"writer-{self.file_path.name}", daemon=True)
+                self._writer.start()
+        return future.result()
+
+    def _write_loop(self):
+        while True:
+            try:
+                batch = [self._requests.get(timeout=WRITER_IDLE)]
+            except queue.Empty:
+                with self._writer_lock:
+                    # A save queued before this check is still taken; one queued after starts a new writer
+                    if self._requests.empty():
+                        self._writer = None
+                        return
+                continue
+            while True:
+                try:
+                    batch.append(self._requests.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                results = self._commit(batch)
+            except Exception as e:
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, _, future), result in zip(batch, results):
+                future.set_result(result)
+
+    def _current_line(self, line, version):
+        # Where a line read at the version's generation is now, or None if a compaction removed it
+        generation = int(version.split(".", 1)[0]) if version else len(self._removed)
+        for removed in self._removed[generation:]:
+            shift = bisect_left(removed, line)
+            if shift < len(removed) and removed[shift] == line:
+                return None
+            line -= shift
+        return line
+
+    def _commit(self, batch):
+        # Check a batch of saves in arrival order against the current versions and journal the accepted ops.
+        # Results report the line numbers the saves were made with.
+        with self.lock:
+            records = self.records()
+            targets = [[self._current_line(op["line"], versions.get(op["line"])) for op in ops] for ops, versions, _ in batch]
+            current = records.versions(line for lines in targets for line in lines if line is not None)
+            accepted = []
+            results = []
+            for (ops, versions, _), lines in zip(batch, targets):
+                saved, conflicts = [], {}
+                for op, target in zip(ops, lines):
+                    line = op["line"]
+                    version = current.get(target)
+                    # A deleted or missing line cannot be saved, or deleted again
+                    if version is None or (line in versions and _version_hash(version) != _version_hash(versions[line])):
+                        conflicts[line] = version
+                        continue
+                    accepted.append(dict(op, line=target))
+                    saved.append(line)
+                    # Later saves in the batch see this edit as the current version
+                    record = op.get("record")
+                    current[target] = None if record is None else f"{records.generation}.{record_version(jsonl_codec.dumpb(record))}"
+                results.append(SaveResult(saved, conflicts))
+            self._append(accepted)
+        return results
+
+    def _append(self, ops):
+        if not ops:
+            return
+        with self.lock:
+            header, _ = self._read_journal()
+            if header is None:
+                self._write_journal(self.journal_path, self.file_path.stat().st_size, self.file_path, ops)
+            else:
+                with open(self.journal_path, "ab") as f:
+                    for op in ops:
+                        f.write(jsonl_codec.dump_line(op))
+                    f.flush()
+                    os.fsync(f.fileno())
+            self._schedule_compaction()
+
+    def _write_journal(self, path, size, file_path, ops):
+        # Bind the journal to the file version its line numbers refer to
+        header = {"size": size, "tail_hash": JSONLIndex(file_path).hash_tail(size)}
+        with open(path, "wb") as f:
+            f.write(jsonl_codec.dump_line(header))
+            for op in ops:
+                f.write(jsonl_codec.dump_line(op))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _schedule_compaction(self):
+        # Restart the timer so a burst of saves is compacted once
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(COMPACT_DELAY, self._compact_in_background)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _compact_in_background(self):
+        try:
+            self.compact()
+        except Exception:
+            # Nothing waits on the timer thread; the journal keeps the edits and the next save retries
+            logger.exception("Compaction of %s failed", self.file_path)
+
+    def _read_journal(self):
+        try:
+            with open(self.journal_path, "rb") as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return None, []
+        if not lines:
+            return None, []
+
+        ops = []
+        for line in lines[1:]:
+            try:
+                ops.append(jsonl_codec.loads(line))
+            except jsonl_codec.JSONDecodeError:
+                break  # Torn final write from a crash; everything before it is durable
+        return jsonl_codec.loads(lines[0]), ops
+
+    def _journal_applies(self, header):
+        # Appends keep line numbers valid; anything that changed the journaled bytes does not
+        size = self.file_path.stat().st_size
+        if size < header["size"]:
+            return False
+        return JSONLIndex(self.file_path).hash_tail(header["size"]) == header["tail_hash"]
+
+    def _clear_journal(self):
+        try:
+            os.remove(self.journal_path)
+        except FileNotFoundError:
+            pass
+
+    def _install_compacted(self):
+        if self.compact_path.exists():
+            os.replace(self.compact_path, self.file_path)
+            _fsync_dir(self.file_path.parent)
+        if self.next_journal_path.exists():
+            os.replace(self.next_journal_path, self.journal_path)
+        else:
+            self._clear_journal()
+        os.remove(self.compact_meta_path)
+
+    def _recover(self):
+        # Finish a compaction that was interrupted after its output was made durable
+        if self.compact_meta_path.exists():
+            self._install_compacted()
+            return
+        for path in (self.compact_path, self.next_journal_path):
+            if path.exists():
+                os.remove(path)
+
+    def _write_json(self, path, obj):
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            jsonl_codec.dump(obj, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
@@ -0,0 +1,389 @@
+import re
+import shlex
+import threading
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+
+import jsonl_codec
+from jsonl_index import JSONLIndex
+from dataset_cache import dataset_cache
+
+TOKEN_PATTERN = re.compile(r"\w+")
+MAX_EXACT_VALUE_LENGTH = 256  # Longer strings are only token-indexed
+DEFAULT_LIMIT = 1000
+GRAM_LENGTH = 3  # Longest token substring indexed for "contains"
+KEY_BYTES = 160  # Rough in-memory size of a posting list key and its empty array
+MAX_INDEX_BYTES = 256 << 20  # Memory budget of all search indexes together
+
+_indexes = OrderedDict()  # path -> SearchIndex, least recently used first
+_indexes_lock = threading.Lock()
+
+
+class QueryError(ValueError):
+    """Raised when a search query cannot be parsed."""
+
+
+def tokenize(text):
+    """Split text into lowercase word tokens."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def flatten_fields(record, prefix=""):
+    """
+    Yield (field, value) pairs for every scalar in a record
+
+    Nested objects use dotted field names and list items are reported under
+    the field that holds the list.
+
+    Args:
+        record (dict): Decoded JSON object
+        prefix (str, optional): Field name prefix for nested objects
+
+    Yields:
+        tuple: Field name and scalar value
+    """
+    for key, value in record.items():
+        field = f"{prefix}{key}"
+        items = value if isinstance(value, list) else [value]
+        for item in items:
+            if isinstance(item, dict):
+                yield from flatten_fields(item, f"{field}.")
+            elif not isinstance(item, list):
+                yield field, item
+
+
+def parse_query(query):
+    """
+    Parse a query such as ``question contains "refund" and context_id == 42``
+
+    Clauses are joined with ``and``. ``contains`` is a case-insensitive
+    substring match; ``==`` compares against a JSON literal, or a plain
+    string when the value is not valid JSON.
+
+    Args:
+        query (str): Query text
+
+    Returns:
+        list: List of (field, operator, value) clauses
+    """
+    try:
+        words = shlex.split(query, posix=False)
+    except ValueError as e:
+        raise QueryError(f"Unbalanced quotes in query: {e}")
+
+    clauses = []
+    position = 0
+    while position < len(words):
+        if len(words) - position < 3:
+            raise QueryError(f"Incomplete clause: {' '.join(words[position:])}")
+        field, operator, raw_value = words[position:position + 3]
+        if operator not in ("contains", "=="):
+            raise QueryError(f"Unknown operator '{operator}', use 'contains' or '=='")
+
+        try:
+            value = jsonl_codec.loads(raw_value)
+        except jsonl_codec.JSONDecodeError:
+            value = raw_value.strip("'")
+        if operator == "contains":
+            value = str(value).lower()
+        clauses.append((field, operator, value))
+
+        position += 3
+        if position < len(words):
+            if words[position].lower() != "and":
+                raise QueryError(f"Expected 'and' but found '{words[position]}'")
+            position += 1
+    return clauses
+
+
+def get_search_index(file_path):
+    """
+    Return the process-wide search index for a JSONL file
+
+    The index is built, or brought up to date, in a background thread;
+    ``is_ready`` tells when it can answer queries for the file on disk.
+    Indexes are evicted least recently used first once their estimated
+    size exceeds ``MAX_INDEX_BYTES``.
+
+    Args:
+        file_path (str or Path): Path to the JSONL file
+
+    Returns:
+        SearchIndex: Index of the file
+    """
+    key = Path(file_path).resolve()
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = SearchIndex(key)
+        _indexes.move_to_end(key)
+        search_index = _indexes[key]
+    search_index.refresh_in_background()
+    return search_index
+
+
+def _evict(keep):
+    # Drop least recently used indexes until all fit the budget; the one just built stays
+    with _indexes_lock:
+        total = sum(index.nbytes for index in _indexes.values())
+        for key in list(_indexes):
+            if total <= MAX_INDEX_BYTES:
+                break
+            if _indexes[key] is not keep:
+                total -= _indexes.pop(key).nbytes
+
+
+class _Postings:
+    def __init__(self, max_bytes):
+        """
+        Posting lists of one file version, built off the search lock and then swapped in
+
+        Args:
+            max_bytes (int): Estimated size at which ``add_record`` reports overflow
+        """
+        self.max_bytes = max_bytes
+        self.tokens = {}  # field -> token -> array of line numbers
+        self.vocab = {}  # field -> list of tokens, by token id
+        self.grams = {}  # field -> substring of up to GRAM_LENGTH chars -> array of ids of tokens holding it
+        self.values = {}  # field -> hash of the canonical JSON value -> array of line numbers
+        self.nbytes = 0
+
+    def add_record(self, i, record):
+        """
+        Index one record
+
+        Returns:
+            bool: False once the postings outgrew ``max_bytes``
+        """
+        for field, value in flatten_fields(record):
+            if not (isinstance(value, str) and len(value) > MAX_EXACT_VALUE_LENGTH):
+                # Only a hash is kept; search() verifies candidates, so collisions are harmless
+                self._post(self.values.setdefault(field, {}), hash(jsonl_codec.dumps(value)), i)
+            # Numbers and booleans are tokenized too so that "contains" works on them
+            text = value if isinstance(value, str) else jsonl_codec.dumps(value)
+            field_tokens = self.tokens.setdefault(field, {})
+            for token in set(tokenize(text)):
+                if token not in field_tokens:
+                    self._add_token(field, token)
+                self._post(field_tokens, token, i)
+        return self.nbytes <= self.max_bytes
+
+    def candidates(self, field, operator, value):
+        # Over-approximate the matching lines from postings; search() verifies them
+        if operator == "==" and not (isinstance(value, str) and len(value) > MAX_EXACT_VALUE_LENGTH):
+            return set(self.values.get(field, {}).get(hash(jsonl_codec.dumps(value)), ()))
+
+        field_tokens = self.tokens.get(field, {})
+        query_tokens = tokenize(str(value))
+        if not query_tokens:
+            # Nothing to narrow on, e.g. punctuation only; every line with the field qualifies
+            return set().union(*field_tokens.values()) if field_tokens else set()
+
+        candidates = None
+        for query_token in query_tokens:
+            # Edge tokens of a substring may be partial words, so match within tokens
+            lines = set()
+            vocab = self.vocab.get(field, [])
+            for token_id in self._token_ids(field, query_token):
+                lines.update(field_tokens[vocab[token_id]])
+            candidates = lines if candidates is None else candidates & lines
+            if not candidates:
+                break
+        return candidates
+
+    def _token_ids(self, field, query_token):
+        # Tokens holding query_token: one lookup for short queries, else the tokens sharing all its grams
+        grams = self.grams.get(field, {})
+        if len(query_token) <= GRAM_LENGTH:
+            return grams.get(query_token, ())
+        postings = sorted((grams.get(query_token[k:k + GRAM_LENGTH], ()) for k in range(len(query_token) - GRAM_LENGTH + 1)), key=len)
+        ids = set(postings[0])
+        for other in postings[1:]:
+            if not ids:
+                break
+            ids.intersection_update(other)
+        vocab = self.vocab[field] if ids else []
+        return [token_id for token_id in ids if query_token in vocab[token_id]]
+
+    def _add_token(self, field, token):
+        vocab = self.vocab.setdefault(field, [])
+        token_id = len(vocab)
+        vocab.append(token)
+        self.nbytes += len(token)
+        grams = self.grams.setdefault(field, {})
+        substrings = {token[k:k + n] for n in range(1, GRAM_LENGTH + 1) for k in range(len(token) - n + 1)}
+        for gram in substrings:
+            self._post(grams, gram, token_id)
+
+    def _post(self, postings, key, i):
+        entries = postings.get(key)
+        if entries is None:
+            entries = postings[key] = array("I")
+            self.nbytes += KEY_BYTES
+        entries.append(i)
+        self.nbytes += entries.itemsize
+
+
+class SearchIndex:
+    def __init__(self, file_path, max_bytes=None):
+        """
+        Inverted index over the fields of a JSONL file
+
+        Every string field is indexed by word token and every short scalar by
+        a hash of its exact value, with postings stored as arrays of line
+        numbers. Substrings of tokens are found through a gram index over
+        the vocabulary of each field, so ``contains`` never scans it. The
+        index is built once per file version, in a background thread, and
+        extended on append. A file whose index would outgrow ``max_bytes``
+        is searched by reading every line instead.
+
+        Args:
+            file_path (Path): Path to the JSONL file
+            max_bytes (int, optional): Estimated index size limit, MAX_INDEX_BYTES when None
+        """
+        self.file_path = Path(file_path)
+        self.max_bytes = MAX_INDEX_BYTES if max_bytes is None else max_bytes
+        self.line_index = None
+        self.postings = None  # None when the index outgrew max_bytes
+        self.error = None  # Last failed build, e.g. the file is unreadable
+        self.lock = threading.Lock()
+        self._builder = None
+        self._builder_lock = threading.Lock()
+
+    @property
+    def nbytes(self):
+        """Estimated size of the postings"""
+        return self.postings.nbytes if self.postings is not None else 0
+
+    def is_ready(self):
+        """Whether the index matches the file on disk and no build is running"""
+        with self.lock:
+            line_index = self.line_index
+        return line_index is not None and self._builder is None and line_index.is_current()
+
+    def refresh_in_background(self):
+        """Start bringing the index up to date unless it is current or already being built"""
+        with self._builder_lock:
+            if self._builder is not None:
+                return
+            with self.lock:
+                if self.line_index is not None and self.line_index.is_current():
+                    return
+            self._builder = threading.Thread(target=self._build, name=f"search-index-{self.file_path.name}", daemon=True)
+            self._builder.start()
+
+    def refresh(self):
+        """
+        Re-index the file if it changed since the last build
+
+        Appended lines are indexed on their own; any other change rebuilds
+        the index from scratch.
+        """
+        with self.lock:
+            previous = self.line_index
+            if previous is not None and previous.is_current():
+                return
+            postings = self.postings
+
+        line_index = JSONLIndex.open(self.file_path)
+        # Opening may refresh the index again if the file was replaced meanwhile
+        with line_index.open_file() as f:
+            if previous is not None and postings is not None and self._is_append(previous, line_index):
+                # Appends are usually small, so they are indexed in place under the lock
+                with self.lock:
+                    if not self._add_lines(postings, line_index, len(previous), f):
+                        postings = None
+                    self.postings, self.line_index = postings, line_index
+            else:
+                postings = _Postings(self.max_bytes)
+                if not self._add_lines(postings, line_index, 0, f):
+                    postings = None
+                with self.lock:
+                    self.postings, self.line_index = postings, line_index
+        _evict(self)
+
+    def search(self, query, records=None, limit=DEFAULT_LIMIT):
+        """
+        Find the lines matching a query
+
+        Args:
+            query (str): Query text, see ``parse_query``
+            records (PatchedRecords, optional): View with unsaved-to-disk edits
+                to apply on top of the index
+            limit (int, optional): Maximum number of lines to return
+
+        Returns:
+            list: Sorted line numbers of matching records
+        """
+        clauses = parse_query(query)
+        pending = records.pending if records is not None else {}
+        if self.line_index is None:
+            self.refresh()  # Callers that don't wait for is_ready build the index here
+
+        with self.lock:
+            line_index = self.line_index
+            if self.postings is None:
+                candidates = range(len(line_index))  # Too large to index; every line is checked
+            else:
+                candidates = None
+                for field, operator, value in clauses:
+                    postings = self.postings.candidates(field, operator, value)
+                    candidates = postings if candidates is None else candidates & postings
+                    if not candidates:
+                        break
+
+        # Lines with pending edits are checked against their new content instead
+        candidates = sorted(set(candidates or ()).union(pending))
+        matches = []
+        for start in range(0, len(candidates), 256):
+            batch = [i for i in candidates[start:start + 256] if i not in pending or pending[i] is not None]
+            decoded = dataset_cache.read_records(line_index, (i for i in batch if i not in pending and i < len(line_index)))
+            for i in batch:
+                record = pending[i] if i in pending else decoded.get(i)
+                if record is not None and all(self._matches(record, clause) for clause in clauses):
+                    matches.append(i)
+                    if len(matches) >= limit:
+                        return matches
+        return matches
+
+    def _build(self):
+        try:
+            self.refresh()
+            self.error = None
+        except OSError as e:
+            self.error = e
+        finally:
+            with self._builder_lock:
+                self._builder = None
+
+    def _matches(self, record, clause):
+        field, operator, value = clause
+        for record_field, item in flatten_fields(record):
+            if record_field != field:
+                continue
+            if operator == "==" and item == value and type(item) is type(value):
+                return True
+            text = item if isinstance(item, str) else jsonl_codec.dumps(item)
+            if operator == "contains" and value in text.lower():
+                return True
+        return False
+
+    def _add_lines(self, postings, line_index, start, f):
+        # False once the postings outgrew their limit
+        for i in range(start, len(line_index)):
+            f.seek(line_index.starts[i])
+            try:
+                record = jsonl_codec.loads(f.read(line_index.ends[i] - line_index.starts[i]))
+            except jsonl_codec.JSONDecodeError:
+                continue  # Malformed lines are simply not searchable
+            if isinstance(record, dict) and not postings.add_record(i, record):
+                return False
+        return True
+
+    def _is_append(self, previous, line_index):
+        # The old line numbers stay valid only if the old bytes are untouched
+        if line_index.size < previous.size or len(line_index) < len(previous):
+            return False
+        if len(previous) and previous.starts[-1] >= previous.scanned:
+            return False  # Last line had no newline and may have grown
+        return line_index.hash_tail(previous.size) == previous.tail_hash
@@ -0,0 +1,194 @@
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+POLL_INTERVAL = 0.5  # Seconds between progress refreshes while operations run
+MAX_WORKERS = 4  # Operations on different folders run side by side
+
+
+class Operation:
+    def __init__(self, op_id, name, total=None, unit="items"):
+        """
+        A file operation queued on the OperationRunner
+
+        Args:
+            op_id (int): Unique operation id
+            name (str): Human readable description
+            total (int, optional): Expected amount of work, if known up front
+            unit (str, optional): Unit of ``done`` and ``total`` for display
+        """
+        self.id = op_id
+        self.name = name
+        self.total = total
+        self.unit = unit
+        self.done = 0
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+
+    def report(self, done, total=None):
+        """
+        Record progress; passed to the operation function as ``progress``
+
+        Args:
+            done (int): Amount of work completed so far
+            total (int, optional): Total amount of work, if it changed or is now known
+        """
+        self.done = done
+        if total is not None:
+            self.total = total
+
+    @property
+    def fraction(self):
+        if self.status == "done":
+            return 1.0
+        if not self.total:
+            return 0.0
+        return min(self.done / self.total, 1.0)
+
+    @property
+    def finished(self):
+        return self.status in ("done", "failed")
+
+    def describe(self):
+        """Short progress text, e.g. '3 / 10 files'"""
+        if self.status == "queued":
+            return "queued"
+        if self.unit == "bytes" and self.total:
+            return f"{self.done / 1_000_000:.1f} / {self.total / 1_000_000:.1f} MB"
+        if self.total:
+            return f"{self.done} / {self.total} {self.unit}"
+        return self.status
+
+
+class OperationRunner:
+    def __init__(self, max_workers=MAX_WORKERS):
+        """
+        Run file operations in background threads and track their progress
+
+        Operations with the same key, e.g. the folder they write to, run one
+        after another in submission order; operations with different keys
+        run side by side, so one session's bulk operation does not hold up
+        every other session.
+
+        Args:
+            max_workers (int, optional): Number of operations run at once
+        """
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="file-op")
+        self._operations = {}
+        self._queues = {}  # key -> operations waiting for the running one with that key
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def submit(self, name, fn, *args, total=None, unit="items", key=None, **kwargs):
+        """
+        Queue ``fn(*args, progress=op.report, **kwargs)`` and return its Operation
+
+        Args:
+            name (str): Human readable description
+            fn (callable): Function doing the work; must accept a ``progress`` keyword
+            total (int, optional): Expected amount of work
+            unit (str, optional): Unit of the progress counts
+            key (hashable, optional): What the operation writes to; operations with
+                the same key never run at the same time
+
+        Returns:
+            Operation: The queued operation
+        """
+        with self._lock:
+            op = Operation(next(self._ids), name, total, unit)
+            self._operations[op.id] = op
+            if key is not None:
+                if key in self._queues:
+                    self._queues[key].append((op, fn, args, kwargs))
+                    return op
+                self._queues[key] = deque()
+        self._executor.submit(self._run, op, fn, args, kwargs, key)
+        return op
+
+    def get(self, op_id):
+        return self._operations.get(op_id)
+
+    def _run(self, op, fn, args, kwargs, key):
+        op.status = "running"
+        op.started_at = time.monotonic()
+        try:
+            op.result = fn(*args, progress=op.report, **kwargs)
+            op.status = "done"
+        except Exception as e:
+            op.error = e
+            op.status = "failed"
+        finally:
+            op.finished_at = time.monotonic()
+            if key is not None:
+                self._start_next(key)
+
+    def _start_next(self, key):
+        with self._lock:
+            queue = self._queues[key]
+            if not queue:
+                del self._queues[key]
+                return
+            job = queue.popleft()
+        self._executor.submit(self._run, *job, key)
+
+
+# Shared by every session so operations on the same folder queue behind each other
+runner = OperationRunner()
+
+
+def track_operation(session_key, op):
+    """
+    Remember an operation in the session so ``render_operations`` shows it
+
+    Args:
+        session_key (str): Session state key holding this page's operation ids
+        op (Operation): Operation returned by ``runner.submit``
+    """
+    st.session_state.setdefault(session_key, []).append(op.id)
+
+
+@st.fragment(run_every=POLL_INTERVAL)
+def render_operations(session_key, success_message=None):
+    """
+    Show live progress for the session's operations without blocking the page
+
+    Runs as a fragment that refreshes on its own; when an operation
+    finishes, the whole app reruns once so listings pick up the change.
+
+    Args:
+        session_key (str): Session state key holding this page's operation ids
+        success_message (callable, optional): Builds the message for a finished
+            operation from its result. Defaults to the operation name.
+    """
+    op_ids = st.session_state.get(session_key, [])
+    operations = [op for op in (runner.get(op_id) for op_id in op_ids) if op is not None]
+    if not operations:
+        return
+
+    seen_key = f"{session_key}_seen"
+    newly_finished = False
+    for op in operations:
+        if op.status == "done":
+            message = success_message(op) if success_message else op.name
+            st.success(f"✅ {message}")
+        elif op.status == "failed":
+            st.error(f"❌ {op.name} failed: {op.error}")
+        else:
+            st.progress(op.fraction, text=f"{op.name}: {op.describe()}")
+        if op.finished and op.id not in st.session_state.setdefault(seen_key, set()):
+            st.session_state[seen_key].add(op.id)
+            newly_finished = True
+
+    if all(op.finished for op in operations):
+        if st.button("Clear finished", key=f"{session_key}_clear"):
+            st.session_state[session_key] = []
+            st.rerun(scope="app")
+    if newly_finished:
+        st.rerun(scope="app")
@@ -0,0 +1,97 @@
+from array import array
+
+import jsonl_codec
+
+
+class RecordView:
+    __slots__ = ("line", "raw", "_record")
+
+    def __init__(self, line, raw):
+        """
+        One stored record, decoded on first access
+
+        Args:
+            line (int): Record index in its file
+            raw (bytes): Encoded JSON line
+        """
+        self.line = line
+        self.raw = raw
+        self._record = None
+
+    @property
+    def record(self):
+        """Decoded record; a new object per view, so callers may change it"""
+        if self._record is None:
+            self._record = jsonl_codec.loads(self.raw)
+        return self._record
+
+    def preview(self, size):
+        """First ``size`` bytes of the line as text, without decoding the record"""
+        return self.raw[:size].decode("utf-8", errors="replace")
+
+
+class RecordBuffer:
+    __slots__ = ("_data", "_offsets", "_slots")
+
+    def __init__(self, line_count):
+        """
+        Raw lines of one JSONL file in a single contiguous buffer
+
+        Record bytes are appended to one bytearray and found through an
+        offsets array, so a stored record costs its encoded size plus an
+        8-byte offset instead of a tree of Python objects; the line map adds
+        8 bytes per line of the file. Records are decoded only
+        when a view's ``record`` is read.
+
+        Not thread-safe: the owner serializes access, since appending may
+        move the buffer.
+
+        Args:
+            line_count (int): Records in the file; lines can be stored in any order
+        """
+        self._data = bytearray()
+        self._offsets = array("Q", [0])  # Slot i spans _offsets[i]:_offsets[i + 1]
+        self._slots = array("q", [-1]) * line_count  # Line -> slot, -1 when not stored
+
+    def __contains__(self, line):
+        return 0 <= line < len(self._slots) and self._slots[line] >= 0
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    @property
+    def nbytes(self):
+        """Bytes held by the buffer and its arrays"""
+        return len(self._data) + len(self._offsets) * 8 + len(self._slots) * 8
+
+    def add(self, line, raw):
+        """
+        Store the encoded bytes of a record
+
+        Args:
+            line (int): Record index
+            raw (bytes): Encoded JSON line without the newline
+        """
+        if line in self:
+            return
+        self._slots[line] = len(self._offsets) - 1
+        self._data += raw
+        self._offsets.append(len(self._data))
+
+    def raw(self, line):
+        """
+        Encoded bytes of a stored record
+
+        Args:
+            line (int): Record index
+
+        Returns:
+            bytes: The line as it was stored
+        """
+        slot = self._slots[line]
+        with memoryview(self._data) as data:
+            return bytes(data[self._offsets[slot]:self._offsets[slot + 1]])
+
+    def view(self, line):
+        """Lazily decoded view of a stored record"""
+        return RecordView(line, self.raw(line))
@@ -0,0 +1,87 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from jsonl_index import hash_file_tail
+
+CHUNK_SIZE = 4 << 20  # 4 MiB reads; newline counting runs at memory speed
+MAX_WORKERS = 8
+
+_counts = {}  # path -> (size, mtime_ns, newline count, last byte, tail hash)
+_counts_lock = threading.Lock()
+
+
+def _count_newlines(f, start, stop):
+    # Count newlines in [start, stop) into one reused buffer
+    buffer = bytearray(CHUNK_SIZE)
+    view = memoryview(buffer)
+    newlines = 0
+    last = b""
+    f.seek(start)
+    remaining = stop - start
+    while remaining > 0:
+        read = f.readinto(view[:min(CHUNK_SIZE, remaining)])
+        if not read:
+            break
+        newlines += buffer.count(b"\n", 0, read)
+        last = bytes(buffer[read - 1:read])
+        remaining -= read
+    return newlines, last
+
+
+def count_records(path):
+    """
+    Count the lines of a JSONL file, remembering the result
+
+    Counts are cached by (path, size, mtime). When the file only grew since
+    the last count, just the appended tail is counted.
+
+    Args:
+        path (str or Path): Path to the JSONL file
+
+    Returns:
+        int: Number of lines, including a last line without a newline
+    """
+    path = Path(path).resolve()
+    stat = path.stat()
+    with _counts_lock:
+        cached = _counts.get(path)
+    if cached is not None and cached[:2] == (stat.st_size, stat.st_mtime_ns):
+        newlines, last = cached[2], cached[3]
+        return newlines + (last not in (b"", b"\n"))
+
+    with open(path, "rb") as f:
+        if cached is not None and stat.st_size > cached[0] and hash_file_tail(path, cached[0]) == cached[4]:
+            # Pure append: count only the new bytes
+            added, last = _count_newlines(f, cached[0], stat.st_size)
+            newlines = cached[2] + added
+        else:
+            newlines, last = _count_newlines(f, 0, stat.st_size)
+
+    entry = (stat.st_size, stat.st_mtime_ns, newlines, last, hash_file_tail(path, stat.st_size))
+    with _counts_lock:
+        _counts[path] = entry
+    return newlines + (last not in (b"", b"\n"))
+
+
+def iter_record_counts(paths, max_workers=MAX_WORKERS):
+    """
+    Count many files in worker threads and yield each result as it finishes
+
+    Args:
+        paths (iterable): File paths to count
+        max_workers (int, optional): Number of worker threads
+
+    Yields:
+        tuple: (path, count) where count is an int, or the exception raised
+    """
+    paths = list(paths)
+    if not paths:
+        return
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(paths))) as pool:
+        futures = {pool.submit(count_records, path): path for path in paths}
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result()
+            except OSError as e:
+                yield futures[future], e
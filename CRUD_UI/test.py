@@ -1,20 +1,20 @@
 import streamlit as st
 from pathlib import Path
 import os
-from datetime import datetime
-import json
 import time
-import shutil
+import jsonl_codec
+from dir_catalog import catalog
+from operations import runner, track_operation, render_operations
+from file_actions import describe_delete, describe_upload, move_to_delete_folder, save_json_uploads
+from dataset_cache import dataset_cache
 
 def list_folders(base_folder):
     """List all folders inside the base directory."""
-    base = Path(base_folder)
-    return [folder.name for folder in base.iterdir() if folder.is_dir()]
+    return catalog.list_folders(base_folder)
 
 def list_files(folder_path, file_type):
     """List files of the given type in the folder."""
-    folder = Path(folder_path)
-    return [file.name for file in folder.glob(f"*.{file_type}")]
+    return catalog.list_files(folder_path, file_type)
 
 BASE_FOLDER = "./data"  # Change this to your actual base folder
 BASE_FOLDER_DELETE = "./delete_groundtruth"
@@ -75,33 +75,16 @@ with functionality[0]:
 
         with col1:
             if st.button("Add File"):
-                timestamp = datetime.now().strftime("%Y-%m-%d-%H-%M-%S")
-                save_filename = f"{st.session_state.selected_folder_ADD}-{timestamp}-{uploaded_file.name}"
-                save_path = Path(BASE_FOLDER) / st.session_state.selected_folder_ADD / save_filename
-
-                # Progress bar
-                progress_bar = st.progress(0)
-
-                with st.spinner("Uploading file..."):
-                    for percent_complete in range(1, 101):
-                        time.sleep(0.01)  # Simulate upload time
-                        progress_bar.progress(percent_complete)
-
-                try:
-                    json_data = json.load(uploaded_file)
-
-                    with open(save_path, "w") as f:
-                        json.dump(json_data, f, indent=4)
-                    st.session_state.save_name = save_filename
-
-                    # st.session_state.upload_status = f"✅ File '{save_filename}' uploaded successfully to '{selected_folder_ADD}'!"
-                    # st.success(st.session_state.upload_status)
-                    st.session_state.upload_status = "uploded"
-
-                except json.JSONDecodeError:
-                    # st.session_state.upload_status = "❌ Invalid JSON file. Please upload a valid JSON file."
-                    # st.error(st.session_state.upload_status)
-                    st.session_state.upload_status = "json_error"
+                # Validate and save in the background; progress is shown below
+                op = runner.submit(
+                    f"Add {uploaded_file.name} to {st.session_state.selected_folder_ADD}",
+                    save_json_uploads,
+                    BASE_FOLDER, st.session_state.selected_folder_ADD, [uploaded_file],
+                    total=1,
+                    unit="files",
+                    key=Path(BASE_FOLDER, st.session_state.selected_folder_ADD)
+                )
+                track_operation("add_operations", op)
 
                 # Reset uploader
                 st.session_state.add_file_key += 1
@@ -141,20 +124,11 @@ with functionality[0]:
             # st.rerun()
         # st.session_state.upload_status = "not_uploaded"
 
+    render_operations("add_operations", success_message=describe_upload)
 
 
 
-def move_to_delete_folder(base_folder, base_folder_delete,selected_folder, files_to_delete):
-    
-    delete_folder = Path(base_folder_delete) / selected_folder 
-    delete_folder.mkdir(parents=True, exist_ok=True)  # Ensure the delete folder exists
-
-    for file in files_to_delete:
-        src_path = Path(base_folder) / selected_folder / file
-        dest_path =delete_folder / file
 
-        if src_path.exists():
-            shutil.move(src_path, dest_path)
             
 with functionality[1]:
     st.session_state.selected_folder_DELETE = st.selectbox("Select a folder", folders, key="delete_folder")
@@ -166,31 +140,28 @@ with functionality[1]:
         files = list_files(Path(BASE_FOLDER, st.session_state.selected_folder_DELETE), "json")
 
         if files:
-            delete_file = st.multiselect("Select file(s) to delete", files, key="delete_file")
+            delete_file = st.multiselect("Select file(s) to delete", files, key=f"delete_file_{st.session_state.delete_file_key}")
 
             if delete_file:
                 if st.button("Delete Selected Files"):
-                                    # Progress bar
-                    progress_bar = st.progress(0)
-
-                    with st.spinner("Files are being deleted..."):
-                        for percent_complete in range(1, 101):
-                            time.sleep(0.01)  # Simulate upload time
-                        progress_bar.progress(percent_complete)
-                        
-                    move_to_delete_folder(BASE_FOLDER, BASE_FOLDER_DELETE,st.session_state.selected_folder_DELETE, delete_file)
-                    st.session_state.delete_status = True
-                    st.success(f"✅ Files deleted successfully - {len(delete_file)} ")
-                    # st.rerun()
+                    # Move the files in the background; progress is shown below
+                    op = runner.submit(
+                        f"Delete {len(delete_file)} file(s) from {st.session_state.selected_folder_DELETE}",
+                        move_to_delete_folder,
+                        BASE_FOLDER, BASE_FOLDER_DELETE, st.session_state.selected_folder_DELETE, delete_file,
+                        total=len(delete_file),
+                        unit="files",
+                        key=Path(BASE_FOLDER, st.session_state.selected_folder_DELETE)
+                    )
+                    track_operation("delete_operations", op)
+                    st.session_state.delete_file_key += 1
+                    st.rerun()
             else:
                 st.warning("⚠️ No files selected for deletion.")
         else:
             st.info("No files available for deletion.")
         
-    if st.session_state.delete_status:
-        st.success(f"✅ Files deleted successfully - {len(delete_file)} ")
-        st.session_state.delete_status = False
-        st.rerun()
+    render_operations("delete_operations", success_message=describe_delete)
         
         
 
@@ -216,8 +187,8 @@ with functionality[2]:
     
     with update_column[2]:
         try:
-            with open(selected_file_for_update, "r") as f:
-                data = json.load(f)
+            with open(selected_file_for_update, "rb") as f:
+                data = jsonl_codec.load(f)
         except Exception as e:
             st.error(f"⚠️ Error opening file: {e}")
             data = None
@@ -265,7 +236,7 @@ with functionality[2]:
             
             # Initialize this sample's edited value if not already set
             if sample_key not in st.session_state.edited_json_values:
-                st.session_state.edited_json_values[sample_key] = json.dumps(sample, indent=4)
+                st.session_state.edited_json_values[sample_key] = jsonl_codec.dumps(sample, indent=4)
             
             # Initialize delete confirmation state for this sample
             if delete_key not in st.session_state.delete_confirmation:
@@ -296,7 +267,7 @@ with functionality[2]:
                     if st.button(f"Save Changes", key=f"save_btn_{sample_id}"):
                         try:
                             # Parse the edited JSON to validate it
-                            updated_sample = json.loads(edited_json)
+                            updated_sample = jsonl_codec.loads(edited_json)
                             
                             # Find this sample in the original data and update it
                             for i, item in enumerate(data):
@@ -305,8 +276,8 @@ with functionality[2]:
                                     break
                             
                             # Save the entire updated data back to the file
-                            with open(selected_file_for_update, "w") as f:
-                                json.dump(data, f, indent=4)
+                            with open(selected_file_for_update, "wb") as f:
+                                jsonl_codec.dump(data, f, indent=4)
                             
                             st.success(f"✅ Sample {idx} updated successfully!")
                             
@@ -315,7 +286,7 @@ with functionality[2]:
                             
                             # Optionally refresh the page to show the updated data
                             st.rerun()
-                        except json.JSONDecodeError as e:
+                        except jsonl_codec.JSONDecodeError as e:
                             st.error(f"❌ Invalid JSON format: {e}")
                         except Exception as e:
                             st.error(f"❌ Error saving changes: {e}")
@@ -342,8 +313,8 @@ with functionality[2]:
                                             break
                                     
                                     # Save the updated data back to the file
-                                    with open(selected_file_for_update, "w") as f:
-                                        json.dump(data, f, indent=4)
+                                    with open(selected_file_for_update, "wb") as f:
+                                        jsonl_codec.dump(data, f, indent=4)
                                     
                                     st.success(f"✅ Sample {idx} deleted successfully!")
                                     
@@ -383,7 +354,7 @@ with functionality[2]:
                 if edited_json:
                     try:
                         # Parse the edited JSON
-                        updated_sample = json.loads(edited_json)
+                        updated_sample = jsonl_codec.loads(edited_json)
                         
                         # Find and update in the original data
                         for i, item in enumerate(data):
@@ -397,8 +368,8 @@ with functionality[2]:
             if success_count > 0:
                 try:
                     # Save all updates to the file
-                    with open(selected_file_for_update, "w") as f:
-                        json.dump(data, f, indent=4)
+                    with open(selected_file_for_update, "wb") as f:
+                        jsonl_codec.dump(data, f, indent=4)
                     
                     st.success(f"✅ Successfully updated {success_count} samples!")
                     
@@ -457,7 +428,7 @@ with functionality[4]:  # View File tab
         st.write("📂 Viewing Files in:", st.session_state.selected_folder_VIEW)
 
         folder_path = Path(BASE_FOLDER,st.session_state.selected_folder_VIEW)
-        files = [file.name for file in folder_path.iterdir() if file.is_file() and file.suffix == ".json"]
+        files = list_files(folder_path, "json")
 
         if files:
             selected_file = st.selectbox("Select a file", files, key="view_file")
@@ -466,10 +437,10 @@ with functionality[4]:  # View File tab
                 file_path = folder_path / selected_file
 
                 try:
-                    with open(file_path, "r") as f:
-                        data = json.load(f)
-                        st.json(data)  # Display JSON in a readable format
-                except json.JSONDecodeError:
+                    # Parsed once per file version and shared by every session
+                    data = dataset_cache.load_json(file_path)
+                    st.json(data)  # Display JSON in a readable format
+                except jsonl_codec.JSONDecodeError:
                     st.error("❌ Invalid JSON file. Cannot display content.")
                 except Exception as e:
                     st.error(f"⚠️ Error opening file: {e}")
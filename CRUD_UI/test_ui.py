@@ -1,20 +1,23 @@
 import streamlit as st
 from pathlib import Path
 import os
-from datetime import datetime
-import json
 import time
-import shutil
+import jsonl_codec
+from json_editor import JSONLFileEditor
+from dir_catalog import catalog
+from operations import runner, track_operation, render_operations
+from trash import get_trash
+from file_actions import describe_delete, describe_upload, move_to_delete_folder, save_json_uploads
+from dataset_cache import dataset_cache
+from jsonl_lint import MAX_ISSUES, iter_issues, lint_folders
 
 def list_folders(base_folder):
     """List all folders inside the base directory."""
-    base = Path(base_folder)
-    return [folder.name for folder in base.iterdir() if folder.is_dir()]
+    return catalog.list_folders(base_folder)
 
 def list_files(folder_path, file_type):
     """List files of the given type in the folder."""
-    folder = Path(folder_path)
-    return [file.name for file in folder.glob(f"*.{file_type}")]
+    return catalog.list_files(folder_path, file_type)
 
 BASE_FOLDER = "./data"  # Change this to your actual base folder
 BASE_FOLDER_DELETE = "./delete_groundtruth"
@@ -26,17 +29,19 @@ st.set_page_config(
 )
 st.title("File Manager")
 
-def move_to_delete_folder(base_folder, base_folder_delete,selected_folder, files_to_delete):
-    
-    delete_folder = Path(base_folder_delete) / selected_folder 
-    delete_folder.mkdir(parents=True, exist_ok=True)  # Ensure the delete folder exists
-
-    for file in files_to_delete:
-        src_path = Path(base_folder) / selected_folder / file
-        dest_path =delete_folder / file
+def describe_restore(op):
+    """Success message for a finished restore operation."""
+    restored, errors = op.result
+    message = f"{len(restored)} file(s) restored successfully"
+    if errors:
+        message += f" — skipped: {'; '.join(errors)}"
+    return message
 
-        if src_path.exists():
-            shutil.move(src_path, dest_path)
+def describe_lint(op):
+    """Success message for a finished lint operation."""
+    reports = op.result["files"].values()
+    issues = sum(report["issue_count"] for report in reports)
+    return f"Linted {len(reports)} file(s): {issues} issue(s), {op.result['cached']} file(s) unchanged since the last lint"
 
 
 # Session state initialization
@@ -45,6 +50,9 @@ if "add_file_key" not in st.session_state or "delete_file_key" not in st.session
     st.session_state.delete_file_key = 0
     st.session_state.update_file_key = 0
 
+if "restore_file_key" not in st.session_state:
+    st.session_state.restore_file_key = 0
+
 if 'save_name' not in st.session_state:
     st.session_state.save_name = ""
 
@@ -67,7 +75,7 @@ if "select_update_sample" not in st.session_state:
 
 st.write(f"Current File Key: {st.session_state.add_file_key}")
 
-functionality = st.tabs(["Add File", "Delete File", "Update File","restore File","view File"])
+functionality = st.tabs(["Add File", "Delete File", "Update File","restore File","view File","Lint Files"])
 
 def sleep_after(seconds):
     time.sleep(seconds)
@@ -86,29 +94,16 @@ with functionality[0]:
 
         with col1:
             if st.button("Add Files"):
-                for uploaded_file in uploaded_files:
-                    timestamp = datetime.now().strftime("%Y-%m-%d-%H-%M-%S")
-                    save_filename = f"{st.session_state.selected_folder_ADD}-{timestamp}-{uploaded_file.name}"
-                    save_path = Path(BASE_FOLDER) / st.session_state.selected_folder_ADD / save_filename
-
-                    # Progress bar
-                    progress_bar = st.progress(0)
-
-                    with st.spinner(f"Uploading {uploaded_file.name}..."):
-                        for percent_complete in range(1, 101):
-                            time.sleep(0.01)  # Simulate upload time
-                            progress_bar.progress(percent_complete)
-
-                    try:
-                        json_data = json.load(uploaded_file)
-
-                        with open(save_path, "w") as f:
-                            json.dump(json_data, f, indent=4)
-
-                        st.success(f"✅ File '{save_filename}' uploaded successfully!")
-
-                    except json.JSONDecodeError:
-                        st.error(f"❌ Invalid JSON file: {uploaded_file.name}. Please upload a valid JSON file.")
+                # Validate and save in the background; progress is shown below
+                op = runner.submit(
+                    f"Add {len(uploaded_files)} file(s) to {st.session_state.selected_folder_ADD}",
+                    save_json_uploads,
+                    BASE_FOLDER, st.session_state.selected_folder_ADD, uploaded_files,
+                    total=len(uploaded_files),
+                    unit="files",
+                    key=Path(BASE_FOLDER, st.session_state.selected_folder_ADD)
+                )
+                track_operation("add_operations", op)
 
                 # Reset uploader
                 st.session_state.add_file_key += 1
@@ -158,6 +153,7 @@ with functionality[0]:
             # st.rerun()
         # st.session_state.upload_status = "not_uploaded"
 
+    render_operations("add_operations", success_message=describe_upload)
 
 
 
@@ -173,31 +169,28 @@ with functionality[1]:
         files = list_files(Path(BASE_FOLDER, st.session_state.selected_folder_DELETE), "json")
 
         if files:
-            delete_file = st.multiselect("Select file(s) to delete", files, key="delete_file")
+            delete_file = st.multiselect("Select file(s) to delete", files, key=f"delete_file_{st.session_state.delete_file_key}")
 
             if delete_file:
                 if st.button("Delete Selected Files"):
-                                    # Progress bar
-                    progress_bar = st.progress(0)
-
-                    with st.spinner("Files are being deleted..."):
-                        for percent_complete in range(1, 101):
-                            time.sleep(0.01)  # Simulate upload time
-                        progress_bar.progress(percent_complete)
-                        
-                    move_to_delete_folder(BASE_FOLDER, BASE_FOLDER_DELETE,st.session_state.selected_folder_DELETE, delete_file)
-                    st.session_state.delete_status = True
-                    st.success(f"✅ Files deleted successfully - {len(delete_file)} ")
-                    # st.rerun()
+                    # Move the files in the background; progress is shown below
+                    op = runner.submit(
+                        f"Delete {len(delete_file)} file(s) from {st.session_state.selected_folder_DELETE}",
+                        move_to_delete_folder,
+                        BASE_FOLDER, BASE_FOLDER_DELETE, st.session_state.selected_folder_DELETE, delete_file,
+                        total=len(delete_file),
+                        unit="files",
+                        key=Path(BASE_FOLDER, st.session_state.selected_folder_DELETE)
+                    )
+                    track_operation("delete_operations", op)
+                    st.session_state.delete_file_key += 1
+                    st.rerun()
             else:
                 st.warning("⚠️ No files selected for deletion.")
         else:
             st.info("No files available for deletion.")
         
-    if st.session_state.delete_status:
-        st.success(f"✅ Files deleted successfully - {len(delete_file)} ")
-        st.session_state.delete_status = False
-        st.rerun()
+    render_operations("delete_operations", success_message=describe_delete)
         
         
 
@@ -427,246 +420,48 @@ with functionality[1]:
                         
 
 with functionality[2]:
-    update_column = st.columns([1,1,1])
-    with update_column[0]:
-        st.session_state.selected_folder_UPDATE = st.selectbox("Select a folder", folders, key="update_folder")
-        st.write("📂 Updating Files in:", st.session_state.selected_folder_UPDATE)
-    with update_column[1]:
-        # List JSONL files in the selected folder
-        if st.session_state.selected_folder_UPDATE:
-            files = list_files(Path(BASE_FOLDER, st.session_state.selected_folder_UPDATE), "jsonl")
-            if files:
-                st.session_state.selected_file_update = st.selectbox("Select a file", files, key="update_file")
-                if st.session_state.selected_file_update:
-                    selected_file_for_update = Path(BASE_FOLDER, st.session_state.selected_folder_UPDATE, st.session_state.selected_file_update)
-                    st.write("📄 Selected file:", st.session_state.selected_file_update)
-            else:
-                st.warning("⚠️ No JSONL files found in this folder.")
-   
-    with update_column[2]:
-        try:
-            # Load JSONL file line by line
-            data = []
-            with open(selected_file_for_update, "r") as f:
-                for line in f:
-                    line = line.strip()
-                    if line:  # Skip empty lines
-                        data.append(json.loads(line))
-        except Exception as e:
-            st.error(f"⚠️ Error opening file: {e}")
-            data = None
-
-        if data:
-            # Create a key to track the multiselect's previous value
-            if 'previous_samples' not in st.session_state:
-                st.session_state.previous_samples = []
-                
-            # Create a dictionary with preview for each item to display in multiselect
-            display_options = []
-            for i, item in enumerate(data):
-                # Create a preview string (showing first few keys and values)
-                preview = {}
-                keys_to_show = list(item.keys())[:3]  # Show first 3 keys
-                for key in keys_to_show:
-                    preview[key] = item[key]
-                
-                # Store both the index and preview
-                display_options.append({
-                    "index": i,
-                    "preview": str(preview),
-                    "original": item
-                })
-            
-            # Use the preview string for display but keep track of the original object and index
-            current_selection = st.multiselect(
-                "Select a sample to update", 
-                options=display_options,
-                format_func=lambda x: f"Line {x['index']}: {x['preview']}",
-                key="update_sample"
-            )
-            
-            # Update our session state with the selection
-            st.session_state.select_update_sample = current_selection
-            
-            # Check if the selection has changed
-            if st.session_state.previous_samples != current_selection:
-                # Clear the edited values when selection changes
-                if 'edited_jsonl_values' in st.session_state:
-                    st.session_state.edited_jsonl_values = {}
-                # Update the previous samples tracker
-                st.session_state.previous_samples = current_selection
-
-    # Initialize container for edited values if it doesn't exist
-    if 'edited_jsonl_values' not in st.session_state:
-        st.session_state.edited_jsonl_values = {}
-
-    # Initialize deletion confirmation state
-    if 'delete_confirmation' not in st.session_state:
-        st.session_state.delete_confirmation = {}
-
-    # Check if any sample is selected for update
-    if st.session_state.select_update_sample:
-        for idx, sample_info in enumerate(st.session_state.select_update_sample):
-            # Use the line index as a unique identifier
-            sample_id = str(sample_info["index"])
-            sample = sample_info["original"]
-            sample_key = f"jsonl_edit_{sample_id}"
-            delete_key = f"delete_confirm_{sample_id}"
-            
-            st.write(f"📝 Updating Line {sample_id}")
-            
-            # Initialize this sample's edited value if not already set
-            if sample_key not in st.session_state.edited_jsonl_values:
-                st.session_state.edited_jsonl_values[sample_key] = json.dumps(sample, indent=4)
-            
-            # Initialize delete confirmation state for this sample
-            if delete_key not in st.session_state.delete_confirmation:
-                st.session_state.delete_confirmation[delete_key] = False
-            
-            with st.expander(f"Updating Line {sample_id}"):
-                # Display the original JSON sample
-                st.subheader("Original JSON:")
-                st.json(sample)
-                
-                # Create a text area for editing and store the edits in session state
-                st.subheader("Edit JSON:")
-                edited_json = st.text_area(
-                    "Make your changes below:",
-                    value=st.session_state.edited_jsonl_values[sample_key],
-                    height=400,
-                    key=sample_key
-                )
-                
-                # Update the session state with the edited value
-                st.session_state.edited_jsonl_values[sample_key] = edited_json
-                
-                # Create columns for buttons
-                col1, col2, col3 = st.columns([1, 1, 1])
-                
-                # Save button in first column
-                with col1:
-                    if st.button(f"Save Changes", key=f"save_btn_{sample_id}"):
-                        try:
-                            # Parse the edited JSON to validate it
-                            updated_sample = json.loads(edited_json)
-                            
-                            # Update data at the specific line
-                            original_index = int(sample_id)
-                            data[original_index] = updated_sample
-                            
-                            # Save the entire updated data back to the file
-                            with open(selected_file_for_update, "w") as f:
-                                for item in data:
-                                    f.write(json.dumps(item) + "\n")
-                            
-                            st.success(f"✅ Line {sample_id} updated successfully!")
-                            
-                            # Clear the edited values to force refresh on next load
-                            st.session_state.edited_jsonl_values = {}
-                            
-                            # Refresh the page to show the updated data
-                            st.rerun()
-                        except json.JSONDecodeError as e:
-                            st.error(f"❌ Invalid JSON format: {e}")
-                        except Exception as e:
-                            st.error(f"❌ Error saving changes: {e}")
-                
-                # Delete button and confirmation in second and third columns
-                with col2:
-                    if not st.session_state.delete_confirmation[delete_key]:
-                        if st.button(f"Delete Line", key=f"delete_btn_{sample_id}"):
-                            st.session_state.delete_confirmation[delete_key] = True
-                
-                with col3:
-                    if st.session_state.delete_confirmation[delete_key]:
-                        st.warning("Are you sure you want to delete this line?")
-                        
-                        confirm_col, cancel_col = st.columns(2)
-                        
-                        with confirm_col:
-                            if st.button("Yes, Delete", key=f"confirm_delete_{sample_id}", type="primary"):
-                                try:
-                                    # Remove the item at the specific index
-                                    original_index = int(sample_id)
-                                    del data[original_index]
-                                    
-                                    # Save the updated data back to the file
-                                    with open(selected_file_for_update, "w") as f:
-                                        for item in data:
-                                            f.write(json.dumps(item) + "\n")
-                                    
-                                    st.success(f"✅ Line {sample_id} deleted successfully!")
-                                    
-                                    # Reset confirmation state
-                                    st.session_state.delete_confirmation = {}
-                                    
-                                    # Clear the edited values to force refresh on next load
-                                    st.session_state.edited_jsonl_values = {}
-                                    
-                                    # Refresh the page to show updated data
-                                    st.rerun()
-                                except Exception as e:
-                                    st.error(f"❌ Error deleting line: {e}")
-                        
-                        with cancel_col:
-                            if st.button("Cancel", key=f"cancel_delete_{sample_id}"):
-                                st.session_state.delete_confirmation[delete_key] = False
-                                st.rerun()
-
-    # Add a button to save all changes at once (optional)
-    if st.session_state.select_update_sample and len(st.session_state.select_update_sample) > 1:
-        if st.button("Save All Changes", key="save_all_btn"):
-            success_count = 0
-            error_messages = []
-            
-            for sample_info in st.session_state.select_update_sample:
-                sample_id = str(sample_info["index"])
-                sample_key = f"jsonl_edit_{sample_id}"
-                edited_json = st.session_state.edited_jsonl_values.get(sample_key)
-                
-                if edited_json:
-                    try:
-                        # Parse the edited JSON
-                        updated_sample = json.loads(edited_json)
-                        
-                        # Update at the specific index
-                        original_index = int(sample_id)
-                        data[original_index] = updated_sample
-                        success_count += 1
-                    except Exception as e:
-                        error_messages.append(f"Error with Line {sample_id}: {str(e)}")
-            
-            if success_count > 0:
-                try:
-                    # Save all updates to the file
-                    with open(selected_file_for_update, "w") as f:
-                        for item in data:
-                            f.write(json.dumps(item) + "\n")
-                    
-                    st.success(f"✅ Successfully updated {success_count} samples!")
-                    
-                    if error_messages:
-                        st.warning("Some samples had errors:")
-                        for msg in error_messages:
-                            st.write(msg)
-                    
-                    # Clear the edited values to force refresh on next load
-                    st.session_state.edited_jsonl_values = {}
-                    
-                    # Refresh to show updated data
-                    st.rerun()
-                except Exception as e:
-                    st.error(f"❌ Error saving to file: {e}")
-            elif error_messages:
-                st.error("❌ No samples were updated due to errors.")
-                for msg in error_messages:
-                    st.write(msg)
+    # Paged browsing, search and journaled saves are shared with the standalone editor
+    JSONLFileEditor(BASE_FOLDER).run()
 
 
 
 
 
-# with functionality[3]:
+with functionality[3]:
+    trash = get_trash(BASE_FOLDER, BASE_FOLDER_DELETE)
+    trashed_folders = sorted({entry["folder"] for entry in trash.entries()})
+
+    if trashed_folders:
+        restore_folder = st.selectbox("Select a folder", trashed_folders, key="restore_folder")
+        st.write("📂 Restoring Files to:", restore_folder)
+
+        # Entries come from the trash manifest, so no directory scan is needed
+        trashed = {entry["id"]: entry for entry in trash.entries(restore_folder)}
+        restore_ids = st.multiselect(
+            "Select file(s) to restore",
+            list(trashed),
+            format_func=lambda entry_id: f"{trashed[entry_id]['name']} (deleted {trashed[entry_id]['timestamp']})",
+            key=f"restore_file_{st.session_state.restore_file_key}"
+        )
+
+        if restore_ids:
+            if st.button("Restore Selected Files"):
+                op = runner.submit(
+                    f"Restore {len(restore_ids)} file(s) to {restore_folder}",
+                    trash.restore,
+                    restore_ids,
+                    total=len(restore_ids),
+                    unit="files",
+                    key=Path(BASE_FOLDER, restore_folder)
+                )
+                track_operation("restore_operations", op)
+                st.session_state.restore_file_key += 1
+                st.rerun()
+    else:
+        st.info("No deleted files to restore.")
+
+    render_operations("restore_operations", success_message=describe_restore)
+
         
             
             
@@ -697,7 +492,7 @@ with functionality[4]:  # View File tab
         st.write("📂 Viewing Files in:", st.session_state.selected_folder_VIEW)
 
         folder_path = Path(BASE_FOLDER,st.session_state.selected_folder_VIEW)
-        files = [file.name for file in folder_path.iterdir() if file.is_file() and file.suffix == ".json"]
+        files = list_files(folder_path, "json")
 
         if files:
             selected_file = st.selectbox("Select a file", files, key="view_file")
@@ -706,21 +501,50 @@ with functionality[4]:  # View File tab
                 file_path = folder_path / selected_file
 
                 try:
-                    with open(file_path, "r") as f:
-                        data = json.load(f)
-                        st.json(data)  # Display JSON in a readable format
-                except json.JSONDecodeError:
+                    # Parsed once per file version and shared by every session
+                    data = dataset_cache.load_json(file_path)
+                    st.json(data)  # Display JSON in a readable format
+                except jsonl_codec.JSONDecodeError:
                     st.error("❌ Invalid JSON file. Cannot display content.")
                 except Exception as e:
                     st.error(f"⚠️ Error opening file: {e}")
 
         else:
             st.warning("⚠️ No JSON files found in this folder.")
-        
 
-    
-    
-        
-    
-    
-        
+
+with functionality[5]:
+    lint_selection = st.multiselect("Select folder(s) to lint", folders, default=folders, key="lint_folders")
+
+    if st.button("Lint Files", disabled=not lint_selection):
+        # Files are checked in worker processes; unchanged files come from the lint cache
+        op = runner.submit(
+            f"Lint {len(lint_selection)} folder(s)",
+            lint_folders,
+            BASE_FOLDER,
+            lint_selection,
+            unit="files"
+        )
+        track_operation("lint_operations", op)
+        st.session_state.lint_op = op.id
+        st.rerun()
+
+    render_operations("lint_operations", success_message=describe_lint)
+
+    lint_op = runner.get(st.session_state.get("lint_op"))
+    if lint_op is not None and lint_op.status == "done":
+        reports = lint_op.result["files"]
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Files", len(reports))
+        col2.metric("Records", f"{sum(report['records'] for report in reports.values()):,}")
+        col3.metric("Issues", f"{sum(report['issue_count'] for report in reports.values()):,}")
+
+        st.dataframe(
+            [{"file": name, "records": report["records"], "issues": report["issue_count"]} for name, report in reports.items()]
+        )
+        issues = list(iter_issues(lint_op.result))
+        if issues:
+            st.write(f"Issues (the first {MAX_ISSUES} of each file); \"record\" is the line number to jump to in the editor:")
+            st.dataframe(issues, column_order=["file", "record", "line", "field", "code", "message"])
+        else:
+            st.success("✅ All records match the RAG schema.")
@@ -0,0 +1,68 @@
+import os
+
+import jsonl_codec
+from dataset_cache import DatasetCache, PARSED_SIZE_FACTOR
+from jsonl_index import JSONLIndex
+
+
+def write_jsonl(path, records):
+    path.write_bytes(b"".join(jsonl_codec.dump_line(record) for record in records))
+    return JSONLIndex.open(path)
+
+
+def test_lines_are_read_from_disk_once(tmp_path):
+    cache = DatasetCache()
+    index = write_jsonl(tmp_path / "data.jsonl", [{"i": i} for i in range(4)])
+
+    assert cache.read_records(index, [1, 2]) == {1: {"i": 1}, 2: {"i": 2}}
+    assert (cache.hits, cache.misses) == (0, 2)
+    assert cache.read_records(index, [2, 3]) == {2: {"i": 2}, 3: {"i": 3}}
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_records_are_decoded_per_caller(tmp_path):
+    cache = DatasetCache()
+    index = write_jsonl(tmp_path / "data.jsonl", [{"i": 0}])
+
+    cache.read_records(index, [0])[0]["i"] = "changed"
+    assert cache.read_records(index, [0]) == {0: {"i": 0}}
+
+
+def test_changed_file_is_read_again(tmp_path):
+    cache = DatasetCache()
+    path = tmp_path / "data.jsonl"
+    index = write_jsonl(path, [{"i": 0}])
+    cache.read_records(index, [0])
+
+    index = write_jsonl(path, [{"i": "new"}, {"i": 1}])
+    os.utime(path, ns=(index.mtime_ns + 1, index.mtime_ns + 1))
+    index.refresh()
+    assert cache.read_records(index, [0]) == {0: {"i": "new"}}
+
+
+def test_least_recently_used_file_is_evicted(tmp_path):
+    first, second = tmp_path / "first.json", tmp_path / "second.json"
+    for path in (first, second):
+        path.write_bytes(jsonl_codec.dumpb({"data": "x" * 100}))
+    cache = DatasetCache(max_bytes=first.stat().st_size * PARSED_SIZE_FACTOR * 3 // 2)
+
+    cache.load_json(first)
+    cache.load_json(second)
+    assert cache.total_bytes <= cache.max_bytes
+
+    cache.load_json(second)
+    assert cache.hits == 1
+    cache.load_json(first)
+    assert cache.misses == 3
+
+
+def test_invalidate_drops_the_entry(tmp_path):
+    cache = DatasetCache()
+    path = tmp_path / "data.json"
+    path.write_bytes(b'{"a": 1}')
+    cache.load_json(path)
+
+    cache.invalidate(path)
+    assert cache.total_bytes == 0
+    cache.load_json(path)
+    assert cache.misses == 2
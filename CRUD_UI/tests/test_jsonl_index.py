@@ -0,0 +1,40 @@
+import pytest
+
+import jsonl_codec
+import jsonl_index
+from jsonl_index import JSONLIndex
+
+
+@pytest.fixture
+def jsonl_file(tmp_path):
+    path = tmp_path / "data.jsonl"
+    path.write_bytes(b'{"i": 0}\n\n{"i": 1}\r\n{"i": 2}')
+    return path
+
+
+def test_blank_lines_are_not_records(jsonl_file):
+    index = JSONLIndex.open(jsonl_file)
+    assert len(index) == 3
+    assert list(index) == [{"i": 0}, {"i": 1}, {"i": 2}]
+
+
+def test_appends_are_indexed_from_the_sidecar(jsonl_file):
+    JSONLIndex.open(jsonl_file)
+    with open(jsonl_file, "ab") as f:
+        f.write(b'\n{"i": 3}\n')
+
+    index = JSONLIndex.open(jsonl_file)
+    assert len(index) == 4
+    assert index[3] == {"i": 3}
+
+
+@pytest.mark.parametrize("header", [
+    b"[1, 2]\n",
+    b"not json\n",
+    jsonl_codec.dump_line({"version": jsonl_index.INDEX_VERSION, "count": 0}),
+])
+def test_corrupt_sidecar_is_rebuilt(jsonl_file, header):
+    index = JSONLIndex.open(jsonl_file)
+    index.index_path.write_bytes(header)
+
+    assert list(JSONLIndex.open(jsonl_file)) == [{"i": 0}, {"i": 1}, {"i": 2}]
@@ -0,0 +1,161 @@
+import pytest
+
+import jsonl_codec
+import jsonl_patch
+from jsonl_patch import JSONLPatcher
+
+
+@pytest.fixture(autouse=True)
+def no_background_compaction(monkeypatch):
+    # Tests compact explicitly, so a save never races a timer thread
+    monkeypatch.setattr(jsonl_patch, "COMPACT_DELAY", 3600)
+
+
+@pytest.fixture
+def jsonl_file(tmp_path):
+    path = tmp_path / "data.jsonl"
+    path.write_bytes(b"".join(jsonl_codec.dump_line({"i": i}) for i in range(6)))
+    return path
+
+
+def read_file(path):
+    return [jsonl_codec.loads(line) for line in path.read_bytes().splitlines()]
+
+
+class Crash(Exception):
+    pass
+
+
+def test_journaled_edits_survive_reopening(jsonl_file):
+    patcher = JSONLPatcher(jsonl_file)
+    patcher.save({1: {"i": "one"}})
+    patcher.delete([4])
+    patcher.cancel_compaction()
+
+    records = JSONLPatcher(jsonl_file).records()
+    assert records[1] == {"i": "one"}
+    assert records.is_deleted(4)
+    assert read_file(jsonl_file) == [{"i": i} for i in range(6)]
+
+
+def test_compact_writes_the_journal_into_the_file(jsonl_file):
+    patcher = JSONLPatcher(jsonl_file)
+    patcher.save({1: {"i": "one"}})
+    patcher.delete([4])
+    patcher.compact()
+
+    assert read_file(jsonl_file) == [{"i": 0}, {"i": "one"}, {"i": 2}, {"i": 3}, {"i": 5}]
+    assert not patcher.journal_path.exists()
+    assert not patcher.compact_path.exists()
+
+
+def test_recover_installs_a_compaction_interrupted_after_it_was_complete(jsonl_file, monkeypatch):
+    patcher = JSONLPatcher(jsonl_file)
+    patcher.save({2: {"i": "two"}})
+
+    def crash(self):
+        raise Crash()
+
+    monkeypatch.setattr(JSONLPatcher, "_install_compacted", crash)
+    with pytest.raises(Crash):
+        patcher.compact()
+    monkeypatch.undo()
+    assert patcher.compact_meta_path.exists()
+
+    recovered = JSONLPatcher(jsonl_file)
+    assert read_file(jsonl_file)[2] == {"i": "two"}
+    assert recovered.pending() == {}
+    assert not recovered.compact_path.exists()
+    assert not recovered.compact_meta_path.exists()
+
+
+def test_recover_drops_an_incomplete_compaction_and_keeps_the_journal(jsonl_file, monkeypatch):
+    patcher = JSONLPatcher(jsonl_file)
+    patcher.save({2: {"i": "two"}})
+
+    def crash(self, path, obj):
+        raise Crash()
+
+    monkeypatch.setattr(JSONLPatcher, "_write_json", crash)
+    with pytest.raises(Crash):
+        patcher.compact()
+    monkeypatch.undo()
+    assert patcher.compact_path.exists()
+
+    recovered = JSONLPatcher(jsonl_file)
+    assert not recovered.compact_path.exists()
+    assert read_file(jsonl_file) == [{"i": i} for i in range(6)]
+    assert recovered.records()[2] == {"i": "two"}
+
+
+def test_torn_journal_line_is_ignored(jsonl_file):
+    patcher = JSONLPatcher(jsonl_file)
+    patcher.save({1: {"i": "one"}})
+    patcher.cancel_compaction()
+    with open(patcher.journal_path, "ab") as f:
+        f.write(b'{"op": "set", "line": 3, "rec')
+
+    assert JSONLPatcher(jsonl_file).pending() == {1: {"i": "one"}}
+
+
+def test_journal_of_a_file_rewritten_outside_is_set_aside(jsonl_file):
+    patcher = JSONLPatcher(jsonl_file)
+    patcher.save({1: {"i": "one"}})
+    patcher.cancel_compaction()
+    jsonl_file.write_bytes(jsonl_codec.dump_line({"other": True}))
+
+    assert patcher.pending() == {}
+    assert [count for _, count in patcher.stale_journals()] == [1]
+    patcher.discard_stale_journals()
+    assert patcher.stale_journals() == []
+
+
+def test_save_made_before_a_compaction_lands_on_the_shifted_line(jsonl_file):
+    patcher = JSONLPatcher(jsonl_file)
+    before = patcher.records()
+    versions = before.versions([4])
+
+    patcher.delete([1])
+    patcher.compact()
+    assert patcher.records().generation == before.generation + 1
+
+    result = patcher.save({4: {"i": "four"}}, versions)
+    assert result.saved == [4] and result.conflicts == {}
+    patcher.compact()
+    assert read_file(jsonl_file) == [{"i": 0}, {"i": 2}, {"i": 3}, {"i": "four"}, {"i": 5}]
+
+
+def test_save_of_a_line_removed_by_a_compaction_conflicts(jsonl_file):
+    patcher = JSONLPatcher(jsonl_file)
+    versions = patcher.records().versions([1])
+
+    patcher.delete([1])
+    patcher.compact()
+
+    result = patcher.save({1: {"i": "one"}}, versions)
+    assert result.saved == []
+    assert result.conflicts == {1: None}
+
+
+def test_save_of_a_changed_line_conflicts(jsonl_file):
+    patcher = JSONLPatcher(jsonl_file)
+    versions = patcher.records().versions([2])
+    patcher.save({2: {"i": "theirs"}})
+
+    result = patcher.save({2: {"i": "mine"}}, versions)
+    assert result.saved == []
+    assert list(result.conflicts) == [2]
+    assert patcher.records()[2] == {"i": "theirs"}
+
+
+def test_remap_lines_follows_every_later_compaction(jsonl_file):
+    patcher = JSONLPatcher(jsonl_file)
+    generation = patcher.records().generation
+
+    patcher.delete([0])
+    patcher.compact()
+    patcher.delete([2])  # Line 3 of the original file
+    patcher.compact()
+
+    assert patcher.remap_lines([0, 1, 3, 5], generation) == {1: 0, 5: 3}
+    assert patcher.remap_lines([1], generation + 1) == {1: 1}
@@ -0,0 +1,37 @@
+from record_count import count_records, iter_record_counts
+
+
+def test_counts_last_line_without_newline(tmp_path):
+    path = tmp_path / "data.jsonl"
+    path.write_bytes(b'{"a": 1}\n{"a": 2}')
+    assert count_records(path) == 2
+
+    path.write_bytes(b'{"a": 1}\n{"a": 2}\n')
+    assert count_records(path) == 2
+
+
+def test_counts_appends_after_a_cached_count(tmp_path):
+    path = tmp_path / "data.jsonl"
+    path.write_bytes(b'{"a": 1}\n' * 3)
+    assert count_records(path) == 3
+
+    with open(path, "ab") as f:
+        f.write(b'{"a": 2}\n' * 2)
+    assert count_records(path) == 5
+
+
+def test_recounts_a_rewritten_file(tmp_path):
+    path = tmp_path / "data.jsonl"
+    path.write_bytes(b'{"a": 1}\n' * 3)
+    assert count_records(path) == 3
+
+    path.write_bytes(b'{"b": 22}\n' * 4)
+    assert count_records(path) == 4
+
+
+def test_iter_record_counts_reports_missing_files(tmp_path):
+    path = tmp_path / "data.jsonl"
+    path.write_bytes(b'{"a": 1}\n')
+    counts = dict(iter_record_counts([path, tmp_path / "missing.jsonl"]))
+    assert counts[path] == 1
+    assert isinstance(counts[tmp_path / "missing.jsonl"], OSError)
@@ -0,0 +1,275 @@
+import errno
+import hashlib
+import logging
+import os
+import shutil
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+import jsonl_codec
+from dir_catalog import catalog
+from dataset_cache import dataset_cache
+
+MANIFEST_NAME = "manifest.jsonl"
+HASH_CHUNK_SIZE = 1 << 20
+MAX_WORKERS = 8
+
+_trashes = {}
+_trashes_lock = threading.Lock()
+logger = logging.getLogger(__name__)
+
+
+def get_trash(base_folder, trash_folder):
+    """
+    Return the process-wide Trash for a base folder and its delete folder
+
+    Args:
+        base_folder (str or Path): Folder files are deleted from
+        trash_folder (str or Path): Folder deleted files are moved to
+
+    Returns:
+        Trash: Shared trash instance
+    """
+    key = (Path(base_folder).resolve(), Path(trash_folder).resolve())
+    with _trashes_lock:
+        if key not in _trashes:
+            _trashes[key] = Trash(*key)
+        return _trashes[key]
+
+
+def file_checksum(path):
+    """Return the SHA-256 hex digest of a file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _checksum_or_error(path):
+    try:
+        return file_checksum(path), None
+    except OSError as e:
+        return None, str(e)
+
+
+class Trash:
+    def __init__(self, base_folder, trash_folder):
+        """
+        Recoverable deletes with a manifest of where every file came from
+
+        Deleted files are moved under ``trash_folder/<folder>/`` and recorded
+        in an append-only ``manifest.jsonl`` with their origin, timestamp,
+        size and checksum. The manifest is kept indexed in memory, so a
+        restore is a lookup by id rather than a scan of the trash folder.
+
+        Args:
+            base_folder (Path): Folder files are deleted from
+            trash_folder (Path): Folder deleted files are moved to
+        """
+        self.base_folder = Path(base_folder)
+        self.trash_folder = Path(trash_folder)
+        self.manifest_path = self.trash_folder / MANIFEST_NAME
+        self._entries = {}  # id -> manifest entry of files currently in the trash
+        self._manifest_offset = 0
+        self._lock = threading.Lock()
+
+    def entries(self, folder=None):
+        """
+        List the files currently in the trash, newest first
+
+        Args:
+            folder (str, optional): Only list files deleted from this folder
+
+        Returns:
+            list: Manifest entries
+        """
+        with self._lock:
+            self._load_manifest()
+            entries = [e for e in self._entries.values() if folder is None or e["folder"] == folder]
+        return sorted(entries, key=lambda e: e["timestamp"], reverse=True)
+
+    def move(self, folder, files, progress=None):
+        """
+        Move a selection of files from a folder into the trash in one operation
+
+        Files are renamed when the trash is on the same filesystem and copied
+        by a thread pool otherwise. Checksums are computed in parallel, and
+        each file is recorded in the manifest as soon as it has moved, so a
+        failure part way leaves every trashed file restorable.
+
+        Args:
+            folder (str): Folder under the base folder
+            files (list): File names to delete
+            progress (callable, optional): Called as progress(done, total)
+
+        Returns:
+            tuple: (manifest entries of the moved files, list of error messages)
+        """
+        source_folder = self.base_folder / folder
+        target_folder = self.trash_folder / folder
+        target_folder.mkdir(parents=True, exist_ok=True)
+        sources = [source_folder / name for name in files if (source_folder / name).exists()]
+
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+            checksums = list(pool.map(file_checksum, sources))
+
+            with self._lock:
+                self._load_manifest()
+                timestamp = datetime.now().isoformat(timespec="seconds")
+                entries = []
+                for src_path, checksum in zip(sources, checksums):
+                    entry_id = uuid.uuid4().hex[:12]
+                    entries.append({
+                        "op": "trash",
+                        "id": entry_id,
+                        "folder": folder,
+                        "name": src_path.name,
+                        "trashed_name": self._free_name(target_folder, src_path.name, entry_id),
+                        "timestamp": timestamp,
+                        "size": src_path.stat().st_size,
+                        "sha256": checksum,
+                    })
+
+                moves = [(src, target_folder / e["trashed_name"], e) for src, e in zip(sources, entries)]
+                moved, errors = self._move_all(pool, moves, progress)
+
+        catalog.invalidate(source_folder)
+        for src_path in sources:
+            dataset_cache.invalidate(src_path)
+        return moved, errors
+
+    def restore(self, entry_ids, progress=None):
+        """
+        Move trashed files back to where they were deleted from
+
+        Files whose original name has been taken again, or whose content no
+        longer matches the checksum recorded when they were trashed, are left
+        in the trash.
+
+        Args:
+            entry_ids (list): Manifest entry ids to restore
+            progress (callable, optional): Called as progress(done, total)
+
+        Returns:
+            tuple: (restored entries, list of error messages)
+        """
+        with self._lock:
+            self._load_manifest()
+            errors, moves = [], []
+            for entry_id in entry_ids:
+                entry = self._entries.get(entry_id)
+                if entry is None:
+                    errors.append(f"{entry_id} is not in the trash")
+                    continue
+                dest_path = self.base_folder / entry["folder"] / entry["name"]
+                if dest_path.exists():
+                    errors.append(f"{entry['folder']}/{entry['name']} already exists")
+                    continue
+                dest_path.parent.mkdir(parents=True, exist_ok=True)
+                moves.append((self.trash_folder / entry["folder"] / entry["trashed_name"], dest_path, entry))
+
+            with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+                checksums = list(pool.map(_checksum_or_error, [src for src, _, _ in moves]))
+                verified = []
+                for (src, dst, entry), (checksum, error) in zip(moves, checksums):
+                    if error is None and checksum != entry["sha256"]:
+                        error = "content changed in the trash, checksum does not match"
+                    if error is not None:
+                        errors.append(f"{entry['folder']}/{entry['name']}: {error}")
+                        continue
+                    verified.append((src, dst, entry))
+                restored, move_errors = self._move_all(pool, verified, progress, op="restore")
+            errors.extend(move_errors)
+
+        for folder in {e["folder"] for e in restored}:
+            catalog.invalidate(self.base_folder / folder)
+        return restored, errors
+
+    def _free_name(self, target_folder, name, entry_id):
+        # Keep the original name unless an earlier delete already used it
+        if not (target_folder / name).exists() and not any(
+            e["folder"] == target_folder.name and e["trashed_name"] == name for e in self._entries.values()
+        ):
+            return name
+        path = Path(name)
+        return f"{path.stem}.{entry_id}{path.suffix}"
+
+    def _move_all(self, pool, moves, progress, op="trash"):
+        # Same-filesystem renames are instant; only cross-device copies go to the pool.
+        # Each (src, dst, entry) is journaled right after its file moved; failures are collected.
+        moved, errors, copies = [], [], {}
+
+        def finished(entry):
+            record = entry if op == "trash" else {"op": op, "id": entry["id"]}
+            self._append_manifest([record])
+            moved.append(entry)
+            if progress is not None:
+                progress(len(moved) + len(errors), len(moves))
+
+        def failed(src, e):
+            errors.append(f"{src.parent.name}/{src.name}: {e}")
+            if progress is not None:
+                progress(len(moved) + len(errors), len(moves))
+
+        for src, dst, entry in moves:
+            try:
+                os.rename(src, dst)
+            except OSError as e:
+                if e.errno == errno.EXDEV:
+                    copies[pool.submit(shutil.move, src, dst)] = (src, entry)
+                else:
+                    failed(src, e)
+                continue
+            finished(entry)
+
+        for future in as_completed(copies):
+            src, entry = copies[future]
+            try:
+                future.result()
+            except OSError as e:
+                failed(src, e)
+                continue
+            finished(entry)
+        return moved, errors
+
+    def _append_manifest(self, records):
+        if not records:
+            return
+        self.trash_folder.mkdir(parents=True, exist_ok=True)
+        with open(self.manifest_path, "a+b") as f:
+            data = b"".join(jsonl_codec.dump_line(record) for record in records)
+            if f.tell():
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    data = b"\n" + data  # End a torn line from a crash, so it can't swallow this record
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        self._load_manifest()
+
+    def _load_manifest(self):
+        # The manifest is append-only, so only lines added since the last load are read
+        try:
+            with open(self.manifest_path, "rb") as f:
+                f.seek(self._manifest_offset)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        complete = data[:data.rfind(b"\n") + 1]
+        for line in complete.splitlines():
+            try:
+                record = jsonl_codec.loads(line)
+                op, entry_id = record["op"], record["id"]
+            except (jsonl_codec.JSONDecodeError, KeyError, TypeError):
+                # A torn or corrupt line must not make the rest of the trash unreadable
+                logger.warning("Skipping unreadable line in %s: %r", self.manifest_path, line[:200])
+                continue
+            if op == "trash":
+                self._entries[entry_id] = record
+            else:
+                self._entries.pop(entry_id, None)
+        self._manifest_offset += len(complete)
@@ -3,17 +3,17 @@ from pathlib import Path
 import os
 import pandas as pd
 from datetime import datetime
-import json
+import jsonl_codec
+from dir_catalog import catalog
+from dataset_cache import dataset_cache
 
 def list_folders(base_folder):
     """List all folders inside the base directory."""
-    base = Path(base_folder)
-    return [folder.name for folder in base.iterdir() if folder.is_dir()]
+    return catalog.list_folders(base_folder)
 
 def list_files(folder_path, file_type):
     """List files of the given type in the folder."""
-    folder = Path(folder_path)
-    return [file.name for file in folder.glob(f"*.{file_type}")]
+    return catalog.list_files(folder_path, file_type)
 
 # Base data folder
 BASE_FOLDER = "./data"  # Change this to your actual base folder
@@ -76,9 +76,9 @@ if folders:
                     save_filename = f"{selected_folder}-{timestamp}-{uploaded_file.name}"
                     save_path = folder_path / save_filename
                     
-                    with open(save_path, "w") as f:
-                        json_data = json.load(uploaded_file)
-                        json.dump(json_data, f, indent=4)
+                    with open(save_path, "wb") as f:
+                        json_data = jsonl_codec.load(uploaded_file)
+                        jsonl_codec.dump(json_data, f, indent=4)
                         
                     st.success(f"File {save_filename} uploaded successfully to {selected_folder}!")
                     st.session_state.show_upload = False
@@ -93,6 +93,5 @@ else:
 # Display file contents
 if 'selected_file' in locals() and file_path.exists():
     if file_type == "json":
-        with open(file_path, "r") as f:
-            df = json.load(f)
+        df = dataset_cache.load_json(file_path)
         st.write(df)
@@ -0,0 +1,450 @@
+import argparse
+import asyncio
+import json
+import sqlite3
+import sys
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+from batch_judge import BatchJudge, CaseBatcher
+from dataset import INPUTS_FOLDER, RESULTS_FOLDER, fingerprint, iter_input_files, iter_records, results_path_for, to_test_case
+from judge_cache import DEFAULT_CACHE_PATH, DEFAULT_MAX_BYTES, JudgeCache
+from judge_model import ScheduledModel
+from metrics import DEFAULT_METRICS, DEFAULT_THRESHOLD, EMBEDDING_METRICS, LOCAL_METRIC_CLASSES, METRIC_CLASSES, MetricSpec
+from previous_results import PreviousResults
+from result_log import ResultLog
+from results_store import NOT_APPLICABLE, ResultsStore
+from scheduler import DEFAULT_MAX_RETRIES, JudgeScheduler
+
+DEFAULT_CONCURRENCY = 8
+YIELD_EVERY = 1000  # Carried-forward rows written before letting workers run
+
+
+class RunReport:
+    def __init__(self, run_id, metrics, concurrency):
+        """
+        Counters for one evaluation run, written next to its results
+
+        Args:
+            run_id (str): Run identifier
+            metrics (list): MetricSpec objects evaluated
+            concurrency (int): Maximum concurrent judge calls
+        """
+        self.run_id = run_id
+        self.metrics = [spec.config() for spec in metrics]
+        self.concurrency = concurrency
+        self.files = 0
+        self.cases = 0
+        self.carried_forward = 0
+        self.resumed = 0
+        self.metric_calls = 0
+        self.errors = 0
+        self.batch_fallbacks = 0
+        self.batching = None
+        self.cache = None
+        self.scheduler = None
+        self.started_at = time.monotonic()
+        self.elapsed = 0.0
+
+    def as_dict(self):
+        return {
+            "run_id": self.run_id,
+            "metrics": self.metrics,
+            "concurrency": self.concurrency,
+            "files": self.files,
+            "cases": self.cases,
+            "carried_forward": self.carried_forward,
+            "resumed": self.resumed,
+            "metric_calls": self.metric_calls,
+            "errors": self.errors,
+            "batch_fallbacks": self.batch_fallbacks,
+            "batching": self.batching,
+            "elapsed_seconds": round(self.elapsed, 3),
+            "cases_per_second": round(self.cases / self.elapsed, 3) if self.elapsed else None,
+            "cache": self.cache,
+            "scheduler": self.scheduler,
+        }
+
+
+class EvalRunner:
+    def __init__(self, metrics, concurrency=DEFAULT_CONCURRENCY, inputs_folder=INPUTS_FOLDER, results_folder=RESULTS_FOLDER,
+                 cache=None, incremental=True, store=None, scheduler=None, progress_interval=None):
+        """
+        Score JSONL test cases with deepeval metrics, many judge calls at a time
+
+        Test cases are streamed from the input files into a bounded queue, so
+        memory does not grow with the dataset. Metric measurements go through
+        a JudgeScheduler, which keeps at most ``concurrency`` in flight and
+        paces them to the judge's rate limits. Each scored record is committed to a
+        ResultLog as soon as it completes, and the results file mirroring the
+        input is replaced once the whole run has finished. A run that was
+        interrupted resumes after its last committed row.
+
+        Metrics with a ``batch_size`` above 1 are scored several cases of
+        the same input file per judge prompt; cases the batched reply does not
+        score properly fall back to one deepeval call each.
+
+        In incremental mode, records whose fingerprint matches a row of the
+        previous results keep that row's scores; only added or changed
+        records, or metrics whose settings changed, are sent to the judge.
+
+        Args:
+            metrics (list): MetricSpec objects to evaluate on every case
+            concurrency (int, optional): Maximum concurrent judge calls
+            inputs_folder (Path, optional): Root of the JSONL inputs
+            results_folder (Path, optional): Root the results are written under
+            cache (JudgeCache, optional): Serve repeated measurements without the judge
+            incremental (bool, optional): Carry forward scores of unchanged records
+            store (ResultsStore, optional): Columnar store finished results are added to
+            scheduler (JudgeScheduler, optional): Rate limiting and retries; a plain
+                ``concurrency`` limit when None
+            progress_interval (float, optional): Seconds between progress lines on stderr
+        """
+        self.metrics = metrics
+        self.concurrency = concurrency
+        self.inputs_folder = Path(inputs_folder)
+        self.results_folder = Path(results_folder)
+        self.cache = cache
+        self.incremental = incremental
+        self.store = store
+        self.scheduler = scheduler or JudgeScheduler(concurrency)
+        self.progress_interval = progress_interval
+        # Enough workers to fill the largest batch at every concurrency slot
+        self.workers = concurrency * max([spec.batch_size for spec in metrics] + [1])
+        self.report = None
+        self._judges = {}  # metric name -> BatchJudge
+        self._models = {}  # judge model id -> ScheduledModel
+        self._batchers = {}  # (metric name, input path) -> CaseBatcher
+        self._logs = {}  # input path -> ResultLog
+        self._previous = {}  # input path -> PreviousResults
+
+    async def run(self, files):
+        """
+        Evaluate every record of the given input files
+
+        Args:
+            files (iterable): JSONL input paths
+
+        Returns:
+            RunReport: Counters for the run
+        """
+        # Runs started within the same second, e.g. one per input folder, must not share an id
+        run_id = f"{datetime.now():%Y-%m-%d-%H-%M-%S}-{uuid.uuid4().hex[:8]}"
+        self.report = RunReport(run_id, self.metrics, self.concurrency)
+        queue = asyncio.Queue(maxsize=self.workers * 2)
+        tasks = [asyncio.create_task(self._worker(queue)) for _ in range(self.workers)]
+        tasks.append(asyncio.create_task(self._produce(files, queue)))
+        progress = None
+        if self.progress_interval:
+            progress = asyncio.create_task(self._print_progress(queue))
+
+        completed = False
+        try:
+            await asyncio.gather(*tasks)
+            completed = True
+        finally:
+            for task in tasks + [progress]:
+                if task is not None:
+                    task.cancel()
+            for previous in self._previous.values():
+                previous.close()
+            self._previous.clear()
+            # An unfinished run keeps its checkpoint so the next run resumes it
+            for path, log in self._logs.items():
+                if not completed:
+                    log.close()
+                    continue
+                log.finalize()
+                if self.store is not None:
+                    dataset = Path(path).relative_to(self.inputs_folder).as_posix()
+                    self.store.add_run(self.report.run_id, dataset, log.results_path, [spec.name for spec in self.metrics])
+            self._logs.clear()
+            self._batchers.clear()
+
+        self.report.elapsed = time.monotonic() - self.report.started_at
+        if self.cache is not None:
+            self.report.cache = self.cache.stats()
+        self.report.scheduler = self.scheduler.gauges()
+        if self._judges:
+            self.report.batching = {name: dict(judge.stats) for name, judge in self._judges.items()}
+        self._write_report()
+        return self.report
+
+    async def _produce(self, files, queue):
+        for path in files:
+            self.report.files += 1
+            results_path = results_path_for(path, self.inputs_folder, self.results_folder)
+            results_path.parent.mkdir(parents=True, exist_ok=True)
+            log = self._logs[path] = ResultLog(results_path, self._run_key(path))
+            self.report.resumed += log.resumed
+            previous = None
+            if self.incremental:
+                previous = self._previous[path] = PreviousResults(results_path)
+
+            for line_number, record, error in iter_records(path):
+                if log.is_done(line_number):
+                    continue
+                if error is not None:
+                    # Unreadable line: record why, like an invalid test case, and go on with the file
+                    self._write_result(path, self._error_row(path, line_number, f"invalid record: {error}"))
+                    continue
+                record_fingerprint = fingerprint(record)
+                reused = self._reusable_scores(previous, record_fingerprint)
+                if len(reused) < len(self.metrics):
+                    await queue.put((path, line_number, record, record_fingerprint, reused))
+                    continue
+                # Unchanged record: write the previous scores without queueing it
+                self._write_result(path, self._result_row(path, line_number, record, record_fingerprint, reused))
+                self.report.carried_forward += 1
+                if self.report.carried_forward % YIELD_EVERY == 0:
+                    await asyncio.sleep(0)
+        for _ in range(self.workers):
+            await queue.put(None)
+
+    async def _worker(self, queue):
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            path, line_number, record, record_fingerprint, reused = item
+            result = await self.evaluate(path, line_number, record, record_fingerprint, reused)
+            self._write_result(path, result)
+
+    def _run_key(self, input_path):
+        # A checkpoint is only resumed for the same input version and metric settings
+        stat = Path(input_path).stat()
+        return {
+            "input_size": stat.st_size,
+            "input_mtime_ns": stat.st_mtime_ns,
+            "metrics": [spec.digest() for spec in self.metrics],
+        }
+
+    def _reusable_scores(self, previous, record_fingerprint):
+        # Scores of the previous row that were measured with the current metric settings
+        row = previous.lookup(record_fingerprint) if previous is not None else None
+        if row is None:
+            return {}
+        reused = {}
+        for spec in self.metrics:
+            score = row["metrics"].get(spec.name)
+            if score is not None and "error" not in score and score.get("config") == spec.digest():
+                reused[spec.name] = score
+        return reused
+
+    def _result_row(self, path, line_number, record, record_fingerprint, scores):
+        return {
+            "file": str(Path(path).relative_to(self.inputs_folder)),
+            "line": line_number,
+            "fingerprint": record_fingerprint,
+            "input": record.get("input"),
+            "metrics": scores,
+        }
+
+    def _error_row(self, path, line_number, error):
+        self.report.errors += 1
+        self.report.cases += 1
+        return {
+            "file": str(Path(path).relative_to(self.inputs_folder)),
+            "line": line_number,
+            "fingerprint": None,
+            "input": None,
+            "metrics": {},
+            "error": error,
+        }
+
+    async def evaluate(self, path, line_number, record, record_fingerprint=None, reused=None):
+        """
+        Score one record with every metric
+
+        Args:
+            path (Path): Input file the record came from
+            line_number (int): Record index in the file
+            record (dict): Input record
+            record_fingerprint (str, optional): See ``dataset.fingerprint``
+            reused (dict, optional): Metric name to a previous score to keep
+
+        Returns:
+            dict: Result row with per-metric score, success and reason
+        """
+        if record_fingerprint is None:
+            record_fingerprint = fingerprint(record)
+        result = self._result_row(path, line_number, record, record_fingerprint, dict(reused or {}))
+        try:
+            test_case = to_test_case(record)
+        except (TypeError, ValueError) as e:
+            result["error"] = f"invalid test case: {e}"
+            self.report.errors += 1
+            self.report.cases += 1
+            return result
+
+        specs = []
+        for spec in self.metrics:
+            if spec.name in result["metrics"]:
+                continue
+            if spec.applies_to(record):
+                specs.append(spec)
+            else:
+                result["metrics"][spec.name] = {"score": None, "success": None, "config": spec.digest(),
+                                                "reason": f"{NOT_APPLICABLE}: the record has no actual_output"}
+        scores = await asyncio.gather(*(self._measure(spec, test_case, path) for spec in specs))
+        for spec, score in zip(specs, scores):
+            result["metrics"][spec.name] = score
+        self.report.cases += 1
+        return result
+
+    async def _measure(self, spec, test_case, path=None):
+        metric = spec.build(self._judge_model(spec))
+        cache_key = None
+        if self.cache is not None:
+            model = self._judge(spec).model if spec.batch_size > 1 else getattr(metric, "evaluation_model", spec.model)
+            cache_key = self.cache.key(spec.config(), model, test_case)
+            cached = self._cache_call(self.cache.get, cache_key)
+            if cached is not None:
+                return dict(cached, config=spec.digest())
+
+        if spec.batch_size > 1:
+            try:
+                score = await self._batcher(spec, path).score(test_case)
+            except Exception as e:
+                self.report.errors += 1
+                return {"error": f"{type(e).__name__}: {e}"}
+            if score is not None:
+                if cache_key is not None:
+                    self._cache_call(self.cache.put, cache_key, score)
+                return dict(score, config=spec.digest())
+            self.report.batch_fallbacks += 1
+
+        self.report.metric_calls += 1
+        try:
+            # Each judge request of the metric is paced and retried by the scheduler, see ScheduledModel
+            await metric.a_measure(test_case, _show_indicator=False)
+        except Exception as e:
+            # One failing judge call should not abort the whole run
+            self.report.errors += 1
+            return {"error": f"{type(e).__name__}: {e}"}
+        score = {"score": metric.score, "success": metric.is_successful(), "reason": metric.reason}
+        if cache_key is not None:
+            self._cache_call(self.cache.put, cache_key, score)
+        return dict(score, config=spec.digest())
+
+    def _cache_call(self, method, *args):
+        # A cache error, e.g. a database locked by another runner, must not abort the run
+        if self.cache is None:
+            return None  # Disabled by an earlier error while this case was being judged
+        try:
+            return method(*args)
+        except sqlite3.Error as e:
+            print(f"Judge cache disabled for the rest of the run: {e}", file=sys.stderr)
+            self.report.cache = dict(self.cache.stats(), error=str(e))
+            self.cache = None
+            return None
+
+    def _judge_model(self, spec):
+        if spec.name in LOCAL_METRIC_CLASSES:
+            return None  # Embedding metrics don't call the judge
+        if spec.model not in self._models:
+            self._models[spec.model] = ScheduledModel(spec.model, self.scheduler)
+        return self._models[spec.model]
+
+    def _judge(self, spec):
+        if spec.name not in self._judges:
+            self._judges[spec.name] = BatchJudge(spec.name, spec.threshold, spec.model)
+        return self._judges[spec.name]
+
+    def _batcher(self, spec, path):
+        # Batches only hold cases of one input file
+        key = (spec.name, path)
+        if key not in self._batchers:
+            self._batchers[key] = CaseBatcher(self._judge(spec), self.scheduler, spec.batch_size)
+        return self._batchers[key]
+
+    async def _print_progress(self, queue):
+        while True:
+            await asyncio.sleep(self.progress_interval)
+            gauges = self.scheduler.gauges()
+            print(
+                f"cases {self.report.cases} carried {self.report.carried_forward} | "
+                f"in flight {gauges['in_flight']}/{gauges['concurrency_limit']} queued calls {gauges['queued']} "
+                f"queued cases {queue.qsize()} | 429s {gauges['rate_limited']} retries {gauges['retries']}",
+                file=sys.stderr,
+            )
+
+    def _write_result(self, input_path, result):
+        self._logs[input_path].append(result)
+
+    def _write_report(self):
+        report_path = self.results_folder / "runs" / f"{self.report.run_id}.json"
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(self.report.as_dict(), f, indent=4)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate data_set/Inputs JSONL files with deepeval metrics")
+    parser.add_argument("--inputs", type=Path, default=INPUTS_FOLDER, help="Root folder of the JSONL inputs")
+    parser.add_argument("--results", type=Path, default=RESULTS_FOLDER, help="Root folder to write results under")
+    parser.add_argument("--folders", nargs="*", help="Only evaluate these input subfolders")
+    parser.add_argument("--metrics", nargs="+", default=DEFAULT_METRICS, choices=sorted([*METRIC_CLASSES, *LOCAL_METRIC_CLASSES]))
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Passing score for every metric")
+    parser.add_argument("--model", help="Judge model id (deepeval's default if omitted)")
+    parser.add_argument("--batch", nargs="+", default=[], metavar="METRIC=SIZE",
+                        help="Score SIZE cases per judge prompt for METRIC, e.g. answer_relevancy=8")
+    parser.add_argument("--embedding-model", help="Embedding model id for semantic_similarity")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Maximum concurrent judge calls")
+    parser.add_argument("--initial-concurrency", type=int, help="Starting concurrency; adapts up to --concurrency")
+    parser.add_argument("--rpm", type=int, default=0, help="Judge requests per minute (0: unlimited)")
+    parser.add_argument("--tpm", type=int, default=0, help="Judge tokens per minute (0: unlimited)")
+    parser.add_argument("--max-retries", type=int, default=DEFAULT_MAX_RETRIES, help="Retries per judge call")
+    parser.add_argument("--progress", type=float, metavar="SECONDS", help="Print live gauges every SECONDS")
+    parser.add_argument("--cache", type=Path, default=DEFAULT_CACHE_PATH, help="Judge result cache database")
+    parser.add_argument("--cache-size-mb", type=int, default=DEFAULT_MAX_BYTES >> 20, help="Judge result cache size budget")
+    parser.add_argument("--no-cache", action="store_true", help="Always call the judge")
+    parser.add_argument("--full", action="store_true", help="Re-evaluate every record, even if unchanged since the last run")
+    return parser.parse_args(argv)
+
+
+def parse_batch_sizes(values):
+    """
+    Per-metric batch sizes from METRIC=SIZE arguments
+
+    Args:
+        values (list): Strings like "answer_relevancy=8"
+
+    Returns:
+        dict: Metric name to batch size
+    """
+    sizes = {}
+    for value in values:
+        name, _, size = value.partition("=")
+        if not size.isdigit() or int(size) < 1:
+            raise SystemExit(f"--batch expects METRIC=SIZE with a positive SIZE, got '{value}'")
+        sizes[name] = int(size)
+    return sizes
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    batch_sizes = parse_batch_sizes(args.batch)
+    metrics = [
+        MetricSpec(name, args.threshold, args.embedding_model if name in EMBEDDING_METRICS else args.model,
+                   batch_sizes.get(name, 1))
+        for name in args.metrics
+    ]
+    cache = None if args.no_cache else JudgeCache(args.cache, args.cache_size_mb << 20)
+    store = ResultsStore(args.results / "store")
+    scheduler = JudgeScheduler(args.concurrency, args.rpm, args.tpm, args.initial_concurrency, args.max_retries)
+    runner = EvalRunner(metrics, args.concurrency, args.inputs, args.results, cache, incremental=not args.full,
+                        store=store, scheduler=scheduler, progress_interval=args.progress)
+    files = list(iter_input_files(args.inputs, args.folders))
+    try:
+        report = asyncio.run(runner.run(files))
+    finally:
+        if cache is not None:
+            cache.close()
+    print(json.dumps(report.as_dict(), indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+import json
+
+from micro_batch import MicroBatcher
+from scheduler import PROMPT_OVERHEAD_TOKENS, estimate_tokens
+
+DEFAULT_JUDGE_MODEL = "gpt-4.1"  # deepeval's default judge
+MAX_WAIT = 0.05  # Seconds a case waits for more cases before its batch is sent
+
+# Metric name -> (what the judge scores, test case fields shown per case)
+BATCH_METRICS = {
+    "answer_relevancy": (
+        "Rate how relevant the actual output is to the input: 1 when every statement in it addresses "
+        "the input, 0 when none does.",
+        ("input", "actual_output"),
+    ),
+    "faithfulness": (
+        "Rate how faithful the actual output is to the retrieval context: the fraction of its claims "
+        "that the retrieval context supports, 1 when there are no contradicted or unsupported claims.",
+        ("actual_output", "retrieval_context"),
+    ),
+    "contextual_relevancy": (
+        "Rate how relevant the retrieval context is to the input: the fraction of its statements that "
+        "help answer the input.",
+        ("input", "retrieval_context"),
+    ),
+}
+
+FIELD_LABELS = {
+    "input": "Input",
+    "actual_output": "Actual output",
+    "retrieval_context": "Retrieval context",
+}
+
+
+def case_key(i):
+    return f"case_{i}"
+
+
+class BatchJudge:
+    def __init__(self, metric, threshold, model=None, client=None):
+        """
+        Score several test cases of one metric with a single structured judge prompt
+
+        The reply is a JSON object with one ``{"reason", "score"}`` entry per
+        case, constrained by a JSON schema. Entries that are missing or
+        malformed come back as None, for the caller to score one case at a
+        time instead.
+
+        Args:
+            metric (str): Key of BATCH_METRICS
+            threshold (float): Passing score
+            model (str, optional): Judge model id; DEFAULT_JUDGE_MODEL when None
+            client (AsyncOpenAI, optional): Client to call; one reading the OPENAI_* environment when None
+        """
+        if metric not in BATCH_METRICS:
+            raise ValueError(f"Metric '{metric}' cannot be batched, expected one of {', '.join(BATCH_METRICS)}")
+        self.metric = metric
+        self.threshold = threshold
+        self.model = model or DEFAULT_JUDGE_MODEL
+        self.instruction, self.fields = BATCH_METRICS[metric]
+        self._client = client
+        self.stats = {"calls": 0, "cases": 0, "malformed": 0, "prompt_tokens": 0, "completion_tokens": 0}
+
+    @property
+    def client(self):
+        if self._client is None:
+            from openai import AsyncOpenAI
+
+            self._client = AsyncOpenAI()
+        return self._client
+
+    def estimate_tokens(self, test_cases):
+        """Rough prompt size of one batched call, for the scheduler's token bucket"""
+        return PROMPT_OVERHEAD_TOKENS + sum(estimate_tokens(test_case, overhead=0) for test_case in test_cases)
+
+    async def judge(self, test_cases):
+        """
+        Score test cases in one judge call
+
+        Args:
+            test_cases (list): LLMTestCase objects
+
+        Returns:
+            list: Per case, a dict with score, success and reason, or None if its entry was malformed
+        """
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": self.prompt(test_cases)}],
+            response_format={
+                "type": "json_schema",
+                "json_schema": {"name": "batch_scores", "schema": self.schema(len(test_cases)), "strict": True},
+            },
+            temperature=0,
+        )
+        self.stats["calls"] += 1
+        self.stats["cases"] += len(test_cases)
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            self.stats["prompt_tokens"] += usage.prompt_tokens or 0
+            self.stats["completion_tokens"] += usage.completion_tokens or 0
+
+        scores = self.parse(response.choices[0].message.content, len(test_cases))
+        self.stats["malformed"] += sum(score is None for score in scores)
+        return scores
+
+    def prompt(self, test_cases):
+        parts = [
+            f"You are grading {len(test_cases)} unrelated test cases. {self.instruction}",
+            "Judge every case on its own. For each case give a one-sentence reason, then a score between 0 and 1.",
+            f"Reply with a JSON object with the keys {case_key(0)} to {case_key(len(test_cases) - 1)}, "
+            'each {"reason": string, "score": number}.',
+        ]
+        for i, test_case in enumerate(test_cases):
+            parts.append(f"### {case_key(i)}")
+            for field in self.fields:
+                value = getattr(test_case, field, None)
+                if isinstance(value, (list, tuple)):
+                    value = "\n".join(f"- {item}" for item in value)
+                parts.append(f"{FIELD_LABELS[field]}:\n{value if value is not None else '(none)'}")
+        return "\n\n".join(parts)
+
+    def schema(self, count):
+        keys = [case_key(i) for i in range(count)]
+        return {
+            "type": "object",
+            "properties": {key: {"$ref": "#/$defs/case_score"} for key in keys},
+            "required": keys,
+            "additionalProperties": False,
+            "$defs": {
+                "case_score": {
+                    "type": "object",
+                    "properties": {"reason": {"type": "string"}, "score": {"type": "number"}},
+                    "required": ["reason", "score"],
+                    "additionalProperties": False,
+                },
+            },
+        }
+
+    def parse(self, content, count):
+        """
+        Per-case scores from a batched reply
+
+        Args:
+            content (str): Judge reply
+            count (int): Number of cases sent
+
+        Returns:
+            list: Score dict per case, None where the entry is missing or invalid
+        """
+        try:
+            data = json.loads(content or "")
+        except ValueError:
+            return [None] * count
+        if not isinstance(data, dict):
+            return [None] * count
+
+        scores = []
+        for i in range(count):
+            entry = data.get(case_key(i))
+            score = entry.get("score") if isinstance(entry, dict) else None
+            if isinstance(score, bool) or not isinstance(score, (int, float)) or not 0 <= score <= 1:
+                scores.append(None)
+                continue
+            reason = entry.get("reason")
+            scores.append({"score": float(score), "success": score >= self.threshold,
+                           "reason": reason if isinstance(reason, str) else None})
+        return scores
+
+
+class CaseBatcher(MicroBatcher):
+    def __init__(self, judge, scheduler, batch_size, max_wait=MAX_WAIT):
+        """
+        Collect cases of one metric and input file into batched judge calls
+
+        Cases arriving within ``max_wait`` of each other share a call; a
+        full batch is sent at once. Each batched call is one scheduler call,
+        so rate limits and retries apply to it as a whole.
+
+        Args:
+            judge (BatchJudge): Builds and parses the batched prompt
+            scheduler (JudgeScheduler): Paces the calls
+            batch_size (int): Cases per call
+            max_wait (float, optional): Seconds to wait for a batch to fill
+        """
+        super().__init__(batch_size, max_wait)
+        self.judge = judge
+        self.scheduler = scheduler
+
+    async def score(self, test_case):
+        """
+        Score one test case as part of a batch
+
+        Args:
+            test_case (LLMTestCase): Case to score
+
+        Returns:
+            dict: Score, success and reason, or None if the batched reply had no valid entry for it
+        """
+        return await self.submit(test_case)
+
+    async def _score_batch(self, test_cases):
+        return await self.scheduler.call(lambda: self.judge.judge(test_cases), self.judge.estimate_tokens(test_cases))
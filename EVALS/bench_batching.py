@@ -0,0 +1,161 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+from batch_judge import BATCH_METRICS, BatchJudge, CaseBatcher
+from scheduler import JudgeScheduler
+
+DEFAULT_SIZES = [1, 2, 4, 8, 16]
+DEFAULT_CASES = 256
+# USD per million tokens; defaults are in the range of a small hosted judge model
+DEFAULT_PRICE_IN = 0.40
+DEFAULT_PRICE_OUT = 1.60
+
+
+def synthetic_test_cases(count):
+    """Short question/answer cases, the kind batching is meant for"""
+    from deepeval.test_case import LLMTestCase
+
+    return [
+        LLMTestCase(
+            input=f"What is the capital of region {i}?",
+            actual_output=f"The capital of region {i} is city {i * 7 % 101}.",
+            retrieval_context=[f"Region {i} is governed from city {i * 7 % 101}, its capital since {1800 + i % 200}."],
+        )
+        for i in range(count)
+    ]
+
+
+def file_test_cases(path, count):
+    from dataset import iter_records, to_test_case
+
+    test_cases = []
+    for _, record, error in iter_records(path):
+        if error is not None:
+            continue
+        test_cases.append(to_test_case(record))
+        if len(test_cases) == count:
+            break
+    return test_cases
+
+
+async def bench_size(test_cases, metric, batch_size, concurrency, model, client):
+    """
+    Score every case with one batch size, the way the runner feeds a batcher
+
+    Returns:
+        dict: Timings and token usage for this batch size
+    """
+    judge = BatchJudge(metric, 0.5, model, client)
+    batcher = CaseBatcher(judge, JudgeScheduler(concurrency), batch_size)
+    queue = asyncio.Queue()
+    for test_case in test_cases:
+        queue.put_nowait(test_case)
+    latencies = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        while not queue.empty():
+            test_case = queue.get_nowait()
+            started = time.perf_counter()
+            try:
+                await batcher.score(test_case)
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency * batch_size)))
+    elapsed = time.perf_counter() - started
+
+    stats = judge.stats
+    cases = max(stats["cases"], 1)
+    return {
+        "batch_size": batch_size,
+        "cases": len(test_cases),
+        "calls": stats["calls"],
+        "errors": errors,
+        "malformed": stats["malformed"],
+        "elapsed_seconds": round(elapsed, 3),
+        "cases_per_second": round(len(test_cases) / elapsed, 2),
+        "latency_p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 1),
+        "latency_p95_ms": round(float(np.percentile(latencies, 95)) * 1000, 1),
+        "prompt_tokens_per_case": round(stats["prompt_tokens"] / cases, 1),
+        "completion_tokens_per_case": round(stats["completion_tokens"] / cases, 1),
+    }
+
+
+def add_cost(row, price_in, price_out):
+    row["usd_per_1k_cases"] = round(
+        (row["prompt_tokens_per_case"] * price_in + row["completion_tokens_per_case"] * price_out) / 1000, 4
+    )
+    return row
+
+
+def print_table(rows):
+    columns = ["batch_size", "calls", "malformed", "cases_per_second", "latency_p50_ms", "latency_p95_ms",
+               "prompt_tokens_per_case", "completion_tokens_per_case", "usd_per_1k_cases"]
+    widths = [max(len(name), *(len(str(row[name])) for row in rows)) for name in columns]
+    print("  ".join(name.rjust(width) for name, width in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(str(row[name]).rjust(width) for name, width in zip(columns, widths)))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compare judge cost and latency per case at different batch sizes",
+        epilog="Without --base-url a local stub judge is started, whose latency grows with reply length",
+    )
+    parser.add_argument("--metric", default="answer_relevancy", choices=sorted(BATCH_METRICS))
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Batch sizes to compare")
+    parser.add_argument("--cases", type=int, default=DEFAULT_CASES, help="Test cases per batch size")
+    parser.add_argument("--input", type=Path, help="JSONL file to take cases from instead of synthetic ones")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent judge calls")
+    parser.add_argument("--model", help="Judge model id")
+    parser.add_argument("--base-url", help="OpenAI-compatible endpoint; a local stub judge when omitted")
+    parser.add_argument("--stub-latency-ms", type=float, default=300, help="Stub latency per request")
+    parser.add_argument("--stub-output-ms-per-1k", type=float, default=2000, help="Stub latency per 1000 reply tokens")
+    parser.add_argument("--price-in", type=float, default=DEFAULT_PRICE_IN, help="USD per million prompt tokens")
+    parser.add_argument("--price-out", type=float, default=DEFAULT_PRICE_OUT, help="USD per million completion tokens")
+    parser.add_argument("--json", type=Path, help="Also write the results to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    from openai import AsyncOpenAI
+
+    server = None
+    base_url = args.base_url
+    if base_url is None:
+        from stub_server import StubJudge, serve
+
+        server = serve(StubJudge(args.stub_latency_ms / 1000, output_latency=args.stub_output_ms_per_1k / 1000), port=0)
+        base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    api_key = os.environ.get("OPENAI_API_KEY", "stub" if server is not None else None)
+
+    test_cases = file_test_cases(args.input, args.cases) if args.input else synthetic_test_cases(args.cases)
+    rows = []
+    try:
+        for batch_size in args.sizes:
+            client = AsyncOpenAI(base_url=base_url, api_key=api_key)
+            row = asyncio.run(bench_size(test_cases, args.metric, batch_size, args.concurrency, args.model, client))
+            rows.append(add_cost(row, args.price_in, args.price_out))
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    print_table(rows)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"metric": args.metric, "concurrency": args.concurrency, "results": rows}, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import hashlib
+import json
+from pathlib import Path
+
+from deepeval.test_case import LLMTestCase
+
+INPUTS_FOLDER = Path("data_set/Inputs")
+RESULTS_FOLDER = Path("data_set/Results")
+
+# JSONL record fields copied onto LLMTestCase
+TEST_CASE_FIELDS = ("input", "actual_output", "expected_output", "retrieval_context", "context")
+
+
+def iter_input_files(inputs_folder=INPUTS_FOLDER, folders=None):
+    """
+    List the JSONL input files to evaluate, in a stable order
+
+    Args:
+        inputs_folder (Path, optional): Root of the curated inputs
+        folders (list, optional): Only include these subfolders
+
+    Yields:
+        Path: JSONL file path
+    """
+    inputs_folder = Path(inputs_folder)
+    for path in sorted(inputs_folder.rglob("*.jsonl")):
+        relative = path.relative_to(inputs_folder)
+        if folders and relative.parts[0] not in folders:
+            continue
+        yield path
+
+
+def iter_records(path):
+    """
+    Stream the records of a JSONL file without loading it whole
+
+    Line numbers count non-empty lines from 0, matching the CRUD_UI editor.
+    A line that is not a JSON object is yielded with an error message
+    instead of a record, so one bad line does not stop the rest of the file.
+
+    Args:
+        path (Path): JSONL file
+
+    Yields:
+        tuple: (line number, record dict or None, error message or None)
+    """
+    with open(path, "rb") as f:
+        line_number = 0
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield line_number, None, f"invalid JSON: {e}"
+            else:
+                if isinstance(record, dict):
+                    yield line_number, record, None
+                else:
+                    yield line_number, None, f"expected a JSON object, got {type(record).__name__}"
+            line_number += 1
+
+
+def to_test_case(record):
+    """
+    Build a deepeval test case from an input record
+
+    Args:
+        record (dict): Record with at least ``input``. Ground-truth records
+            without an ``actual_output`` are scored on their ``expected_output``;
+            metrics.REFERENCE_METRICS are not applied to them.
+
+    Returns:
+        LLMTestCase: Test case for the metrics
+    """
+    fields = {name: record[name] for name in TEST_CASE_FIELDS if record.get(name) is not None}
+    fields.setdefault("actual_output", record.get("expected_output", ""))
+    return LLMTestCase(**fields)
+
+
+def fingerprint(record):
+    """
+    Hash the fields of a record that affect its scores
+
+    Editing other fields, or reordering keys, leaves the fingerprint unchanged.
+
+    Args:
+        record (dict): Input record
+
+    Returns:
+        str: Hex digest
+    """
+    fields = {name: record.get(name) for name in TEST_CASE_FIELDS}
+    return hashlib.blake2b(json.dumps(fields, sort_keys=True).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def results_path_for(input_path, inputs_folder=INPUTS_FOLDER, results_folder=RESULTS_FOLDER):
+    """Return the results file mirroring an input file under the results folder."""
+    return Path(results_folder) / Path(input_path).relative_to(inputs_folder)
@@ -0,0 +1,196 @@
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Not POSIX: only one process may add embeddings at a time
+    fcntl = None
+
+EMBEDDINGS_FOLDER = Path("data_set/cache/embeddings")
+EMBED_BATCH_SIZE = 256  # Texts sent per embedding request
+KEY_SIZE = 16  # Bytes of the text digest stored per row
+
+
+def text_key(text):
+    """Digest identifying a text in the store."""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=KEY_SIZE).digest()
+
+
+def openai_embedder(model, base_url=None):
+    """
+    Embedding function calling an OpenAI-compatible /embeddings endpoint
+
+    Args:
+        model (str): Embedding model id
+        base_url (str, optional): API base URL, e.g. a local stand-in server
+
+    Returns:
+        callable: fn(texts) -> list of vectors
+    """
+    from openai import OpenAI
+
+    client = OpenAI(base_url=base_url) if base_url else OpenAI()
+
+    def embed(texts):
+        response = client.embeddings.create(model=model, input=list(texts))
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+    return embed
+
+
+class EmbeddingStore:
+    def __init__(self, folder):
+        """
+        Memory-mapped float32 embeddings shared by every runner process
+
+        Vectors are unit-normalized and appended as rows of ``vectors.f32``;
+        row ``i`` belongs to the text whose digest is the i-th entry of
+        ``keys.bin``. ``meta.json`` holds the committed row count, written
+        last, so readers never see a half-written row. Each process maps the
+        vectors read-only, so they are shared through the page cache instead
+        of being copied per process.
+
+        Args:
+            folder (Path): Store folder, one per embedding model
+        """
+        self.folder = Path(folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.vectors_path = self.folder / "vectors.f32"
+        self.keys_path = self.folder / "keys.bin"
+        self.meta_path = self.folder / "meta.json"
+        self.lock_path = self.folder / ".lock"
+        self.dim = None
+        self.rows = 0
+        self._index = {}  # text digest -> row
+        self._vectors = None
+        self._lock = threading.Lock()
+        with self._lock:
+            self._refresh()
+
+    def __len__(self):
+        return self.rows
+
+    def rows_for(self, texts, embed_fn, batch_size=EMBED_BATCH_SIZE):
+        """
+        Find the rows of texts, embedding only those not stored yet
+
+        Args:
+            texts (list): Texts to look up
+            embed_fn (callable): fn(texts) -> list of vectors, see ``openai_embedder``
+            batch_size (int, optional): Texts per embed_fn call
+
+        Returns:
+            ndarray: Row of every text, in order
+        """
+        keys = [text_key(text) for text in texts]
+        with self._lock:
+            if any(key not in self._index for key in keys):
+                with self._file_lock():
+                    self._refresh()  # Another process may have added some meanwhile
+                    missing = {}
+                    for key, text in zip(keys, texts):
+                        if key not in self._index:
+                            missing.setdefault(key, text)
+                    missing_keys = list(missing)
+                    for start in range(0, len(missing_keys), batch_size):
+                        batch = missing_keys[start:start + batch_size]
+                        vectors = np.asarray(embed_fn([missing[key] for key in batch]), dtype=np.float32)
+                        self._append(batch, vectors)
+            return np.fromiter((self._index[key] for key in keys), dtype=np.int64, count=len(keys))
+
+    def vectors(self, rows):
+        """
+        Unit vectors of the given rows
+
+        Args:
+            rows (ndarray): Row numbers from ``rows_for``
+
+        Returns:
+            ndarray: float32 matrix of shape (len(rows), dim)
+        """
+        return self._vectors[rows]
+
+    def cosine(self, rows_a, rows_b):
+        """
+        Pairwise cosine similarity of rows_a[i] and rows_b[i], in one batched operation
+
+        Args:
+            rows_a (ndarray): Rows of the first texts
+            rows_b (ndarray): Rows of the second texts, same length
+
+        Returns:
+            ndarray: float32 similarity per pair
+        """
+        return np.einsum("ij,ij->i", self._vectors[rows_a], self._vectors[rows_b])
+
+    def cosine_matrix(self, rows_a, rows_b):
+        """
+        Cosine similarity of every row of rows_a against every row of rows_b
+
+        Returns:
+            ndarray: float32 matrix of shape (len(rows_a), len(rows_b))
+        """
+        return self._vectors[rows_a] @ self._vectors[rows_b].T
+
+    def _append(self, keys, vectors):
+        # Caller holds both locks; rows are written at the committed end, over any torn write
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"embedding has {vectors.shape[1]} dimensions, the store holds {self.dim}")
+
+        for path, data, row_size in (
+            (self.vectors_path, vectors.astype(np.float32).tobytes(), self.dim * 4),
+            (self.keys_path, b"".join(keys), KEY_SIZE),
+        ):
+            with open(path, "r+b" if path.exists() else "w+b") as f:
+                f.seek(self.rows * row_size)
+                f.write(data)
+                f.truncate()
+                f.flush()
+                os.fsync(f.fileno())
+
+        tmp_path = self.meta_path.with_name("meta.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "rows": self.rows + len(keys)}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.meta_path)
+        self._refresh()
+
+    def _refresh(self):
+        # Caller holds the lock; picks up rows committed by any process
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return
+        if meta["rows"] <= self.rows:
+            return
+        with open(self.keys_path, "rb") as f:
+            f.seek(self.rows * KEY_SIZE)
+            data = f.read((meta["rows"] - self.rows) * KEY_SIZE)
+        for i in range(0, len(data), KEY_SIZE):
+            self._index[data[i:i + KEY_SIZE]] = self.rows + i // KEY_SIZE
+        self.dim = meta["dim"]
+        self.rows = meta["rows"]
+        self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(self.rows, self.dim))
+
+    @contextmanager
+    def _file_lock(self):
+        with open(self.lock_path, "a+b") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
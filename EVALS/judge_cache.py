@@ -0,0 +1,156 @@
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+
+from dataset import TEST_CASE_FIELDS
+
+DEFAULT_CACHE_PATH = Path("data_set/cache/judge_cache.sqlite3")
+DEFAULT_MAX_BYTES = 256 << 20
+EVICT_TO = 0.9  # Eviction frees space down to this fraction of the budget
+TOUCH_BATCH = 500  # Cache hits whose last_used update is committed together
+
+
+def normalize_test_case(test_case):
+    """
+    Test-case fields in a canonical form, so formatting-only edits still hit
+
+    Args:
+        test_case (LLMTestCase): Test case being scored
+
+    Returns:
+        dict: Field name to value with surrounding whitespace stripped
+    """
+    def normalize(value):
+        if isinstance(value, str):
+            return value.strip()
+        if isinstance(value, (list, tuple)):
+            return [normalize(item) for item in value]
+        return value
+
+    fields = {}
+    for name in TEST_CASE_FIELDS:
+        value = getattr(test_case, name, None)
+        if value is not None:
+            fields[name] = normalize(value)
+    return fields
+
+
+class JudgeCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Persistent cache of judge scores keyed by what determines the score
+
+        The key hashes the metric name and settings, the judge model id and
+        the normalized test-case fields, so only a change to one of those
+        calls the judge again. Least recently used scores are evicted once
+        the stored size exceeds ``max_bytes``.
+
+        Args:
+            path (Path, optional): SQLite database file
+            max_bytes (int, optional): Size budget of the stored scores
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._touched = {}  # key -> last_used not written yet, so hits don't hold a write transaction open
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS scores ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS scores_last_used ON scores (last_used)")
+        self._total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM scores").fetchone()[0]
+        if self._total > self.max_bytes:
+            self._evict()  # The budget may have been lowered since the last run
+            self._conn.commit()
+
+    @staticmethod
+    def key(metric_config, model_id, test_case):
+        """
+        Content hash identifying one judge measurement
+
+        Args:
+            metric_config (dict): ``MetricSpec.config()``
+            model_id (str): Judge model actually used by the metric
+            test_case (LLMTestCase): Test case being scored
+
+        Returns:
+            str: Hex digest
+        """
+        payload = {"metric": metric_config, "model": model_id, "test_case": normalize_test_case(test_case)}
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """
+        Look up a cached score
+
+        Args:
+            key (str): See ``key``
+
+        Returns:
+            dict: Cached score, or None on a miss
+        """
+        row = self._conn.execute("SELECT value FROM scores WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touched[key] = time.time()
+        if len(self._touched) >= TOUCH_BATCH:
+            self._write_touched()
+            self._conn.commit()
+        return json.loads(row[0])
+
+    def put(self, key, value):
+        """
+        Store a score, evicting the least recently used ones if over budget
+
+        Args:
+            key (str): See ``key``
+            value (dict): JSON-serializable score
+        """
+        data = json.dumps(value)
+        size = len(key) + len(data)
+        previous = self._conn.execute("SELECT size FROM scores WHERE key = ?", (key,)).fetchone()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO scores (key, value, size, last_used) VALUES (?, ?, ?, ?)",
+            (key, data, size, time.time()),
+        )
+        self._total += size - (previous[0] if previous else 0)
+        self._touched.pop(key, None)
+        if self._total > self.max_bytes:
+            self._write_touched()  # Eviction goes by last_used
+            self._evict()
+        self._conn.commit()
+
+    def stats(self):
+        """Counters for the run report"""
+        return {"hits": self.hits, "misses": self.misses, "stored_bytes": self._total}
+
+    def close(self):
+        self._write_touched()
+        self._conn.commit()
+        self._conn.close()
+
+    def _write_touched(self):
+        if self._touched:
+            self._conn.executemany("UPDATE scores SET last_used = ? WHERE key = ?",
+                                   [(last_used, key) for key, last_used in self._touched.items()])
+            self._touched = {}
+
+    def _evict(self):
+        target = self.max_bytes * EVICT_TO
+        rows = self._conn.execute("SELECT key, size FROM scores ORDER BY last_used")
+        evicted = []
+        for key, size in rows:
+            if self._total <= target:
+                break
+            evicted.append((key,))
+            self._total -= size
+        self._conn.executemany("DELETE FROM scores WHERE key = ?", evicted)
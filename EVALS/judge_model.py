@@ -0,0 +1,59 @@
+import functools
+
+from deepeval.metrics.utils import initialize_model
+from deepeval.models import DeepEvalBaseLLM
+from tenacity import stop_after_attempt
+
+from scheduler import estimate_prompt_tokens
+
+
+class ScheduledModel(DeepEvalBaseLLM):
+    def __init__(self, model, scheduler):
+        """
+        A deepeval judge model whose every request passes through a JudgeScheduler
+
+        A deepeval metric sends several judge requests per test case, e.g.
+        statements, verdicts and reason, so the rate limits are applied to
+        each model call rather than to a whole measurement. The scheduler
+        does the retrying: the wrapped model's calls get a single attempt
+        of deepeval's retry decorator, so the two don't multiply the
+        attempts against a rate-limited endpoint. Other deepeval models in
+        the process keep their retry settings.
+
+        Args:
+            model (str or DeepEvalBaseLLM): Judge model id, deepeval's default
+                when None, or a model instance to wrap
+            scheduler (JudgeScheduler): Paces and retries the calls
+        """
+        self.inner, self._native = initialize_model(model)
+        self.scheduler = scheduler
+        super().__init__(self.inner.get_model_name())
+
+    def load_model(self, *args, **kwargs):
+        return self.inner
+
+    def generate(self, prompt, *args, **kwargs):
+        # Metrics run with async_mode, so only a_generate is rate limited
+        return self._unwrap(self._single_attempt("generate")(prompt, *args, **kwargs))
+
+    async def a_generate(self, prompt, *args, **kwargs):
+        a_generate = self._single_attempt("a_generate")
+        result = await self.scheduler.call(lambda: a_generate(prompt, *args, **kwargs), estimate_prompt_tokens(prompt))
+        return self._unwrap(result)
+
+    def _single_attempt(self, name):
+        # deepeval's models retry inside tenacity-decorated methods; retry_with overrides the stop for these calls only
+        method = getattr(type(self.inner), name, None)
+        retry_with = getattr(method, "retry_with", None)
+        if retry_with is None:
+            return getattr(self.inner, name)  # A custom model without deepeval's retries
+        return functools.partial(retry_with(stop=stop_after_attempt(1)), self.inner)
+
+    def get_model_name(self, *args, **kwargs):
+        return self.inner.get_model_name()
+
+    def _unwrap(self, result):
+        # deepeval's own models return (output, cost); a wrapped model is not native, so return the output
+        if self._native and isinstance(result, tuple) and len(result) == 2:
+            return result[0]
+        return result
@@ -0,0 +1,208 @@
+import threading
+
+import numpy as np
+import pyarrow.compute as pc
+
+from results_store import STORE_FOLDER, ResultsStore, not_applicable, reason_column, score_column
+
+PERCENTILES = (5, 25, 50, 75, 95, 99)
+HISTOGRAM_BINS = 20
+
+_runs = {}
+_runs_lock = threading.Lock()
+
+
+def get_run_aggregates(run_id, store_root=STORE_FOLDER):
+    """
+    Return the process-wide aggregates of a stored run
+
+    Stored runs never change, so their arrays and summaries are memoized
+    for the life of the process.
+
+    Args:
+        run_id (str): Run id
+        store_root (Path, optional): Results store folder
+
+    Returns:
+        RunAggregates: Shared aggregates
+    """
+    key = (str(store_root), run_id)
+    with _runs_lock:
+        if key not in _runs:
+            _runs[key] = RunAggregates(ResultsStore(store_root), run_id)
+        return _runs[key]
+
+
+class MetricScores:
+    def __init__(self, folder_scores, folders):
+        """
+        Scores of one metric over a run, sorted for fast threshold queries
+
+        Rows are grouped by folder and sorted within each folder, so every
+        folder is a contiguous sorted slice. Pass rates for any threshold
+        and histograms are then binary searches instead of passes over the
+        rows.
+
+        Args:
+            folder_scores (list): One float32 array per folder, NaN where the judge call failed
+            folders (list): Folder names
+        """
+        self.folders = folders
+        self.errors = np.array([np.count_nonzero(np.isnan(scores)) for scores in folder_scores], dtype=np.int64)
+        # np.sort puts NaN last, so dropping the errors is a truncation
+        slices = [np.sort(scores)[:len(scores) - errors] for scores, errors in zip(folder_scores, self.errors)]
+        self.scores = np.concatenate(slices) if slices else np.zeros(0, np.float32)
+        # bounds[i]:bounds[i + 1] is the slice of folder i
+        self.bounds = np.concatenate([[0], np.cumsum([len(s) for s in slices], dtype=np.int64)])
+        self.sums = np.array([s.sum(dtype=np.float64) for s in slices])
+
+
+class RunAggregates:
+    def __init__(self, store, run_id):
+        """
+        NumPy aggregation over the stored scores of one run
+
+        Args:
+            store (ResultsStore): Store the run was written to
+            run_id (str): Run id
+        """
+        self.store = store
+        self.run_id = run_id
+        self.entries = store.entries(run_id)
+        self.folders = sorted({entry["dataset"].split("/")[0] for entry in self.entries})
+        self.metrics = sorted({metric for entry in self.entries for metric in entry["metrics"]})
+        self._scores = {}
+        self._percentiles = {}  # (metric, folders) -> percentiles; they don't depend on the threshold
+        self._lock = threading.Lock()
+
+    def scores(self, metric):
+        """
+        Load one metric's scores, once per process
+
+        Args:
+            metric (str): Metric name
+
+        Returns:
+            MetricScores: Sorted scores with folder slices
+        """
+        with self._lock:
+            if metric not in self._scores:
+                self._scores[metric] = self._load(metric)
+            return self._scores[metric]
+
+    def summary(self, metric, threshold, folders=None):
+        """
+        Count, mean, pass rate and percentiles of a metric
+
+        Args:
+            metric (str): Metric name
+            threshold (float): Scores at or above this pass
+            folders (list, optional): Only these folders; all when None
+
+        Returns:
+            dict: Aggregates over the selected folders
+        """
+        data = self.scores(metric)
+        slices = self._slices(data, folders)
+        count = sum(stop - start for start, stop in slices)
+        summary = {
+            "count": count,
+            "errors": int(sum(data.errors[i] for i in self._folder_indices(folders))),
+            "mean": None,
+            "pass_rate": None,
+            "percentiles": {},
+        }
+        if not count:
+            return summary
+
+        sums = data.sums[self._folder_indices(folders)]
+        threshold = data.scores.dtype.type(threshold)  # A float64 needle would copy the float32 slice
+        passed = sum(stop - (start + np.searchsorted(data.scores[start:stop], threshold)) for start, stop in slices)
+        summary["mean"] = float(sums.sum() / count)
+        summary["pass_rate"] = passed / count
+        summary["percentiles"] = self._percentiles_of(metric, data, slices, count)
+        return summary
+
+    def histogram(self, metric, folders=None, bins=HISTOGRAM_BINS):
+        """
+        Score histogram over [0, 1]
+
+        Args:
+            metric (str): Metric name
+            folders (list, optional): Only these folders; all when None
+            bins (int, optional): Number of equal-width bins
+
+        Returns:
+            tuple: (counts, bin edges) as ndarrays
+        """
+        data = self.scores(metric)
+        edges = np.linspace(0.0, 1.0, bins + 1, dtype=data.scores.dtype)
+        counts = np.zeros(bins, dtype=np.int64)
+        for start, stop in self._slices(data, folders):
+            # Each slice is sorted, so bin counts are differences of search positions
+            counts += np.diff(np.searchsorted(data.scores[start:stop], edges[1:], side="right"), prepend=0)
+        return counts, edges
+
+    def by_folder(self, metric, threshold):
+        """
+        Per-folder count, mean and pass rate
+
+        Args:
+            metric (str): Metric name
+            threshold (float): Scores at or above this pass
+
+        Returns:
+            list: One dict per folder
+        """
+        data = self.scores(metric)
+        rows = []
+        for i, folder in enumerate(self.folders):
+            start, stop = data.bounds[i], data.bounds[i + 1]
+            count = int(stop - start)
+            passed = count - int(np.searchsorted(data.scores[start:stop], data.scores.dtype.type(threshold)))
+            rows.append({
+                "folder": folder,
+                "count": count,
+                "errors": int(data.errors[i]),
+                "mean": float(data.sums[i] / count) if count else None,
+                "median": float(data.scores[start + (count - 1) // 2]) if count else None,
+                "pass_rate": passed / count if count else None,
+            })
+        return rows
+
+    def _percentiles_of(self, metric, data, slices, count):
+        key = (metric, tuple(slices))
+        if key not in self._percentiles:
+            positions = np.round(np.array(PERCENTILES) / 100 * (count - 1)).astype(np.int64)
+            if len(slices) == 1:
+                values = data.scores[slices[0][0]:slices[0][1]][positions]
+            else:
+                # Selection instead of a full sort of the concatenated folders
+                selected = np.concatenate([data.scores[start:stop] for start, stop in slices])
+                values = np.partition(selected, positions)[positions]
+            self._percentiles[key] = {p: float(v) for p, v in zip(PERCENTILES, values)}
+        return self._percentiles[key]
+
+    def _folder_indices(self, folders):
+        if folders is None:
+            return list(range(len(self.folders)))
+        return [i for i, folder in enumerate(self.folders) if folder in folders]
+
+    def _slices(self, data, folders):
+        return [(data.bounds[i], data.bounds[i + 1]) for i in self._folder_indices(folders)]
+
+    def _load(self, metric):
+        column, reasons = score_column(metric), reason_column(metric)
+        by_folder = {folder: [] for folder in self.folders}
+        for entry in self.entries:
+            if metric not in entry["metrics"]:
+                continue
+            table = self.store.load(self.run_id, [entry["dataset"]], [column, reasons])
+            scores = table[column]
+            if reasons in table.column_names:
+                # Rows the metric does not apply to are left out instead of counted as errors
+                scores = pc.filter(scores, pc.invert(not_applicable(scores, table[reasons])))
+            values = pc.fill_null(scores, np.nan).to_numpy().astype(np.float32, copy=False)
+            by_folder[entry["dataset"].split("/")[0]].append(values)
+        folder_scores = [np.concatenate(arrays) if arrays else np.zeros(0, np.float32) for arrays in by_folder.values()]
+        return MetricScores(folder_scores, self.folders)
@@ -0,0 +1,91 @@
+import hashlib
+import json
+
+from deepeval import metrics as deepeval_metrics
+
+import semantic_similarity
+from batch_judge import BATCH_METRICS
+
+DEFAULT_METRICS = ["answer_relevancy", "faithfulness"]
+DEFAULT_THRESHOLD = 0.5
+
+# CLI metric name -> deepeval metric class name
+METRIC_CLASSES = {
+    "answer_relevancy": "AnswerRelevancyMetric",
+    "faithfulness": "FaithfulnessMetric",
+    "contextual_precision": "ContextualPrecisionMetric",
+    "contextual_recall": "ContextualRecallMetric",
+    "contextual_relevancy": "ContextualRelevancyMetric",
+    "hallucination": "HallucinationMetric",
+}
+
+# Metrics implemented here rather than in deepeval; their model is an embedding model
+LOCAL_METRIC_CLASSES = {
+    "semantic_similarity": semantic_similarity.SemanticSimilarityMetric,
+}
+EMBEDDING_METRICS = {"semantic_similarity"}
+# Metrics comparing the actual with the expected output; a record without an
+# actual_output is scored on its expected_output, which they would compare to itself
+REFERENCE_METRICS = {"semantic_similarity"}
+
+
+class MetricSpec:
+    def __init__(self, name, threshold=DEFAULT_THRESHOLD, model=None, batch_size=1):
+        """
+        Configuration of one metric, used to build a fresh instance per test case
+
+        deepeval metrics keep the score of their last measurement on the
+        instance, so concurrent cases must not share one.
+
+        Args:
+            name (str): Key of METRIC_CLASSES or LOCAL_METRIC_CLASSES
+            threshold (float, optional): Passing score
+            model (str, optional): Judge model id, or embedding model id for
+                EMBEDDING_METRICS; the metric's default when None
+            batch_size (int, optional): Cases scored per judge prompt; above 1 the
+                metric is judged by a BatchJudge instead of deepeval
+        """
+        if name not in METRIC_CLASSES and name not in LOCAL_METRIC_CLASSES:
+            names = [*METRIC_CLASSES, *LOCAL_METRIC_CLASSES]
+            raise ValueError(f"Unknown metric '{name}', expected one of {', '.join(names)}")
+        if batch_size > 1 and name not in BATCH_METRICS:
+            raise ValueError(f"Metric '{name}' cannot be batched, expected one of {', '.join(BATCH_METRICS)}")
+        self.name = name
+        self.threshold = threshold
+        self.model = model
+        self.batch_size = batch_size
+
+    def build(self, judge_model=None):
+        """
+        Create a new deepeval metric instance
+
+        Args:
+            judge_model (DeepEvalBaseLLM, optional): Model instance to judge with instead
+                of ``model``, e.g. a ScheduledModel; ignored by LOCAL_METRIC_CLASSES
+        """
+        if self.name in LOCAL_METRIC_CLASSES:
+            metric_class, judge_model = LOCAL_METRIC_CLASSES[self.name], None
+        else:
+            metric_class = getattr(deepeval_metrics, METRIC_CLASSES[self.name])
+        kwargs = {"threshold": self.threshold, "include_reason": True, "async_mode": True}
+        if judge_model is not None:
+            kwargs["model"] = judge_model
+        elif self.model:
+            kwargs["model"] = self.model
+        return metric_class(**kwargs)
+
+    def applies_to(self, record):
+        """Whether the metric can score a record, see REFERENCE_METRICS"""
+        return self.name not in REFERENCE_METRICS or record.get("actual_output") is not None
+
+    def config(self):
+        """Settings that change the score, e.g. for cache keys and run reports"""
+        config = {"name": self.name, "threshold": self.threshold, "model": self.model}
+        if self.batch_size > 1:
+            # Batched prompts score differently from deepeval's; single-case configs keep their digests
+            config["batch_size"] = self.batch_size
+        return config
+
+    def digest(self):
+        """Short hash of ``config()``, stored with each score to tell reusable scores apart"""
+        return hashlib.sha1(json.dumps(self.config(), sort_keys=True).encode("utf-8")).hexdigest()[:12]
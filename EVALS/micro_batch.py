@@ -0,0 +1,65 @@
+import asyncio
+
+
+class MicroBatcher:
+    def __init__(self, batch_size, max_wait):
+        """
+        Collect requests from concurrent coroutines and serve them in batches
+
+        Requests arriving within ``max_wait`` of each other share a batch; a
+        full batch is sent at once. Subclasses implement ``_score_batch``.
+
+        Args:
+            batch_size (int): Requests that trigger an immediate flush
+            max_wait (float): Seconds to wait for a batch to fill
+        """
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self._pending = []  # (request, future)
+        self._timer = None
+        self._tasks = set()  # The event loop only keeps weak references to running tasks
+
+    async def submit(self, request):
+        """
+        Add a request to the next batch and wait for its result
+
+        Args:
+            request: Whatever ``_score_batch`` takes a list of
+
+        Returns:
+            The result ``_score_batch`` gave for this request
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((request, future))
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    async def _score_batch(self, requests):
+        """Return one result per request, in order"""
+        raise NotImplementedError
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        if pending:
+            task = asyncio.ensure_future(self._run(pending))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, pending):
+        try:
+            results = await self._score_batch([request for request, _ in pending])
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(pending, results):
+            if not future.done():  # The caller may have been cancelled
+                future.set_result(result)
@@ -0,0 +1,54 @@
+import json
+from pathlib import Path
+
+
+class PreviousResults:
+    def __init__(self, results_path):
+        """
+        Scores from the last completed run of an input file, looked up by record fingerprint
+
+        New results are written to a ResultLog and only replace the results
+        file once the run is complete, so the file read here stays intact
+        for the whole run. Only the byte offset of each row is kept in
+        memory. Rows are matched by fingerprint rather than line number, so
+        records that merely moved keep their scores.
+
+        Args:
+            results_path (Path): Results file of the last completed run
+        """
+        self.path = Path(results_path)
+        self._offsets = {}  # fingerprint -> byte offset of its row
+        self._file = None
+        if self.path.exists():
+            self._file = open(self.path, "rb")
+            offset = 0
+            for line in self._file:
+                if line.strip():
+                    row = json.loads(line)
+                    if "fingerprint" in row and "error" not in row:
+                        self._offsets[row["fingerprint"]] = offset
+                offset += len(line)
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def lookup(self, record_fingerprint):
+        """
+        Find the previous result row of a record
+
+        Args:
+            record_fingerprint (str): See ``dataset.fingerprint``
+
+        Returns:
+            dict: Previous result row, or None if the record is new or changed
+        """
+        offset = self._offsets.get(record_fingerprint)
+        if offset is None:
+            return None
+        self._file.seek(offset)
+        return json.loads(self._file.readline())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,194 @@
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+FLUSH_ROWS = 500  # Rows buffered before a segment write is fsynced
+FLUSH_SECONDS = 2.0  # Longest time a finished row stays only in memory
+SEGMENT_ROWS = 50_000  # Rows per segment file before starting the next one
+CHECKPOINT_NAME = "checkpoint.json"
+
+
+def _has_failed_metric(row):
+    return any("error" in score for score in row["metrics"].values())
+
+
+def _fsync_dir(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _write_atomic(path, data):
+    # Readers see either the old or the new file, never a partial one
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    _fsync_dir(path.parent)
+
+
+class ResultLog:
+    def __init__(self, results_path, run_key):
+        """
+        Crash-safe, resumable result stream for one input file
+
+        Rows are appended to JSONL segment files in a hidden run folder next
+        to the results file, in fsynced batches. After every batch a small
+        checkpoint records how many bytes of each segment are committed. On
+        restart, bytes past the checkpoint are cut off and the committed
+        rows tell which cases are already done. A row with a failed metric,
+        e.g. a judge timeout, does not count as done: the case is evaluated
+        again on restart and only its latest row is kept. ``finalize`` joins
+        the segments into the results file and removes the run folder.
+
+        A checkpoint written for a different ``run_key``, e.g. after the
+        input file or the metric settings changed, is discarded.
+
+        Args:
+            results_path (Path): Final results file
+            run_key (dict): Identifies the input version and run settings
+        """
+        self.results_path = Path(results_path)
+        self.run_folder = self.results_path.with_name(f".{self.results_path.name}.run")
+        self.checkpoint_path = self.run_folder / CHECKPOINT_NAME
+        self.run_key = run_key
+        self.segments = []  # [name, committed bytes, committed rows]
+        self.resumed = 0
+        self._done = bytearray()  # Line number -> 1 once its row is committed
+        self._failed = set()  # Lines whose latest committed row has a failed metric
+        self._superseded = {}  # Line number -> committed rows replaced by a later row
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        self._file = None
+
+        checkpoint = self._read_checkpoint()
+        if checkpoint is not None and checkpoint["run_key"] == run_key:
+            self._resume(checkpoint)
+        else:
+            shutil.rmtree(self.run_folder, ignore_errors=True)
+        self.run_folder.mkdir(parents=True, exist_ok=True)
+
+    def is_done(self, line_number):
+        """Whether a committed row for this line exists from an interrupted run"""
+        return line_number < len(self._done) and self._done[line_number]
+
+    def append(self, row):
+        """
+        Queue a result row; it is committed with the next batch
+
+        Args:
+            row (dict): Result row with a ``line`` number
+        """
+        self._buffer.append(row)
+        if len(self._buffer) >= FLUSH_ROWS or time.monotonic() - self._last_flush >= FLUSH_SECONDS:
+            self.flush()
+
+    def flush(self):
+        """Write, fsync and checkpoint the buffered rows."""
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        if not self.segments or self.segments[-1][2] >= SEGMENT_ROWS:
+            self._start_segment()
+
+        data = b"".join(json.dumps(row).encode("utf-8") + b"\n" for row in self._buffer)
+        self._file.write(data)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+        segment = self.segments[-1]
+        segment[1] += len(data)
+        segment[2] += len(self._buffer)
+        self._write_checkpoint()
+        for row in self._buffer:
+            self._commit_row(row)
+        self._buffer = []
+
+    def finalize(self):
+        """
+        Replace the results file with the committed rows and drop the run folder
+
+        Safe to repeat: if this is interrupted, the checkpoint is still there
+        and the next run finalizes the same rows again.
+        """
+        self.flush()
+        self.close()
+        tmp_path = self.results_path.with_name(self.results_path.name + ".tmp")
+        skip = dict(self._superseded)
+        with open(tmp_path, "wb") as out:
+            for name, length, _ in self.segments:
+                with open(self.run_folder / name, "rb") as src:
+                    if not skip:
+                        shutil.copyfileobj(src, out)
+                        continue
+                    for data in src:
+                        # Drop the failed rows of cases that were evaluated again
+                        line_number = json.loads(data)["line"]
+                        if skip.get(line_number):
+                            skip[line_number] -= 1
+                            continue
+                        out.write(data)
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp_path, self.results_path)
+        _fsync_dir(self.results_path.parent)
+        shutil.rmtree(self.run_folder, ignore_errors=True)
+
+    def close(self):
+        """Commit what is buffered and keep the checkpoint for a later resume."""
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _start_segment(self):
+        if self._file is not None:
+            self._file.close()
+        name = f"segment-{len(self.segments):05d}.jsonl"
+        self.segments.append([name, 0, 0])
+        self._file = open(self.run_folder / name, "wb")
+        _fsync_dir(self.run_folder)
+
+    def _resume(self, checkpoint):
+        for name, length, rows in checkpoint["segments"]:
+            segment_path = self.run_folder / name
+            with open(segment_path, "r+b") as f:
+                f.truncate(length)  # Drop rows written after the last checkpoint
+                for line in f:
+                    self._commit_row(json.loads(line))
+            self.segments.append([name, length, rows])
+            self.resumed += rows
+        if self.segments:
+            self._file = open(self.run_folder / self.segments[-1][0], "ab")
+
+    def _commit_row(self, row):
+        line_number = row["line"]
+        if line_number in self._failed:
+            self._superseded[line_number] = self._superseded.get(line_number, 0) + 1
+        if _has_failed_metric(row):
+            self._failed.add(line_number)
+        else:
+            self._failed.discard(line_number)
+            self._mark_done(line_number)
+
+    def _mark_done(self, line_number):
+        if line_number >= len(self._done):
+            self._done.extend(bytes(line_number + 1 - len(self._done)))
+        self._done[line_number] = 1
+
+    def _read_checkpoint(self):
+        try:
+            with open(self.checkpoint_path, "rb") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _write_checkpoint(self):
+        checkpoint = {"run_key": self.run_key, "segments": self.segments}
+        _write_atomic(self.checkpoint_path, json.dumps(checkpoint).encode("utf-8"))
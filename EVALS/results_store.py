@@ -0,0 +1,189 @@
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+STORE_FOLDER = Path("data_set/Results/store")
+INDEX_NAME = "index.json"
+ROW_GROUP_ROWS = 64_000
+NOT_APPLICABLE = "not applicable"  # Reason prefix of a metric that does not apply to a row; its null score is no error
+
+
+def score_column(metric):
+    return f"{metric}.score"
+
+
+def success_column(metric):
+    return f"{metric}.success"
+
+
+def reason_column(metric):
+    return f"{metric}.reason"
+
+
+def not_applicable(scores, reasons):
+    """
+    Mask of the rows a metric did not apply to, see NOT_APPLICABLE
+
+    Args:
+        scores (pyarrow.Array): Score column of the metric
+        reasons (pyarrow.Array): Reason column of the metric
+
+    Returns:
+        pyarrow.Array: True where the null score is not an error
+    """
+    return pc.and_(pc.is_null(scores), pc.starts_with(pc.fill_null(reasons, ""), NOT_APPLICABLE))
+
+
+class ResultsStore:
+    def __init__(self, root=STORE_FOLDER):
+        """
+        Columnar copy of evaluation results, one Parquet file per run and dataset
+
+        Each metric gets its own score, success and reason columns, so a page
+        that plots scores reads only the score columns of the runs it shows.
+        ``index.json`` lists every stored (run id, dataset) with its row and
+        row-group counts, so picking a run never scans the store.
+
+        Args:
+            root (Path, optional): Store folder
+        """
+        self.root = Path(root)
+        self.index_path = self.root / INDEX_NAME
+
+    def runs(self):
+        """
+        List the stored runs, newest first
+
+        Returns:
+            list: Run ids
+        """
+        return sorted({entry["run_id"] for entry in self._read_index()}, reverse=True)
+
+    def entries(self, run_id):
+        """
+        Index entries of one run
+
+        Args:
+            run_id (str): Run id
+
+        Returns:
+            list: One dict per dataset with path, rows, row_groups and metrics
+        """
+        return [entry for entry in self._read_index() if entry["run_id"] == run_id]
+
+    def add_run(self, run_id, dataset, results_path, metrics):
+        """
+        Convert a finished results JSONL file into the store
+
+        Rows are converted in row-group sized batches, so memory stays flat
+        however large the results file is.
+
+        Args:
+            run_id (str): Run id
+            dataset (str): Input file path relative to the inputs folder
+            results_path (Path): Results JSONL written by the runner
+            metrics (list): Metric names to store columns for
+
+        Returns:
+            dict: The new index entry
+        """
+        path = self.root / run_id / (dataset.replace("/", "__") + ".parquet")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        schema = self._schema(metrics)
+        rows = 0
+        tmp_path = path.with_name(path.name + ".tmp")
+        with pq.ParquetWriter(tmp_path, schema) as writer:
+            for batch in self._iter_batches(results_path, metrics, schema):
+                writer.write_table(batch, row_group_size=ROW_GROUP_ROWS)
+                rows += batch.num_rows
+        os.replace(tmp_path, path)
+
+        entry = {
+            "run_id": run_id,
+            "dataset": dataset,
+            "path": str(path.relative_to(self.root)),
+            "rows": rows,
+            "row_groups": pq.ParquetFile(path).num_row_groups,
+            "metrics": list(metrics),
+            "created": datetime.now().isoformat(timespec="seconds"),
+        }
+        index = [e for e in self._read_index() if (e["run_id"], e["dataset"]) != (run_id, dataset)]
+        index.append(entry)
+        self._write_index(index)
+        return entry
+
+    def load(self, run_id, datasets=None, columns=None):
+        """
+        Read selected columns of a run
+
+        Args:
+            run_id (str): Run id
+            datasets (list, optional): Only these datasets; all when None
+            columns (list, optional): Column names to read; all when None
+
+        Returns:
+            pyarrow.Table: Rows of the selected datasets, with a ``dataset`` column
+        """
+        tables = []
+        for entry in self.entries(run_id):
+            if datasets is not None and entry["dataset"] not in datasets:
+                continue
+            wanted = None
+            if columns is not None:
+                available = set(pq.read_schema(self.root / entry["path"]).names)
+                wanted = [name for name in columns if name in available]
+            table = pq.read_table(self.root / entry["path"], columns=wanted, memory_map=True)
+            dataset = pa.DictionaryArray.from_arrays(np.zeros(table.num_rows, dtype=np.int32), [entry["dataset"]])
+            tables.append(table.append_column("dataset", dataset))
+        if not tables:
+            return pa.table({})
+        return pa.concat_tables(tables, promote_options="default")
+
+    def _schema(self, metrics):
+        fields = [pa.field("line", pa.int32())]
+        for metric in metrics:
+            fields += [
+                pa.field(score_column(metric), pa.float32()),
+                pa.field(success_column(metric), pa.bool_()),
+                pa.field(reason_column(metric), pa.string()),
+            ]
+        return pa.schema(fields)
+
+    def _iter_batches(self, results_path, metrics, schema):
+        columns = {name: [] for name in schema.names}
+        with open(results_path, "rb") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                row = json.loads(line)
+                columns["line"].append(row["line"])
+                for metric in metrics:
+                    score = row["metrics"].get(metric, {})
+                    columns[score_column(metric)].append(score.get("score"))
+                    columns[success_column(metric)].append(score.get("success"))
+                    columns[reason_column(metric)].append(score.get("reason") or score.get("error"))
+                if len(columns["line"]) >= ROW_GROUP_ROWS:
+                    yield pa.table(columns, schema=schema)
+                    columns = {name: [] for name in schema.names}
+        if columns["line"]:
+            yield pa.table(columns, schema=schema)
+
+    def _read_index(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+
+    def _write_index(self, index):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_name(INDEX_NAME + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f, indent=4)
+        os.replace(tmp_path, self.index_path)
@@ -0,0 +1,208 @@
+import asyncio
+import random
+import time
+
+DEFAULT_MAX_RETRIES = 6
+BACKOFF_BASE = 1.0  # Seconds; doubled per attempt, then jittered
+BACKOFF_CAP = 60.0
+DECREASE_FACTOR = 0.5  # Concurrency multiplier on a rate limit
+DECREASE_COOLDOWN = 2.0  # Seconds during which further 429s don't shrink the limit again
+PROMPT_OVERHEAD_TOKENS = 800  # Judge prompt template tokens added to each call's estimate
+
+
+def status_code(exc):
+    """HTTP status of an API error from the openai client, if any"""
+    code = getattr(exc, "status_code", None)
+    if code is None:
+        code = getattr(getattr(exc, "response", None), "status_code", None)
+    return code
+
+
+def is_rate_limit(exc):
+    return status_code(exc) == 429 or type(exc).__name__ == "RateLimitError"
+
+
+def is_retryable(exc):
+    """Rate limits, server errors, timeouts and dropped connections are worth retrying"""
+    code = status_code(exc)
+    if is_rate_limit(exc) or (code is not None and code >= 500):
+        return True
+    return type(exc).__name__ in ("APITimeoutError", "APIConnectionError", "TimeoutError")
+
+
+def retry_after(exc):
+    """Seconds the server asked us to wait, from the Retry-After header"""
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after-ms")) / 1000
+    except (TypeError, ValueError):
+        pass
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class AsyncTokenBucket:
+    def __init__(self, per_minute):
+        """
+        Allowance of requests or tokens refilled continuously over a minute
+
+        Args:
+            per_minute (float): Capacity per minute; 0 or None disables the limit
+        """
+        self.per_minute = per_minute or 0
+        self.available = float(self.per_minute)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, amount=1):
+        """Wait until ``amount`` is available and spend it; waiters are served in order."""
+        if not self.per_minute:
+            return
+        amount = min(amount, self.per_minute)  # A single huge call must still get through
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.available = min(self.per_minute, self.available + (now - self.updated) * self.per_minute / 60)
+                self.updated = now
+                if self.available >= amount:
+                    self.available -= amount
+                    return
+                await asyncio.sleep((amount - self.available) * 60 / self.per_minute)
+
+
+class JudgeScheduler:
+    def __init__(self, max_concurrency, rpm=0, tpm=0, initial_concurrency=None, max_retries=DEFAULT_MAX_RETRIES):
+        """
+        Pace judge calls to the endpoint's limits and adapt to its 429s
+
+        Calls pass two token buckets, one for requests and one for estimated
+        tokens per minute, then wait for a concurrency slot. The number of
+        slots grows by about one per round of successful calls and halves
+        on a rate limit (AIMD), so it settles just under what the endpoint
+        accepts. Retryable failures are retried with full-jitter
+        exponential backoff, or after the server's Retry-After.
+
+        Args:
+            max_concurrency (int): Upper bound on concurrent calls
+            rpm (int, optional): Requests per minute; 0 for no limit
+            tpm (int, optional): Tokens per minute; 0 for no limit
+            initial_concurrency (int, optional): Starting limit; max_concurrency when None
+            max_retries (int, optional): Retries per call before giving up
+        """
+        self.max_concurrency = max_concurrency
+        self.limit = float(initial_concurrency or max_concurrency)
+        self.max_retries = max_retries
+        self.requests = AsyncTokenBucket(rpm)
+        self.tokens = AsyncTokenBucket(tpm)
+        self.in_flight = 0
+        self.queued = 0
+        self.calls = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.failures = 0
+        self._last_decrease = 0.0
+        self._slots = asyncio.Condition()
+
+    async def call(self, fn, tokens=0):
+        """
+        Run ``await fn()`` under the rate limits, retrying retryable errors
+
+        Args:
+            fn (callable): Returns a new awaitable on every attempt
+            tokens (int, optional): Estimated tokens the call consumes
+
+        Returns:
+            object: Result of the successful attempt
+
+        Raises:
+            Exception: The last error once retries are exhausted or for non-retryable errors
+        """
+        for attempt in range(self.max_retries + 1):
+            self.queued += 1
+            try:
+                await self.requests.acquire(1)
+                await self.tokens.acquire(tokens)
+                await self._acquire_slot()
+            finally:
+                self.queued -= 1
+
+            self.calls += 1
+            error = None
+            try:
+                result = await fn()
+            except Exception as e:
+                error = e
+            else:
+                self._increase()
+            finally:
+                # Also when the task is cancelled, so the slot is never lost
+                await self._release_slot()
+            if error is None:
+                return result
+
+            if is_rate_limit(error):
+                self.rate_limited += 1
+                self._decrease()
+            if not is_retryable(error) or attempt == self.max_retries:
+                self.failures += 1
+                raise error
+            self.retries += 1
+            await asyncio.sleep(self._backoff(attempt, error))
+
+    def gauges(self):
+        """Live view of the scheduler, for progress output and run reports"""
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "concurrency_limit": round(self.limit, 2),
+            "calls": self.calls,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "failures": self.failures,
+        }
+
+    async def _acquire_slot(self):
+        async with self._slots:
+            await self._slots.wait_for(lambda: self.in_flight < max(1, int(self.limit)))
+            self.in_flight += 1
+
+    async def _release_slot(self):
+        async with self._slots:
+            self.in_flight -= 1
+            self._slots.notify_all()
+
+    def _increase(self):
+        # Additive increase: about +1 slot once every slot has completed a call
+        self.limit = min(self.max_concurrency, self.limit + 1 / max(self.limit, 1))
+
+    def _decrease(self):
+        # Multiplicative decrease, once per cooldown so a burst of 429s from one window counts once
+        now = time.monotonic()
+        if now - self._last_decrease >= DECREASE_COOLDOWN:
+            self.limit = max(1.0, self.limit * DECREASE_FACTOR)
+            self._last_decrease = now
+
+    def _backoff(self, attempt, exc):
+        delay = retry_after(exc)
+        if delay is not None:
+            return delay + random.uniform(0, BACKOFF_BASE)
+        return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+def estimate_prompt_tokens(prompt):
+    """Rough size of one judge prompt, about four characters per token"""
+    return len(str(prompt)) // 4
+
+
+def estimate_tokens(test_case, overhead=PROMPT_OVERHEAD_TOKENS):
+    """Rough prompt size of one judge call for a test case, including ``overhead`` template tokens"""
+    text = 0
+    for name in ("input", "actual_output", "expected_output", "retrieval_context", "context"):
+        value = getattr(test_case, name, None)
+        if isinstance(value, str):
+            text += len(value)
+        elif isinstance(value, (list, tuple)):
+            text += sum(len(str(item)) for item in value)
+    return overhead + text // 4
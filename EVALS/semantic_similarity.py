@@ -0,0 +1,111 @@
+import asyncio
+import re
+import threading
+
+from deepeval.metrics import BaseMetric
+
+from embedding_store import EMBED_BATCH_SIZE, EMBEDDINGS_FOLDER, EmbeddingStore, openai_embedder
+from micro_batch import MicroBatcher
+
+DEFAULT_EMBEDDING_MODEL = "text-embedding-3-small"
+MAX_WAIT = 0.02  # Seconds a pair waits for more pairs before its batch is scored
+
+_batchers = {}
+_batchers_lock = threading.Lock()
+
+
+def get_batcher(model):
+    """
+    Return the process-wide similarity batcher for an embedding model
+
+    Args:
+        model (str): Embedding model id
+
+    Returns:
+        SimilarityBatcher: Shared batcher with its embedding store
+    """
+    with _batchers_lock:
+        if model not in _batchers:
+            store = EmbeddingStore(EMBEDDINGS_FOLDER / re.sub(r"[^\w.-]", "_", model))
+            _batchers[model] = SimilarityBatcher(store, openai_embedder(model))
+        return _batchers[model]
+
+
+class SimilarityBatcher(MicroBatcher):
+    def __init__(self, store, embed_fn, batch_size=EMBED_BATCH_SIZE, max_wait=MAX_WAIT):
+        """
+        Collect similarity requests from concurrent test cases and score them together
+
+        Pairs arriving within ``max_wait`` of each other are scored as one
+        batch: unseen texts are embedded in a single request and all cosine
+        scores come from one matrix operation.
+
+        Args:
+            store (EmbeddingStore): Store the vectors are kept in
+            embed_fn (callable): fn(texts) -> list of vectors
+            batch_size (int, optional): Pairs that trigger an immediate flush
+            max_wait (float, optional): Seconds to wait for a batch to fill
+        """
+        super().__init__(batch_size, max_wait)
+        self.store = store
+        self.embed_fn = embed_fn
+
+    async def score(self, text_a, text_b):
+        """
+        Cosine similarity of two texts
+
+        Args:
+            text_a (str): First text
+            text_b (str): Second text
+
+        Returns:
+            float: Similarity in [-1, 1]
+        """
+        return await self.submit((text_a, text_b))
+
+    async def _score_batch(self, pairs):
+        texts = [a for a, _ in pairs] + [b for _, b in pairs]
+        # Embedding requests block, so they run off the event loop
+        rows = await asyncio.get_running_loop().run_in_executor(None, self.store.rows_for, texts, self.embed_fn)
+        return [float(score) for score in self.store.cosine(rows[:len(pairs)], rows[len(pairs):])]
+
+
+class SemanticSimilarityMetric(BaseMetric):
+    def __init__(self, threshold=0.5, model=DEFAULT_EMBEDDING_MODEL, include_reason=True, async_mode=True):
+        """
+        Embedding similarity between the actual and expected output
+
+        Args:
+            threshold (float, optional): Passing similarity
+            model (str, optional): Embedding model id
+            include_reason (bool, optional): Set a reason with the score
+            async_mode (bool, optional): Kept for deepeval compatibility
+        """
+        self.threshold = threshold
+        self.evaluation_model = model or DEFAULT_EMBEDDING_MODEL
+        self.include_reason = include_reason
+        self.async_mode = async_mode
+        self.score = None
+        self.reason = None
+        self.success = None
+        self.error = None
+
+    def measure(self, test_case, *args, **kwargs):
+        return asyncio.run(self.a_measure(test_case))
+
+    async def a_measure(self, test_case, *args, **kwargs):
+        if not test_case.expected_output:
+            raise ValueError("semantic_similarity needs an expected_output")
+        similarity = await get_batcher(self.evaluation_model).score(test_case.actual_output, test_case.expected_output)
+        self.score = max(0.0, similarity)
+        self.success = self.score >= self.threshold
+        if self.include_reason:
+            self.reason = f"Cosine similarity of the actual and expected output embeddings is {self.score:.3f}"
+        return self.score
+
+    def is_successful(self):
+        return bool(self.success)
+
+    @property
+    def __name__(self):
+        return "Semantic Similarity"
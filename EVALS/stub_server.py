@@ -0,0 +1,319 @@
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+DEFAULT_PORT = 8008
+DEFAULT_EMBEDDING_DIM = 256
+
+# deepeval parses these keys from judge replies that are not schema-constrained
+UNION_REPLY_KEYS = ("statements", "truths", "claims", "opinions")
+
+
+def _seed(*parts):
+    return int.from_bytes(hashlib.sha256("\x00".join(parts).encode("utf-8")).digest()[:8], "little")
+
+
+def _count_tokens(text):
+    return max(1, len(text) // 4)
+
+
+class TokenBucket:
+    def __init__(self, per_minute):
+        """
+        Refilling allowance of requests or tokens per minute
+
+        Args:
+            per_minute (float): Capacity refilled every minute; 0 disables the limit
+        """
+        self.per_minute = per_minute
+        self.available = float(per_minute)
+        self.updated = time.monotonic()
+
+    def fits(self, amount):
+        """Whether ``amount`` can ever be spent, i.e. is within the capacity"""
+        return not self.per_minute or amount <= self.per_minute
+
+    def wait(self, amount):
+        """
+        Refill, without spending
+
+        Returns:
+            float: 0 when ``amount`` is available, else seconds until enough has refilled
+        """
+        if not self.per_minute:
+            return 0.0
+        now = time.monotonic()
+        self.available = min(self.per_minute, self.available + (now - self.updated) * self.per_minute / 60)
+        self.updated = now
+        return max(0.0, (amount - self.available) * 60 / self.per_minute)
+
+    def spend(self, amount):
+        """Spend ``amount``, which ``wait`` has just found available"""
+        if self.per_minute:
+            self.available -= amount
+
+
+class StubJudge:
+    def __init__(self, latency=0.2, jitter=0.05, error_rate=0.0, rpm=0, tpm=0, yes_rate=0.8, dim=DEFAULT_EMBEDDING_DIM, seed=0,
+                 output_latency=0.0):
+        """
+        Deterministic stand-in for an OpenAI-compatible judge and embedding model
+
+        Replies depend only on the request content: the same prompt always
+        gets the same verdicts, so scores are reproducible. Latency, random
+        server errors and 429 rate limits are configurable, to exercise the
+        runner's concurrency and retry behaviour.
+
+        Args:
+            latency (float, optional): Base seconds per request
+            jitter (float, optional): Extra random seconds, uniform in [0, jitter]
+            error_rate (float, optional): Fraction of requests answered with a 500
+            rpm (int, optional): Requests per minute before answering 429; 0 for no limit
+            tpm (int, optional): Prompt tokens per minute before answering 429; 0 for no limit
+            yes_rate (float, optional): Fraction of "yes" verdicts, which sets typical scores
+            dim (int, optional): Embedding dimensions
+            seed (int, optional): Seed of the latency and error draws
+            output_latency (float, optional): Extra seconds per 1000 completion tokens,
+                so longer replies take longer as with a real model
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.yes_rate = yes_rate
+        self.dim = dim
+        self.output_latency = output_latency
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.stats = {"requests": 0, "ok": 0, "errors": 0, "rate_limited": 0, "prompt_tokens": 0}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def admit(self, prompt_tokens):
+        """
+        Apply rate limits and error injection to a request
+
+        A request is only charged when both limits admit it, so a 429 on the
+        token limit does not also use up a request, and vice versa.
+
+        Returns:
+            tuple: (HTTP status, seconds to sleep or Retry-After value)
+        """
+        with self._lock:
+            self.stats["requests"] += 1
+            if not self.tokens.fits(prompt_tokens):
+                # No wait would help, like a real endpoint rejecting an oversized request
+                self.stats["errors"] += 1
+                return 400, 0.0
+            wait = max(self.requests.wait(1), self.tokens.wait(prompt_tokens))
+            if wait:
+                self.stats["rate_limited"] += 1
+                return 429, wait
+            self.requests.spend(1)
+            self.tokens.spend(prompt_tokens)
+            if self._random.random() < self.error_rate:
+                self.stats["errors"] += 1
+                return 500, 0.0
+            self.stats["ok"] += 1
+            self.stats["prompt_tokens"] += prompt_tokens
+            return 200, self.latency + self._random.uniform(0, self.jitter)
+
+    def generation_time(self, payload):
+        """Seconds spent generating a reply, from its completion tokens"""
+        return payload.get("usage", {}).get("completion_tokens", 0) / 1000 * self.output_latency
+
+    def chat(self, body):
+        """Build a chat completion for a request body."""
+        prompt = "\n".join(str(message.get("content", "")) for message in body.get("messages", []))
+        response_format = body.get("response_format") or {}
+        if response_format.get("type") == "json_schema":
+            schema = response_format["json_schema"]["schema"]
+            content = json.dumps(self._from_schema(schema, schema, prompt, "$"))
+        else:
+            content = json.dumps(self._union_reply(prompt))
+        return {
+            "id": f"chatcmpl-stub-{_seed(prompt) % 10**12}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub-judge"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {
+                "prompt_tokens": _count_tokens(prompt),
+                "completion_tokens": _count_tokens(content),
+                "total_tokens": _count_tokens(prompt) + _count_tokens(content),
+            },
+        }
+
+    def embeddings(self, body):
+        """Build an embeddings response; each vector is seeded by its text."""
+        texts = body.get("input", [])
+        if isinstance(texts, str):
+            texts = [texts]
+        data = []
+        for i, text in enumerate(texts):
+            vector = np.random.default_rng(_seed("embedding", str(text))).standard_normal(self.dim)
+            data.append({"object": "embedding", "index": i, "embedding": (vector / np.linalg.norm(vector)).tolist()})
+        tokens = sum(_count_tokens(str(text)) for text in texts)
+        return {
+            "object": "list",
+            "data": data,
+            "model": body.get("model", "stub-embedding"),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }
+
+    def _verdict(self, prompt, path):
+        return "yes" if (_seed(prompt, path) % 1000) / 1000 < self.yes_rate else "no"
+
+    def _from_schema(self, schema, root, prompt, path):
+        # Fill a JSON schema with values derived from the prompt
+        if "$ref" in schema:
+            name = schema["$ref"].rsplit("/", 1)[-1]
+            return self._from_schema(root.get("$defs", root.get("definitions", {}))[name], root, prompt, path)
+        for key in ("anyOf", "oneOf", "allOf"):
+            if key in schema:
+                options = [option for option in schema[key] if option.get("type") != "null"]
+                return self._from_schema(options[0] if options else {"type": "null"}, root, prompt, path)
+        if "enum" in schema:
+            return schema["enum"][_seed(prompt, path) % len(schema["enum"])]
+
+        kind = schema.get("type", "object")
+        if kind == "object":
+            return {
+                name: self._from_schema(prop, root, prompt, f"{path}.{name}")
+                for name, prop in schema.get("properties", {}).items()
+            }
+        if kind == "array":
+            count = 1 + _seed(prompt, path) % 3
+            return [self._from_schema(schema.get("items", {}), root, prompt, f"{path}[{i}]") for i in range(count)]
+        if kind in ("number", "integer"):
+            value = (_seed(prompt, path) % 1000) / 1000
+            return round(value * 10) if kind == "integer" else value
+        if kind == "boolean":
+            return self._verdict(prompt, path) == "yes"
+        if path.endswith(".verdict"):
+            return self._verdict(prompt, path)
+        return f"Stub {path.rsplit('.', 1)[-1]} {_seed(prompt, path) % 10**6}"
+
+    def _union_reply(self, prompt):
+        # One object carrying every key deepeval's JSON-mode prompts ask for
+        count = 1 + _seed(prompt, "count") % 3
+        reply = {key: [f"Stub {key[:-1]} {i}" for i in range(count)] for key in UNION_REPLY_KEYS}
+        reply["verdicts"] = [
+            {"verdict": self._verdict(prompt, f"verdicts[{i}]"), "reason": f"Stub reason {i}"} for i in range(count)
+        ]
+        reply["reason"] = "Stub reason"
+        reply["score"] = (_seed(prompt, "score") % 1000) / 1000
+        return reply
+
+
+def make_handler(judge):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass  # Keep load tests quiet
+
+        def do_GET(self):
+            if self.path.rstrip("/").endswith("/models"):
+                self._send(200, {"object": "list", "data": [{"id": "stub-judge", "object": "model"}]})
+            elif self.path.rstrip("/").endswith("/stats"):
+                self._send(200, judge.stats)
+            else:
+                self._send(404, {"error": {"message": f"Unknown path {self.path}", "type": "not_found"}})
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if self.path.endswith("/chat/completions"):
+                build = judge.chat
+                prompt = "".join(str(message.get("content", "")) for message in body.get("messages", []))
+            elif self.path.endswith("/embeddings"):
+                build = judge.embeddings
+                prompt = json.dumps(body.get("input", ""))
+            else:
+                self._send(404, {"error": {"message": f"Unknown path {self.path}", "type": "not_found"}})
+                return
+
+            status, wait = judge.admit(_count_tokens(prompt))
+            if status == 429:
+                self._send(429, {"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded",
+                                           "code": "rate_limit_exceeded"}},
+                           {"Retry-After": f"{wait:.3f}", "Retry-After-Ms": str(int(wait * 1000))})
+            elif status == 400:
+                self._send(400, {"error": {"message": "Request too large for the tokens per minute limit",
+                                           "type": "invalid_request_error", "code": "rate_limit_exceeded"}})
+            elif status == 500:
+                self._send(500, {"error": {"message": "Injected server error", "type": "server_error"}})
+            else:
+                payload = build(body)
+                time.sleep(wait + judge.generation_time(payload))
+                self._send(200, payload)
+
+        def _send(self, status, payload, headers=None):
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+    return Handler
+
+
+def serve(judge, host="127.0.0.1", port=DEFAULT_PORT):
+    """
+    Start the stub server in a background thread
+
+    Args:
+        judge (StubJudge): Reply and fault configuration
+        host (str, optional): Interface to bind
+        port (int, optional): Port to bind; 0 picks a free one
+
+    Returns:
+        ThreadingHTTPServer: Running server; call ``shutdown()`` to stop it
+    """
+    server = ThreadingHTTPServer((host, port), make_handler(judge))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Local OpenAI-compatible judge and embedding server for offline eval load tests",
+        epilog="Point the runner at it with OPENAI_BASE_URL=http://127.0.0.1:8008/v1 OPENAI_API_KEY=stub",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency-ms", type=float, default=200, help="Base latency per request")
+    parser.add_argument("--jitter-ms", type=float, default=50, help="Extra random latency, uniform")
+    parser.add_argument("--output-ms-per-1k", type=float, default=0, help="Extra latency per 1000 completion tokens")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with a 500")
+    parser.add_argument("--rpm", type=int, default=0, help="Requests per minute before 429s (0: unlimited)")
+    parser.add_argument("--tpm", type=int, default=0, help="Prompt tokens per minute before 429s (0: unlimited)")
+    parser.add_argument("--yes-rate", type=float, default=0.8, help="Fraction of 'yes' verdicts")
+    parser.add_argument("--dim", type=int, default=DEFAULT_EMBEDDING_DIM, help="Embedding dimensions")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    judge = StubJudge(args.latency_ms / 1000, args.jitter_ms / 1000, args.error_rate, args.rpm, args.tpm,
+                      args.yes_rate, args.dim, args.seed, args.output_ms_per_1k / 1000)
+    server = serve(judge, args.host, args.port)
+    print(f"Stub judge listening on http://{args.host}:{server.server_address[1]}/v1")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from batch_judge import BatchJudge, CaseBatcher, case_key
+from scheduler import JudgeScheduler
+
+
+class FakeClient:
+    # Replies with the scores queued for each call, in the shape of openai's chat completions
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.prompts = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, messages, **kwargs):
+        self.prompts.append(messages[0]["content"])
+        content = self.replies.pop(0)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(prompt_tokens=10, completion_tokens=5),
+        )
+
+
+def make_case(text):
+    return SimpleNamespace(input=f"question {text}", actual_output=f"answer {text}", retrieval_context=None)
+
+
+def reply(*scores):
+    return json.dumps({case_key(i): {"reason": "because", "score": score} for i, score in enumerate(scores)})
+
+
+def test_parse_marks_malformed_entries():
+    judge = BatchJudge("answer_relevancy", threshold=0.5)
+    content = json.dumps({
+        case_key(0): {"reason": "ok", "score": 0.8},
+        case_key(1): {"reason": "out of range", "score": 1.5},
+        case_key(2): {"reason": "boolean", "score": True},
+    })
+    scores = judge.parse(content, 4)
+    assert scores[0] == {"score": 0.8, "success": True, "reason": "ok"}
+    assert scores[1:] == [None, None, None]
+    assert judge.parse("not json", 2) == [None, None]
+
+
+def test_unknown_metric_is_rejected():
+    with pytest.raises(ValueError):
+        BatchJudge("bias", threshold=0.5)
+
+
+def test_cases_arriving_together_share_one_call():
+    client = FakeClient([reply(0.9, 0.2, 0.6)])
+    judge = BatchJudge("answer_relevancy", threshold=0.5, client=client)
+
+    async def run():
+        batcher = CaseBatcher(judge, JudgeScheduler(max_concurrency=2), batch_size=3)
+        return await asyncio.gather(*(batcher.score(make_case(i)) for i in range(3)))
+
+    scores = asyncio.run(run())
+    assert [score["success"] for score in scores] == [True, False, True]
+    assert len(client.prompts) == 1
+    assert all(f"question {i}" in client.prompts[0] for i in range(3))
+    assert judge.stats["calls"] == 1 and judge.stats["cases"] == 3
@@ -0,0 +1,47 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("deepeval")  # judge_cache reads the test-case fields from dataset
+
+import judge_cache
+from judge_cache import JudgeCache
+
+METRIC = {"name": "faithfulness", "threshold": 0.5}
+
+
+def make_case(**fields):
+    return SimpleNamespace(**{"input": "q", "actual_output": "a", **fields})
+
+
+def test_formatting_only_edits_share_a_key():
+    assert JudgeCache.key(METRIC, "gpt", make_case(input="  q\n")) == JudgeCache.key(METRIC, "gpt", make_case())
+    assert JudgeCache.key(METRIC, "gpt", make_case()) != JudgeCache.key(METRIC, "other", make_case())
+    assert JudgeCache.key(METRIC, "gpt", make_case()) != JudgeCache.key(dict(METRIC, threshold=0.7), "gpt", make_case())
+
+
+def test_scores_persist_across_runs(tmp_path):
+    cache = JudgeCache(tmp_path / "cache.sqlite3")
+    cache.put("k", {"score": 0.5})
+    assert cache.get("k") == {"score": 0.5}
+    assert cache.get("missing") is None
+    cache.close()
+
+    cache = JudgeCache(tmp_path / "cache.sqlite3")
+    assert cache.get("k") == {"score": 0.5}
+    assert cache.stats()["hits"] == 1
+
+
+def test_least_recently_used_scores_are_evicted(tmp_path, monkeypatch):
+    cache = JudgeCache(tmp_path / "cache.sqlite3", max_bytes=100)
+    cache.put("a", {"score": "x" * 20})
+    cache.put("b", {"score": "y" * 20})
+    monkeypatch.setattr(judge_cache.time, "time", lambda: 2e9)  # "a" is used after "b"
+    cache.get("a")
+    monkeypatch.undo()
+    cache.put("c", {"score": "z" * 20})
+
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    assert cache.stats()["stored_bytes"] <= 100
+    cache.close()
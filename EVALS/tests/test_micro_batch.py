@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from micro_batch import MicroBatcher
+
+
+class Doubler(MicroBatcher):
+    def __init__(self, batch_size, max_wait):
+        super().__init__(batch_size, max_wait)
+        self.batches = []
+
+    async def _score_batch(self, requests):
+        self.batches.append(list(requests))
+        return [request * 2 for request in requests]
+
+
+class Failing(MicroBatcher):
+    async def _score_batch(self, requests):
+        raise ValueError("judge down")
+
+
+def test_full_batch_is_sent_at_once():
+    async def run():
+        batcher = Doubler(batch_size=3, max_wait=60)
+        return await asyncio.gather(*(batcher.submit(i) for i in range(3))), batcher.batches
+
+    results, batches = asyncio.run(run())
+    assert results == [0, 2, 4]
+    assert batches == [[0, 1, 2]]
+
+
+def test_partial_batch_is_sent_after_max_wait():
+    async def run():
+        batcher = Doubler(batch_size=10, max_wait=0.01)
+        first = await asyncio.gather(batcher.submit(1), batcher.submit(2))
+        second = await batcher.submit(3)
+        return first, second, batcher.batches
+
+    first, second, batches = asyncio.run(run())
+    assert first == [2, 4] and second == 6
+    assert batches == [[1, 2], [3]]
+
+
+def test_batch_error_reaches_every_request():
+    async def run():
+        batcher = Failing(batch_size=2, max_wait=60)
+        return await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_cancelled_request_does_not_break_its_batch():
+    async def run():
+        batcher = Doubler(batch_size=10, max_wait=0.01)
+        cancelled = asyncio.ensure_future(batcher.submit(1))
+        kept = asyncio.ensure_future(batcher.submit(2))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        return await kept
+
+    assert asyncio.run(run()) == 4
+
+
+def test_score_batch_is_abstract():
+    with pytest.raises(NotImplementedError):
+        asyncio.run(MicroBatcher(1, 0)._score_batch([1]))
@@ -0,0 +1,75 @@
+import json
+
+import result_log
+from result_log import ResultLog
+
+RUN_KEY = {"input": "abc", "metrics": ["faithfulness"]}
+
+
+def row(line, error=False):
+    score = {"error": "timeout"} if error else {"score": 1.0}
+    return {"line": line, "metrics": {"faithfulness": score}}
+
+
+def read_rows(path):
+    return [json.loads(line) for line in path.read_bytes().splitlines()]
+
+
+def test_resume_keeps_only_checkpointed_rows(tmp_path):
+    results_path = tmp_path / "results.jsonl"
+    log = ResultLog(results_path, RUN_KEY)
+    log.append(row(0))
+    log.append(row(1))
+    log.flush()
+    log.append(row(2))  # Buffered only, lost in the crash
+    segment = log.run_folder / log.segments[-1][0]
+    with open(segment, "ab") as f:
+        f.write(b'{"line": 3, "metr')  # Torn write past the checkpoint
+
+    resumed = ResultLog(results_path, RUN_KEY)
+    assert resumed.resumed == 2
+    assert [resumed.is_done(line) for line in range(4)] == [True, True, False, False]
+
+    resumed.append(row(2))
+    resumed.append(row(3))
+    resumed.finalize()
+    assert [r["line"] for r in read_rows(results_path)] == [0, 1, 2, 3]
+    assert not resumed.run_folder.exists()
+
+
+def test_checkpoint_of_another_run_is_discarded(tmp_path):
+    results_path = tmp_path / "results.jsonl"
+    log = ResultLog(results_path, RUN_KEY)
+    log.append(row(0))
+    log.close()
+
+    other = ResultLog(results_path, dict(RUN_KEY, input="changed"))
+    assert other.resumed == 0
+    assert not other.is_done(0)
+
+
+def test_failed_rows_are_evaluated_again_and_replaced(tmp_path):
+    results_path = tmp_path / "results.jsonl"
+    log = ResultLog(results_path, RUN_KEY)
+    log.append(row(0))
+    log.append(row(1, error=True))
+    log.close()
+
+    resumed = ResultLog(results_path, RUN_KEY)
+    assert resumed.is_done(0) and not resumed.is_done(1)
+    resumed.append(row(1))
+    resumed.finalize()
+    assert read_rows(results_path) == [row(0), row(1)]
+
+
+def test_rows_start_new_segments(tmp_path, monkeypatch):
+    monkeypatch.setattr(result_log, "SEGMENT_ROWS", 2)
+    results_path = tmp_path / "results.jsonl"
+    log = ResultLog(results_path, RUN_KEY)
+    for line in range(5):
+        log.append(row(line))
+        log.flush()
+    assert len(log.segments) == 3
+
+    log.finalize()
+    assert [r["line"] for r in read_rows(results_path)] == [0, 1, 2, 3, 4]
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+import scheduler
+from scheduler import JudgeScheduler, is_retryable, retry_after
+
+
+class APIError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(status_code)
+        self.status_code = status_code
+        self.response = type("Response", (), {"headers": headers or {}})()
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(scheduler, "BACKOFF_BASE", 0.0)
+
+
+def flaky(errors, result="ok"):
+    errors = list(errors)
+
+    async def call():
+        if errors:
+            raise errors.pop(0)
+        return result
+    return call
+
+
+def test_retryable_errors_are_retried():
+    judge = JudgeScheduler(max_concurrency=4)
+    assert asyncio.run(judge.call(flaky([APIError(500), APIError(503)]))) == "ok"
+    assert (judge.calls, judge.retries, judge.failures) == (3, 2, 0)
+    assert judge.in_flight == 0
+
+
+def test_client_errors_are_not_retried():
+    judge = JudgeScheduler(max_concurrency=4)
+    with pytest.raises(APIError):
+        asyncio.run(judge.call(flaky([APIError(400)])))
+    assert (judge.calls, judge.retries, judge.failures) == (1, 0, 1)
+
+
+def test_retries_give_up_after_max_retries():
+    judge = JudgeScheduler(max_concurrency=4, max_retries=2)
+    with pytest.raises(APIError):
+        asyncio.run(judge.call(flaky([APIError(500)] * 5)))
+    assert (judge.calls, judge.failures) == (3, 1)
+
+
+def test_rate_limit_halves_concurrency():
+    judge = JudgeScheduler(max_concurrency=8)
+    asyncio.run(judge.call(flaky([APIError(429)])))
+    assert judge.rate_limited == 1
+    assert judge.limit < 8
+
+
+def test_cancelled_call_releases_its_slot():
+    async def run():
+        judge = JudgeScheduler(max_concurrency=1)
+        task = asyncio.ensure_future(judge.call(lambda: asyncio.sleep(60)))
+        await asyncio.sleep(0.01)
+        assert judge.in_flight == 1
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return judge, await asyncio.wait_for(judge.call(flaky([])), timeout=1)
+
+    judge, result = asyncio.run(run())
+    assert result == "ok"
+    assert judge.in_flight == 0
+
+
+def test_error_classification():
+    assert is_retryable(APIError(429)) and is_retryable(APIError(502))
+    assert not is_retryable(APIError(404)) and not is_retryable(ValueError())
+    assert retry_after(APIError(429, {"retry-after-ms": "1500"})) == 1.5
+    assert retry_after(APIError(429, {"retry-after": "2"})) == 2.0
+    assert retry_after(APIError(429)) is None
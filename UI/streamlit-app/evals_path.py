@@ -0,0 +1,12 @@
+import sys
+from pathlib import Path
+
+# The eval runner's modules import each other by name, so EVALS/ is a folder on the path rather than a package
+EVALS_FOLDER = Path(__file__).resolve().parents[2] / "EVALS"
+
+
+def add_evals_path():
+    """Make the EVALS/ modules importable; pages rerun on every interaction, so add the folder once."""
+    folder = str(EVALS_FOLDER)
+    if folder not in sys.path:
+        sys.path.append(folder)
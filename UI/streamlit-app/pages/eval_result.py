@@ -1,22 +1,66 @@
+import pyarrow.compute as pc
 import streamlit as st
 
+from evals_path import add_evals_path
+
+# The results store is written by the eval runner in EVALS/
+add_evals_path()
+from results_store import STORE_FOLDER, ResultsStore, not_applicable, reason_column, score_column, success_column
+
+
+@st.cache_resource(max_entries=8)
+def load_run_columns(run_id, datasets, columns):
+    """Read only the requested columns of a run; stored runs never change, so this is shared."""
+    return ResultsStore(STORE_FOLDER).load(run_id, list(datasets), list(columns))
+
+
 def display_eval_results():
     st.title("Evaluation Results")
-    
-    # Sample data for demonstration
-    results = {
-        "Metric A": 0.85,
-        "Metric B": 0.90,
-        "Metric C": 0.75,
-    }
-    
+
+    store = ResultsStore(STORE_FOLDER)
+    runs = store.runs()
+    if not runs:
+        st.info("No evaluation runs found. Run EVALS/app.py to score the data_set/Inputs files.")
+        return
+
+    run_id = st.selectbox("Select a run", runs)
+    entries = store.entries(run_id)
+    all_datasets = [entry["dataset"] for entry in entries]
+    all_metrics = sorted({metric for entry in entries for metric in entry["metrics"]})
+
+    datasets = st.multiselect("Datasets", all_datasets, default=all_datasets)
+    metrics = st.multiselect("Metrics", all_metrics, default=all_metrics)
+    if not datasets or not metrics:
+        st.warning("⚠️ Select at least one dataset and one metric.")
+        return
+
+    columns = [name for metric in metrics for name in (score_column(metric), success_column(metric), reason_column(metric))]
+    table = load_run_columns(run_id, tuple(datasets), tuple(columns))
+    st.caption(f"{table.num_rows:,} scored rows")
+
     # Display results in a table
     st.subheader("Metrics Overview")
-    st.table(results)
+    overview = []
+    for metric in metrics:
+        if score_column(metric) not in table.column_names:
+            continue
+        scores = table[score_column(metric)]
+        success = table[success_column(metric)]
+        skipped = 0
+        if reason_column(metric) in table.column_names:
+            # Rows the metric does not apply to are neither scored nor errors, as in metric_aggregates
+            skipped = pc.sum(not_applicable(scores, table[reason_column(metric)])).as_py() or 0
+        overview.append({
+            "Metric": metric,
+            "Mean score": pc.mean(scores).as_py(),
+            "Pass rate": pc.mean(pc.cast(success, "int8")).as_py(),
+            "Scored": len(scores) - scores.null_count,
+            "Errors": scores.null_count - skipped,
+        })
+    st.table(overview)
 
-    # Optionally, you can add visualizations here
     st.subheader("Visualizations")
-    st.bar_chart(results)
+    st.bar_chart({row["Metric"]: row["Mean score"] or 0.0 for row in overview})
 
 if __name__ == "__main__":
-    display_eval_results()
\ No newline at end of file
+    display_eval_results()
@@ -1,16 +1,57 @@
 import streamlit as st
 
+from evals_path import add_evals_path
+
+# The aggregation layer reads the results store written by EVALS/app.py
+add_evals_path()
+from metric_aggregates import get_run_aggregates
+from results_store import STORE_FOLDER, ResultsStore
+
+
 def display_metric_insights():
     st.title("Metric Insights")
     st.write("This page provides insights derived from various metrics.")
-    
-    # Example of displaying a chart
-    st.subheader("Data Trends")
-    st.line_chart([1, 2, 3, 4, 5])  # Replace with actual data
 
-    # Example of displaying insights
-    st.subheader("Key Insights")
-    st.write("Here you can provide insights based on the metrics analyzed.")
+    runs = ResultsStore(STORE_FOLDER).runs()
+    if not runs:
+        st.info("No evaluation runs found. Run EVALS/app.py to score the data_set/Inputs files.")
+        return
+
+    filter_columns = st.columns([1, 1, 1, 2])
+    with filter_columns[0]:
+        run_id = st.selectbox("Select a run", runs)
+    # Aggregates are memoized per run, so changing the filters below only re-queries sorted arrays
+    aggregates = get_run_aggregates(run_id, STORE_FOLDER)
+    if not aggregates.metrics:
+        st.warning("⚠️ This run has no stored metrics.")
+        return
+    with filter_columns[1]:
+        metric = st.selectbox("Metric", aggregates.metrics)
+    with filter_columns[2]:
+        threshold = st.slider("Pass threshold", 0.0, 1.0, 0.5, 0.05)
+    with filter_columns[3]:
+        folders = st.multiselect("Folders", aggregates.folders, default=aggregates.folders)
+
+    summary = aggregates.summary(metric, threshold, folders)
+    if not summary["count"]:
+        st.warning("⚠️ No scored rows for this selection.")
+        return
+
+    metric_columns = st.columns(4)
+    metric_columns[0].metric("Scored rows", f"{summary['count']:,}")
+    metric_columns[1].metric("Mean score", f"{summary['mean']:.3f}")
+    metric_columns[2].metric("Pass rate", f"{summary['pass_rate']:.1%}")
+    metric_columns[3].metric("Errors", f"{summary['errors']:,}")
+
+    st.subheader("Score Distribution")
+    counts, edges = aggregates.histogram(metric, folders)
+    st.bar_chart({f"{low:.2f}–{high:.2f}": int(count) for low, high, count in zip(edges[:-1], edges[1:], counts)})
+
+    st.subheader("Percentiles")
+    st.table({f"p{p}": [round(value, 4)] for p, value in summary["percentiles"].items()})
+
+    st.subheader("Per-Folder Breakdown")
+    st.table([row for row in aggregates.by_folder(metric, threshold) if row["folder"] in folders])
 
 if __name__ == "__main__":
-    display_metric_insights()
\ No newline at end of file
+    display_metric_insights()